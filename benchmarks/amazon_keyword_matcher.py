@@ -0,0 +1,88 @@
+import os
+import random
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'scripts_amazon'))
+
+from bucketing import assign_amazon_bucket, bucket_keywords
+from pipeline.keyword_matcher import KeywordMatcher, build_texts
+
+# Parity check + timing of the compiled KeywordMatcher against the row-wise
+# assign_amazon_bucket, and of relabeling from its score matrix. Uses a
+# sample of the cleaned Amazon data when present, otherwise a synthetic
+# catalog built from the bucket keywords.
+#
+#   python benchmarks/amazon_keyword_matcher.py [rows]
+
+
+def synthetic_catalog(n_rows, seed=42):
+    rng = random.Random(seed)
+    keywords = sorted({kw for kws in bucket_keywords.values() for kw in kws})
+    filler = ['premium', 'quality', 'pack', 'of', 'for', 'with', 'and', 'the', 'size', 'colour',
+              'black', 'durable', 'material', 'easy', 'to', 'use', 'design', 'daily', 'men', 'women']
+
+    def text(n_words, density):
+        words = [rng.choice(keywords) if rng.random() < density else rng.choice(filler) for _ in range(n_words)]
+        # glue some words together so keywords also hit inside / across words
+        return ''.join(w + ('' if rng.random() < 0.1 else ' ') for w in words).strip()
+
+    rows = []
+    for _ in range(n_rows):
+        rows.append({
+            'TITLE': text(rng.randint(3, 20), 0.2),
+            'DESCRIPTION': text(rng.randint(0, 150), 0.05) if rng.random() < 0.6 else np.nan,
+            'BULLET_POINTS': text(rng.randint(0, 80), 0.05) if rng.random() < 0.7 else np.nan,
+        })
+    return pd.DataFrame(rows)
+
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    data_path = './data/amazon/amazon_cleaned.csv'
+    if os.path.exists(data_path):
+        df = pd.read_csv(data_path, nrows=n_rows)
+        print(f"📂 Loaded {len(df)} rows from '{data_path}'")
+    else:
+        df = synthetic_catalog(n_rows)
+        print(f"🧪 Generated {len(df)} synthetic rows")
+
+    start = time.time()
+    expected = df.apply(assign_amazon_bucket, axis=1).tolist()
+    baseline = time.time() - start
+    print(f"⏱️  apply(assign_amazon_bucket) : {baseline:.2f}s")
+
+    ok = True
+    for use_automaton in (True, False):
+        matcher = KeywordMatcher(bucket_keywords, use_automaton=use_automaton)
+        backend = 'aho-corasick' if matcher._automaton is not None else 'trie regex'
+
+        start = time.time()
+        labels = matcher.assign_many(build_texts(df))
+        elapsed = time.time() - start
+
+        mismatches = sum(a != b for a, b in zip(expected, labels))
+        ok = ok and mismatches == 0
+        print(f"⏱️  KeywordMatcher ({backend:12s}): {elapsed:.2f}s — {baseline / elapsed:.1f}x, mismatches: {mismatches}")
+
+    if not ok:
+        sys.exit("❌ KeywordMatcher labels differ from assign_amazon_bucket")
+    print("✅ Labels identical")
+
+    # Relabeling from the saved score matrix: no text scan
+    scores = matcher.score_matrix(build_texts(df))
+    weights = {bucket: 1 + i / 10 for i, bucket in enumerate(matcher.buckets)}
+    start = time.time()
+    relabeled = matcher.label_scores(scores, weights=weights, order=matcher.buckets[::-1])
+    elapsed = time.time() - start
+    changed = sum(a != b for a, b in zip(labels, relabeled))
+    print(f"⏱️  label_scores (new weights)   : {elapsed:.3f}s — {baseline / elapsed:.0f}x, {changed} labels changed")
+
+
+if __name__ == '__main__':
+    main()
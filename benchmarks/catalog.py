@@ -0,0 +1,145 @@
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from pipeline import config
+
+# Synthetic raw catalogs in the Amazon (train.csv) and Flipkart
+# (flipkart.csv) schemas, for benchmarking stages without the real dumps.
+# Text is drawn per word: a bucket keyword from the marketplace config with
+# probability ``density`` (scaled per field), filler otherwise, with
+# log-normal lengths and missing rates close to the real files. Generation is
+# vectorized, and write_catalog() streams chunks so 5M rows fit in memory.
+#
+#   python benchmarks/catalog.py amazon 1000000 ./data/amazon/train_synthetic.csv [--density 1.0]
+
+FILLER = np.array([
+    'premium', 'quality', 'pack', 'of', 'for', 'with', 'and', 'the', 'size', 'colour', 'black', 'white',
+    'durable', 'material', 'easy', 'to', 'use', 'design', 'daily', 'men', 'women', 'kids', 'set', 'cotton',
+    'steel', 'plastic', 'soft', 'comfortable', 'perfect', 'gift', 'best', 'high', 'new', 'original', 'brand',
+    'inch', 'cm', 'large', 'small', 'multicolor', 'combo', 'free', 'delivery', 'genuine', 'product',
+], dtype=object)
+BRANDS = np.array(['Alisha', 'FabHomeDecor', 'AW', 'Sicons', 'Eternal Gandhi', 'dilli bazaaar', 'Elegance',
+                   'Kenway Retail', 'Sonata', 'Fastrack', 'Boat', 'Samsung', 'Nike', 'Puma', 'Lavie'], dtype=object)
+FLIPKART_CATEGORIES = np.array([
+    'Clothing >> Women\'s Clothing', 'Clothing >> Men\'s Clothing', 'Jewellery >> Necklaces & Chains',
+    'Watches >> Wrist Watches', 'Home Decor & Festive Needs >> Showpieces', 'Home Furnishing >> Bed Linen',
+    'Computers >> Laptop Accessories', 'Mobiles & Accessories >> Mobile Accessories', 'Footwear >> Women\'s Footwear',
+    'Automotive >> Accessories & Spare parts', 'Beauty and Personal Care >> Makeup', 'Kitchen & Dining >> Cookware',
+    'Electronics >> Audio', 'Toys & School Supplies >> Stationery', 'Furniture >> Living Room Furniture',
+], dtype=object)
+
+
+def _keywords(marketplace):
+    bucket = config.load(marketplace)['bucket']
+    if 'keyword_sets' in bucket:
+        groups = bucket['keyword_sets'].values()
+    else:
+        groups = [kws for spec in bucket['labels'].values() for kws in spec['keywords'].values()]
+    return np.array(sorted({kw for kws in groups for kw in kws}), dtype=object)
+
+
+def _texts(rng, n, median_words, sigma, keywords, density, missing=0.0, min_words=1):
+    """``n`` texts of log-normal word counts; missing ones are NaN."""
+    lengths = np.maximum(min_words, rng.lognormal(np.log(median_words), sigma, n).astype(np.int64))
+    total = int(lengths.sum())
+    words = np.where(rng.random(total) < density,
+                     keywords[rng.integers(0, len(keywords), total)],
+                     FILLER[rng.integers(0, len(FILLER), total)]).tolist()
+    ends = np.cumsum(lengths).tolist()
+    texts = np.array([' '.join(words[end - length:end]) for end, length in zip(ends, lengths.tolist())],
+                     dtype=object)
+    if missing:
+        texts[rng.random(n) < missing] = np.nan
+    return texts
+
+
+def amazon_catalog(n_rows, seed=42, density=1.0, start_id=0):
+    """``n_rows`` of train.csv: PRODUCT_ID, TITLE, BULLET_POINTS, DESCRIPTION, PRODUCT_TYPE_ID, PRODUCT_LENGTH."""
+    rng = np.random.default_rng(seed)
+    keywords = _keywords('amazon')
+    titles = _texts(rng, n_rows, 12, 0.4, keywords, 0.15 * density, min_words=2)
+    bullets = _texts(rng, n_rows, 60, 0.6, keywords, 0.03 * density, missing=0.37)
+    present = ~pd.isna(bullets)
+    bullets[present] = ['[' + text + ']' for text in bullets[present]]
+    return pd.DataFrame({
+        'PRODUCT_ID': np.arange(start_id, start_id + n_rows),
+        'TITLE': [title.title() for title in titles],
+        'BULLET_POINTS': bullets,
+        'DESCRIPTION': _texts(rng, n_rows, 100, 0.8, keywords, 0.03 * density, missing=0.52),
+        'PRODUCT_TYPE_ID': rng.integers(0, 13000, n_rows),
+        'PRODUCT_LENGTH': np.round(rng.lognormal(6.5, 1.0, n_rows), 2),
+    })
+
+
+def flipkart_catalog(n_rows, seed=42, density=1.0, start_id=0):
+    """``n_rows`` of flipkart.csv, with the raw rating strings and category-tree format."""
+    rng = np.random.default_rng(seed)
+    keywords = _keywords('flipkart')
+    ids = np.arange(start_id, start_id + n_rows)
+    brands = BRANDS[rng.integers(0, len(BRANDS), n_rows)]
+    names = _texts(rng, n_rows, 6, 0.4, keywords, 0.25 * density, min_words=2)
+    names = np.array([f'{brand} {name}' for brand, name in zip(brands, names)], dtype=object)
+    categories = FLIPKART_CATEGORIES[rng.integers(0, len(FLIPKART_CATEGORIES), n_rows)]
+    retail = np.round(rng.lognormal(6.5, 1.2, n_rows))
+    discounted = np.round(retail * rng.uniform(0.2, 1.0, n_rows))
+    retail[rng.random(n_rows) < 0.01] = np.nan
+    ratings = np.round(rng.uniform(1, 5, n_rows), 1).astype(str).astype(object)
+    ratings[rng.random(n_rows) < 0.9] = 'No rating available'
+    spec_values = FILLER[rng.integers(0, len(FILLER), n_rows)]
+    brand_column = brands.copy()
+    brand_column[rng.random(n_rows) < 0.3] = np.nan
+    return pd.DataFrame({
+        'uniq_id': [f'{i:032x}' for i in ids],
+        'crawl_timestamp': '2016-03-25 22:59:23 +0000',
+        'product_url': [f'http://www.flipkart.com/{name.lower().replace(" ", "-")}/p/itm{i:013d}' for name, i in zip(names, ids)],
+        'product_name': names,
+        'product_category_tree': [f'["{cat} >> {name[:40]}..."]' for cat, name in zip(categories, names)],
+        'pid': [f'PID{i:013d}' for i in ids],
+        'retail_price': retail,
+        'discounted_price': discounted,
+        'image': '["http://img5a.flixcart.com/image/product.jpeg"]',
+        'is_FK_Advantage_product': False,
+        'description': _texts(rng, n_rows, 60, 0.7, keywords, 0.05 * density, missing=0.02),
+        'product_rating': ratings,
+        'overall_rating': ratings,
+        'brand': brand_column,
+        'product_specifications': [f'{{"product_specification"=>[{{"key"=>"Type", "value"=>"{v}"}}]}}'
+                                   for v in spec_values],
+    })
+
+
+CATALOGS = {'amazon': amazon_catalog, 'flipkart': flipkart_catalog}
+
+
+def write_catalog(path, marketplace, n_rows, seed=42, density=1.0, chunk_rows=100000):
+    """Write a raw ``marketplace`` CSV of ``n_rows`` chunk by chunk; returns its size in bytes."""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        for i, start in enumerate(range(0, n_rows, chunk_rows)):
+            chunk = CATALOGS[marketplace](min(chunk_rows, n_rows - start), seed=seed + i, density=density,
+                                          start_id=start)
+            chunk.to_csv(f, index=False, header=i == 0)
+    return os.path.getsize(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Write a synthetic raw marketplace catalog')
+    parser.add_argument('marketplace', choices=sorted(CATALOGS))
+    parser.add_argument('rows', type=int)
+    parser.add_argument('path')
+    parser.add_argument('--density', type=float, default=1.0, help='keyword density multiplier')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    size = write_catalog(args.path, args.marketplace, args.rows, seed=args.seed, density=args.density)
+    print(f"✅ {args.rows} synthetic {args.marketplace} rows written to '{args.path}' ({size / 1e6:.1f} MB)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from catalog import amazon_catalog, flipkart_catalog
+from pipeline import config, model_artifact, storage
+from pipeline.keyword_matcher import KeywordMatcher, build_texts
+
+# Cold-start cost of the predict entry points as short-lived scheduler jobs:
+# the time to `--help` (interpreter + imports, and which heavy modules got
+# imported), and a full run on a small synthetic catalog with and without the
+# chart. Runs happen in a scratch directory holding the synthetic cleaned
+# data and a small model trained on it, so the real data is never touched.
+#
+#   python benchmarks/cold_start.py [--rows 5000] [--repeat 3]
+
+SCRIPTS = {
+    'amazon': os.path.join(ROOT, 'scripts_amazon', 'predict_bucket.py'),
+    'flipkart': os.path.join(ROOT, 'scripts_flipkart', 'predict_bucket.py'),
+}
+HEAVY_MODULES = ('matplotlib', 'sklearn', 'scipy', 'pandas', 'pyarrow')
+
+# runs a script's --help and reports which heavy modules it imported
+PROBE = """
+import runpy, sys
+sys.argv = [{script!r}, '--help']
+try:
+    runpy.run_path({script!r}, run_name='__main__')
+except SystemExit:
+    pass
+print('MODULES', ' '.join(m for m in {modules!r} if m in sys.modules), file=sys.stderr)
+"""
+
+
+def _train(texts, labels, model_dir):
+    import joblib
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+
+    vectorizer = TfidfVectorizer(max_features=5000, ngram_range=(1, 2), stop_words='english')
+    clf = LogisticRegression(max_iter=200).fit(vectorizer.fit_transform(texts), labels)
+    os.makedirs(model_dir, exist_ok=True)
+    joblib.dump(clf, os.path.join(model_dir, 'bucket_classifier.pkl'))
+    joblib.dump(vectorizer, os.path.join(model_dir, 'vectorizer.pkl'))
+    model_artifact.export(clf, vectorizer, os.path.join(model_dir, 'bucket_model'))
+
+
+def prepare(workdir, rows):
+    """Synthetic cleaned data and a model for both scripts, laid out as they expect."""
+    amazon = amazon_catalog(rows)
+    storage.write_frame(os.path.join(workdir, 'data/amazon/amazon_cleaned'), amazon)
+    keywords = config.load('amazon')['bucket']['labels']['final_bucket']['keywords']
+    _train((amazon['TITLE'] + ' ' + amazon['DESCRIPTION'].fillna('')).tolist(),
+           KeywordMatcher(keywords).assign_many(build_texts(amazon)), os.path.join(workdir, 'models/amazon'))
+
+    flipkart = flipkart_catalog(rows)
+    storage.write_frame(os.path.join(workdir, 'data/flipkart/flipkart_cleaned'), flipkart)
+    _train((flipkart['product_name'] + ' ' + flipkart['description'].fillna('')).tolist(),
+           flipkart['product_category_tree'].str.extract(r'\["([^>]+?) >>', expand=False).fillna('Other').tolist(),
+           os.path.join(workdir, 'models'))
+
+
+def timed_run(args, workdir, repeat):
+    """Fastest wall time of ``repeat`` runs, and the stderr of the last one."""
+    env = dict(os.environ, MPLBACKEND='Agg')
+    env.pop('DISPLAY', None)
+    best, stderr = None, ''
+    for _ in range(repeat):
+        start = time.perf_counter()
+        proc = subprocess.run([sys.executable] + args, cwd=workdir, env=env, capture_output=True, text=True)
+        elapsed = time.perf_counter() - start
+        if proc.returncode:
+            sys.exit(f"❌ {' '.join(args)} failed:\n{proc.stderr}")
+        best = elapsed if best is None else min(best, elapsed)
+        stderr = proc.stderr
+    return best, stderr
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Cold-start time of the predict entry points')
+    parser.add_argument('--rows', type=int, default=5000, help='rows of the synthetic catalogs')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per measurement (fastest is kept)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        print(f"🧪 Preparing {args.rows}-row synthetic catalogs and models...")
+        prepare(workdir, args.rows)
+        print(f"\n{'script':9s} {'--help s':>9s} {'run s':>7s} {'+ plot s':>9s}  imported by --help")
+        for marketplace, script in SCRIPTS.items():
+            probe = PROBE.format(script=script, modules=HEAVY_MODULES)
+            help_seconds, stderr = timed_run(['-c', probe], workdir, args.repeat)
+            imported = stderr.rsplit('MODULES', 1)[-1].strip()
+            run_seconds, _ = timed_run([script, '--no-cache', '--no-plot'], workdir, args.repeat)
+            plot_seconds, _ = timed_run([script, '--no-cache'], workdir, args.repeat)
+            print(f"{marketplace:9s} {help_seconds:9.2f} {run_seconds:7.2f} {plot_seconds:9.2f}  {imported or '-'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import joblib
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from amazon_keyword_matcher import synthetic_catalog
+from pipeline import model_artifact
+from pipeline.fast_inference import LinearTextPredictor
+
+# Label parity + speedup of the batched fast inference engine against
+# ``clf.predict(vectorizer.transform(texts))`` with the saved Amazon model, on
+# 100k-text chunks like predict_bucket.py. Also checks top-k probabilities
+# against predict_proba and the engine on the memory-mapped artifact. Fails
+# when labels differ or either engine is less than --min-speedup (3x) faster.
+#
+#   python benchmarks/fast_inference.py [rows] [--model clf.pkl --vectorizer vectorizer.pkl]
+
+MODEL = os.path.join(ROOT, 'models/amazon/bucket_classifier.pkl')
+VECTORIZER = os.path.join(ROOT, 'models/amazon/vectorizer.pkl')
+CHUNK = 100000
+
+
+def timed(predict, texts):
+    start = time.time()
+    labels = np.concatenate([predict(texts[i:i + CHUNK]) for i in range(0, len(texts), CHUNK)])
+    return labels, time.time() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fast inference engine parity and speedup against sklearn')
+    parser.add_argument('rows', type=int, nargs='?', default=200000)
+    parser.add_argument('--model', default=MODEL)
+    parser.add_argument('--vectorizer', default=VECTORIZER)
+    parser.add_argument('--min-speedup', type=float, default=3.0)
+    args = parser.parse_args()
+
+    df = synthetic_catalog(args.rows)
+    texts = (df['TITLE'].fillna('') + ' ' + df['DESCRIPTION'].fillna('') + ' ' + df['BULLET_POINTS'].fillna('')).tolist()
+    clf, vectorizer = joblib.load(args.model), joblib.load(args.vectorizer)
+    print(f"🧪 {len(texts)} synthetic texts, chunks of {CHUNK}")
+
+    expected, sklearn_time = timed(lambda chunk: clf.predict(vectorizer.transform(chunk)), texts)
+    print(f"⏱️  sklearn transform + predict : {sklearn_time:.2f}s")
+
+    engine = LinearTextPredictor(clf, vectorizer)
+    labels, fast_time = timed(engine.predict, texts)
+    print(f"⏱️  fast engine (pickles)      : {fast_time:.2f}s  ({sklearn_time / fast_time:.1f}x)")
+    ok = np.array_equal(labels, expected)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        artifact = model_artifact.export(clf, vectorizer, os.path.join(tmp, 'bucket_model'))
+        engine_mm = LinearTextPredictor(*model_artifact.load(artifact))
+        labels_mm, mm_time = timed(engine_mm.predict, texts)
+        print(f"⏱️  fast engine (artifact)     : {mm_time:.2f}s  ({sklearn_time / mm_time:.1f}x)")
+        ok &= np.array_equal(labels_mm, expected)
+
+    sample = texts[:5000]
+    top_labels, top_proba = engine.top_k(sample, k=3)
+    proba = clf.predict_proba(vectorizer.transform(sample))
+    ok &= np.allclose(np.sort(proba, axis=1)[:, ::-1][:, :3], top_proba)
+    ok &= np.array_equal(top_labels[:, 0], clf.classes_[proba.argmax(axis=1)])
+
+    print("✅ Labels and top-k probabilities match sklearn" if ok else "❌ Fast engine differs from sklearn")
+    speedup = sklearn_time / max(fast_time, mm_time)
+    if speedup < args.min_speedup:
+        print(f"❌ Speedup {speedup:.1f}x is below {args.min_speedup}x")
+        ok = False
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
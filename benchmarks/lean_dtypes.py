@@ -0,0 +1,107 @@
+import argparse
+import io
+import os
+import sys
+import tempfile
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from catalog import amazon_catalog
+from pipeline import config, delta, storage
+from pipeline.cleaning import clean_amazon_chunk
+from pipeline.keyword_matcher import KeywordMatcher, build_texts
+from pipeline.near_duplicates import TEXT_COLUMNS
+from pipeline.stages import model_texts
+
+# Per-chunk memory of the Amazon chunk loops with text columns as Arrow
+# strings and labels as categories, against Python object strings, on a
+# synthetic catalog stored in every available format, both as cleaned
+# (PRODUCT_ID, TITLE, BULLET_POINTS, DESCRIPTION, no missing text) and raw
+# (extra columns, missing descriptions). Each chunk is also run
+# through both layouts to check that nothing downstream changes: keyword
+# texts, row hashes (--delta state), the model input text, and the written
+# output with its label column (the joined text column is no longer written).
+#
+#   python benchmarks/lean_dtypes.py [--rows 300000] [--chunksize 100000] [--check]
+
+
+def label_output(chunk, labels, categorical):
+    chunk = chunk.copy()
+    chunk['final_bucket'] = pd.Categorical(labels) if categorical else labels
+    return chunk
+
+
+def _values(parquet_bytes):
+    # dtypes aside (string / category vs object), with every missing value as None
+    frame = pd.read_parquet(io.BytesIO(parquet_bytes)).astype(object)
+    return frame.where(frame.notna(), None)
+
+
+def compare_chunk(i, old, new, matcher):
+    """Names of the outputs that differ between the object and Arrow layouts of one chunk."""
+    differs = []
+    old_texts, new_texts = build_texts(old), build_texts(new)
+    if old_texts != new_texts:
+        differs.append('keyword texts')
+    if not (delta.row_hashes(old) == delta.row_hashes(new)).all():
+        differs.append('row hashes')
+    if model_texts(old, TEXT_COLUMNS).tolist() != model_texts(new, TEXT_COLUMNS).tolist():
+        differs.append('model texts')
+    labels = matcher.assign_many(new_texts)
+    for fmt in (storage.FORMATS if storage.TEXT_DTYPE is not None else ('csv',)):
+        old_part = storage.encode_part(label_output(old, labels, False), fmt, i).data
+        new_part = storage.encode_part(label_output(new, labels, True), fmt, i).data
+        if fmt == 'csv' and old_part != new_part:
+            differs.append('csv output')
+        elif fmt == 'parquet' and not _values(old_part).equals(_values(new_part)):
+            differs.append('parquet output')
+    return differs
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Chunk memory with Arrow strings vs object strings')
+    parser.add_argument('--rows', type=int, default=300000)
+    parser.add_argument('--chunksize', type=int, default=100000)
+    parser.add_argument('--check', action='store_true', help='exit 1 if any output differs between the layouts')
+    args = parser.parse_args()
+
+    if storage.TEXT_DTYPE is None:
+        print("⚠️  pyarrow is not installed: text columns stay object strings")
+    matcher = KeywordMatcher(config.load('amazon')['bucket']['labels']['final_bucket']['keywords'])
+    raw = amazon_catalog(args.rows)
+    inputs = {'cleaned': clean_amazon_chunk(raw.copy()), 'raw': raw}
+    failures = 0
+    with tempfile.TemporaryDirectory() as workdir:
+        for (kind, catalog), fmt in ((i, f) for i in inputs.items()
+                                     for f in (storage.FORMATS if storage.TEXT_DTYPE is not None else ('csv',))):
+            name = os.path.join(workdir, kind, fmt, 'amazon_cleaned')
+            storage.write_frame(name, catalog, fmt, chunksize=args.chunksize)
+            old_chunks = storage.read_chunks(name, chunksize=args.chunksize)
+            new_chunks = storage.read_chunks(name, chunksize=args.chunksize, text_columns=TEXT_COLUMNS)
+            print(f"\n📦 {kind} {fmt} input, {args.chunksize} rows per chunk")
+            print(f"{'chunk':>5s} {'object MB':>10s} {'arrow MB':>9s} {'saved':>6s}")
+            for i, (old, new) in enumerate(zip(old_chunks, new_chunks)):
+                old_bytes = storage.frame_bytes(label_output(old, matcher.assign_many(build_texts(old)), False))
+                new_bytes = storage.frame_bytes(label_output(new, matcher.assign_many(build_texts(new)), True))
+                print(f"{i:5d} {old_bytes / 2**20:10.1f} {new_bytes / 2**20:9.1f} "
+                      f"{100 * (1 - new_bytes / old_bytes):5.0f}%")
+                if args.check:
+                    differs = compare_chunk(i, old, new, matcher)
+                    if list(new.columns) != list(catalog.columns):
+                        differs.append('column order')
+                    if differs:
+                        failures += 1
+                        print(f"❌ {kind} {fmt} chunk {i}: {', '.join(differs)} differ")
+
+    if args.check:
+        print("✅ Outputs identical with Arrow strings and category labels" if failures == 0
+              else f"❌ {failures} chunks differ")
+        if failures:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
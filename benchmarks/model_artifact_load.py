@@ -0,0 +1,129 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from pipeline import model_artifact
+
+# Load time and per-worker memory of the joblib pickles against the compact
+# memory-mapped artifact (float64 / float32 / int8 weights), plus label
+# agreement with the pickles. For every mode --workers processes load the
+# model at the same time, score the same texts, and report their memory
+# while all of them are still alive, so Pss shows what each worker really
+# costs once shared pages are split between them.
+#
+#   python benchmarks/model_artifact_load.py [--workers 4] [--rows 20000]
+
+MODEL = os.path.join(ROOT, 'models/amazon/bucket_classifier.pkl')
+VECTORIZER = os.path.join(ROOT, 'models/amazon/vectorizer.pkl')
+
+
+def memory_mb():
+    """RSS, Pss and private memory of this process from /proc (Linux only)."""
+    fields = {}
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            for line in f:
+                key, _, value = line.partition(':')
+                if value.strip().endswith('kB'):
+                    fields[key] = int(value.split()[0]) / 1024
+    except OSError:
+        pass
+    private = fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0)
+    return {'rss_mb': fields.get('Rss', 0), 'pss_mb': fields.get('Pss', 0), 'private_mb': private}
+
+
+def worker(mode, source, texts_path):
+    """Runs in a subprocess: load, predict, then report memory once told to."""
+    start = time.time()
+    if mode == 'pickle':
+        import joblib
+
+        clf, vectorizer = joblib.load(MODEL), joblib.load(VECTORIZER)
+    else:
+        clf, vectorizer = model_artifact.load(source)
+    load_seconds = time.time() - start
+
+    with open(texts_path) as f:
+        texts = json.load(f)
+    start = time.time()
+    labels = [str(label) for label in clf.predict(vectorizer.transform(texts))]
+    predict_seconds = time.time() - start
+
+    print('ready', flush=True)
+    sys.stdin.readline()  # wait until every worker of this mode is loaded
+    print(json.dumps(dict(memory_mb(), load_seconds=load_seconds, predict_seconds=predict_seconds,
+                          labels=labels)), flush=True)
+
+
+def run_mode(mode, source, texts_path, workers):
+    procs = [subprocess.Popen([sys.executable, __file__, '--worker', mode, source, texts_path],
+                              stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+             for _ in range(workers)]
+    for proc in procs:
+        if proc.stdout.readline().strip() != 'ready':
+            raise RuntimeError(f"worker for '{mode}' failed")
+    results = []
+    for proc in procs:
+        proc.stdin.write('\n')
+        proc.stdin.flush()
+        results.append(json.loads(proc.stdout.readline()))
+        proc.wait()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pickle vs memory-mapped model artifact load benchmark')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--rows', type=int, default=20000)
+    args = parser.parse_args()
+
+    import joblib
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from amazon_keyword_matcher import synthetic_catalog
+
+    df = synthetic_catalog(args.rows)
+    texts = (df['TITLE'].fillna('') + ' ' + df['DESCRIPTION'].fillna('') + ' ' + df['BULLET_POINTS'].fillna('')).tolist()
+    clf, vectorizer = joblib.load(MODEL), joblib.load(VECTORIZER)
+    print(f"🧪 {len(texts)} synthetic texts, {args.workers} workers per mode, model from '{MODEL}'\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        texts_path = os.path.join(tmp, 'texts.json')
+        with open(texts_path, 'w') as f:
+            json.dump(texts, f)
+        sizes = {'pickle': (os.path.getsize(MODEL) + os.path.getsize(VECTORIZER)) / 1e6}
+        sources = {'pickle': ''}
+        for weights in model_artifact.WEIGHT_MODES:
+            path = model_artifact.export(clf, vectorizer, os.path.join(tmp, f'model_{weights}'), weights)
+            sizes[weights] = sum(os.path.getsize(file) for file in model_artifact.artifact_files(path)) / 1e6
+            sources[weights] = path
+
+        print(f"{'mode':8s} {'disk MB':>8s} {'load s':>7s} {'predict s':>10s} {'RSS MB':>7s} "
+              f"{'Pss MB':>7s} {'private MB':>11s} {'agreement':>10s}")
+        reference = None
+        for mode, source in sources.items():
+            results = run_mode(mode, source, texts_path, args.workers)
+            labels = np.array(results[0]['labels'])
+            if reference is None:
+                reference = labels
+            mean = {key: np.mean([r[key] for r in results])
+                    for key in ('load_seconds', 'predict_seconds', 'rss_mb', 'pss_mb', 'private_mb')}
+            print(f"{mode:8s} {sizes[mode]:8.1f} {mean['load_seconds']:7.3f} {mean['predict_seconds']:10.2f} "
+                  f"{mean['rss_mb']:7.0f} {mean['pss_mb']:7.0f} {mean['private_mb']:11.0f} "
+                  f"{np.mean(labels == reference):10.4%}")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == '--worker':
+        worker(*sys.argv[2:5])
+    else:
+        main()
@@ -0,0 +1,80 @@
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from amazon_keyword_matcher import synthetic_catalog
+from pipeline.near_duplicates import NearDuplicateIndex, product_texts, recall_check
+
+# Clustering time, clusters found and labels saved by the MinHash/LSH index
+# on a synthetic catalog where a share of the products is re-listed with a
+# small title edit (one word dropped, changed or added), plus recall and
+# precision against brute-force Jaccard on a sample and on a chain of texts
+# each shifted two words from the last (neighbours are near-duplicates, the
+# ends of the chain share nothing), where every copy must stay close to its
+# own representative.
+#
+#   python benchmarks/near_duplicates.py [rows] [relisted_fraction]
+
+
+def relist(df, fraction, seed=7):
+    rng = np.random.default_rng(seed)
+    copies = df.sample(frac=fraction, random_state=seed).copy()
+
+    def edit(title):
+        words = title.split()
+        i = int(rng.integers(0, len(words))) if words else 0
+        op = rng.integers(0, 3)
+        if op == 0 and len(words) > 1:
+            del words[i]
+        elif op == 1 and words:
+            words[i] = 'new'
+        else:
+            words.insert(i, 'premium')
+        return ' '.join(words)
+
+    copies['TITLE'] = copies['TITLE'].map(edit)
+    return pd.concat([df, copies], ignore_index=True).sample(frac=1, random_state=seed).reset_index(drop=True)
+
+
+def chained(n_texts=150, width=40, shift=2, seed=0):
+    words = [f'w{i}' for i in np.random.default_rng(seed).permutation(n_texts * shift + width)]
+    return [' '.join(words[i * shift:i * shift + width]) for i in range(n_texts)]
+
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    fraction = float(sys.argv[2]) if len(sys.argv) > 2 else 0.2
+    df = relist(synthetic_catalog(n_rows), fraction)
+    print(f"🧪 {len(df)} products, {int(n_rows * fraction)} of them re-listed with a title edit")
+
+    start = time.time()
+    index = NearDuplicateIndex()
+    for offset in range(0, len(df), 100000):
+        index.add(product_texts(df.iloc[offset:offset + 100000]))
+    clusters = index.clusters()
+    elapsed = time.time() - start
+    summary = clusters.summary()
+    print(f"⏱️  MinHash + LSH clustering: {elapsed:.2f}s ({len(df) / elapsed:.0f} products/s)")
+    print(f"🧬 {summary['clusters']} clusters, largest {summary['largest_cluster']}, "
+          f"{summary['labels_saved']} labels saved ({summary['labels_saved_pct']}%)")
+
+    start = time.time()
+    # a sample small enough for all-pairs Jaccard, with its own re-listed copies
+    check = recall_check(product_texts(relist(synthetic_catalog(1600, seed=3), fraction)))
+    print(f"🔎 Brute-force check on {check['sample']} products ({time.time() - start:.1f}s): "
+          f"{check['true_pairs']} pairs with Jaccard >= 0.8, recall {check['recall']}, precision {check['precision']}")
+
+    check = recall_check(chained())
+    print(f"⛓️  Chain of {check['sample']} shifted texts: {check['copies']} copies, "
+          f"{check['copy_precision']} of them with Jaccard >= 0.8 to their representative "
+          f"(worst {check['min_copy_jaccard']})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'scripts_amazon'))
+
+from pipeline import storage
+from storage_formats import peak_rss_mb
+import streaming_training
+
+# Accuracy, wall-clock and peak RSS of out-of-core training (every labeled row
+# streamed through HashingVectorizer + SGD) against the current baseline
+# (200k-row sample, TF-IDF + LogisticRegression). Both are scored on the same
+# text-hash holdout of a synthetic catalog labeled by the keyword rules; each
+# mode runs in its own subprocess so peak RSS is per mode.
+#
+#   python benchmarks/out_of_core_training.py [rows]
+
+SAMPLE_ROWS = 200000
+
+
+def train_baseline(name):
+    """training_model_amazon.py's default path, on the shared holdout split."""
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+
+    train_texts, train_labels, test_texts, test_labels = [], [], [], []
+    for texts, labels in streaming_training.labeled_chunks(name):
+        test = streaming_training.holdout_mask(texts)
+        train_texts.append(texts[~test])
+        train_labels.append(labels[~test])
+        test_texts.append(texts[test])
+        test_labels.append(labels[test])
+    X, y = np.concatenate(train_texts), np.concatenate(train_labels)
+    if len(X) > SAMPLE_ROWS:
+        keep = np.random.default_rng(42).choice(len(X), SAMPLE_ROWS, replace=False)
+        X, y = X[keep], y[keep]
+
+    vectorizer = TfidfVectorizer(max_features=15000, ngram_range=(1, 2), stop_words='english')
+    clf = LogisticRegression(max_iter=300, n_jobs=-1)
+    clf.fit(vectorizer.fit_transform(X), y)
+    y_true = np.concatenate(test_labels)
+    return len(X), y_true, clf.predict(vectorizer.transform(np.concatenate(test_texts)))
+
+
+def measure(name, mode, classes):
+    start = time.time()
+    if mode == 'baseline':
+        trained, y_true, y_pred = train_baseline(name)
+    else:
+        _, _, y_true, y_pred = streaming_training.train_out_of_core(
+            name, classes=classes, idf=mode == 'sgd+idf')
+        trained = None
+    print(json.dumps({'seconds': time.time() - start, 'peak_rss_mb': peak_rss_mb(), 'trained': trained,
+                      'accuracy': float(np.mean(y_true == y_pred)), 'holdout': len(y_true)}))
+
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+
+    from amazon_keyword_matcher import synthetic_catalog
+    from bucketing import bucket_keywords
+    from pipeline.keyword_matcher import KeywordMatcher, build_texts
+
+    df = synthetic_catalog(n_rows)
+    df['final_bucket'] = KeywordMatcher(bucket_keywords).assign_many(build_texts(df))
+    classes = sorted(bucket_keywords)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        name = os.path.join(tmp, 'amazon_buckets')
+        storage.write_frame(name, df)
+        labeled = int((df['final_bucket'] != 'Uncategorized').sum())
+        del df
+        print(f"🧪 {n_rows} synthetic rows, {labeled} labeled (Uncategorized is dropped for training)\n")
+
+        print(f"{'mode':10s} {'trained on':>11s} {'accuracy':>9s} {'seconds':>8s} {'peak RSS MB':>12s}")
+        for mode in ('baseline', 'sgd', 'sgd+idf'):
+            out = subprocess.run([sys.executable, __file__, '--measure', name, mode, json.dumps(classes)],
+                                 check=True, capture_output=True, text=True).stdout
+            result = json.loads(out.strip().splitlines()[-1])
+            trained = result['trained'] or '~all'
+            print(f"{mode:10s} {trained:>11} {result['accuracy']:9.4f} {result['seconds']:8.1f} "
+                  f"{result['peak_rss_mb']:12.0f}")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == '--measure':
+        measure(sys.argv[2], sys.argv[3], json.loads(sys.argv[4]))
+    else:
+        main()
@@ -0,0 +1,211 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from pipeline import config as marketplace_config
+from pipeline import stages, storage
+from storage_formats import peak_rss_mb
+
+# Throughput and peak RSS of every pipeline stage on synthetic catalogs
+# (benchmarks/catalog.py) of the given sizes, for both marketplaces. Each
+# stage runs in its own subprocess on a copy of the marketplace config that
+# points at a scratch directory, so peak RSS is per stage and the real data
+# is never touched. Results go to a JSON file (git revision, machine, and
+# seconds / rows per second / peak RSS per marketplace, size and stage);
+# --compare flags stages that got slower than a previous results file.
+#
+#   python benchmarks/pipeline_suite.py [--rows 10000 100000 1000000] [--marketplace amazon]
+#                                       [--out results.json] [--compare baseline.json]
+
+STAGES = {
+    'amazon': ['generate', 'clean', 'bucket', 'assign_amazon_bucket', 'train', 'vectorize', 'predict', 'csv_write'],
+    'flipkart': ['generate', 'clean', 'bucket', 'train', 'vectorize', 'predict', 'csv_write'],
+}
+# stages whose output a later stage reads; they run even when not selected
+INPUT_STAGES = {'generate', 'clean', 'bucket', 'train'}
+
+
+def bench_config(marketplace, workdir, train_rows):
+    """The marketplace config, redirected into ``workdir``."""
+    config = marketplace_config.load(marketplace)
+    config['data_dir'] = os.path.join(workdir, 'data')
+    config['model_dir'] = os.path.join(workdir, 'models')
+    config['clean']['input'] = os.path.join(workdir, 'raw.csv')
+    config['train']['sample'] = min(config['train'].get('sample') or train_rows, train_rows)
+    return config
+
+
+def _cleaned_texts(config):
+    cleaned = marketplace_config.dataset(config, config['clean']['output'])
+    for chunk in storage.read_chunks(cleaned, columns=config['text_columns'], chunksize=config['chunksize']):
+        yield stages.model_texts(chunk, config['text_columns']).tolist()
+
+
+def _load_model(config):
+    import joblib
+
+    _, model_path, vectorizer_path = marketplace_config.model_paths(config)
+    return joblib.load(model_path), joblib.load(vectorizer_path)
+
+
+def run_stage(stage, config, rows, rowwise_rows, workers):
+    """Runs inside the subprocess; returns ``(rows processed, seconds)``."""
+    fmt = storage.DEFAULT_FORMAT
+    if stage == 'generate':
+        from catalog import write_catalog
+
+        start = time.time()
+        write_catalog(config['clean']['input'], config['name'], rows)
+        return rows, time.time() - start
+
+    if stage in ('clean', 'bucket', 'train'):
+        start = time.time()
+        summary = stages.STAGE_FUNCTIONS[stage](config, fmt, workers=workers)
+        return summary.get('rows_read', summary.get('rows')), time.time() - start
+
+    if stage == 'assign_amazon_bucket':
+        sys.path.insert(0, os.path.join(ROOT, 'scripts_amazon'))
+        from bucketing import assign_amazon_bucket
+
+        cleaned = marketplace_config.dataset(config, config['clean']['output'])
+        df = next(storage.read_chunks(cleaned, columns=config['text_columns'], chunksize=rowwise_rows))
+        start = time.time()
+        df.apply(assign_amazon_bucket, axis=1)
+        return len(df), time.time() - start
+
+    if stage in ('vectorize', 'predict'):
+        clf, vectorizer = _load_model(config)
+        done = elapsed = 0
+        for texts in _cleaned_texts(config):
+            start = time.time()
+            X = vectorizer.transform(texts)
+            if stage == 'predict':
+                # only the model call is timed here; the transform is 'vectorize'
+                start = time.time()
+                clf.predict(X)
+            elapsed += time.time() - start
+            done += len(texts)
+        return done, elapsed
+
+    if stage == 'csv_write':
+        output = marketplace_config.dataset(config, config['bucket']['output'])
+        done = elapsed = 0
+        with open(os.path.join(os.path.dirname(config['clean']['input']), 'buckets.csv'), 'w', encoding='utf-8') as f:
+            for i, chunk in enumerate(storage.read_chunks(output, chunksize=config['chunksize'])):
+                start = time.time()
+                chunk.to_csv(f, index=False, header=i == 0)
+                elapsed += time.time() - start
+                done += len(chunk)
+        return done, elapsed
+
+    raise ValueError(f"Unknown stage '{stage}'")
+
+
+def measure(stage, config_path, rows, rowwise_rows, workers):
+    with open(config_path) as f:
+        config = json.load(f)
+    done, seconds = run_stage(stage, config, rows, rowwise_rows, workers)
+    print(json.dumps({'rows': done, 'seconds': seconds, 'peak_rss_mb': peak_rss_mb()}))
+
+
+def run_measure(stage, config_path, rows, rowwise_rows, workers):
+    out = subprocess.run([sys.executable, __file__, '--measure', stage, config_path, str(rows), str(rowwise_rows),
+                          str(workers)], check=True, capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, check=True,
+                              capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def compare(results, baseline_path, tolerance):
+    """Print per-stage speed against a previous results file; the regressed entries."""
+    with open(baseline_path) as f:
+        baseline = {(r['marketplace'], r['catalog_rows'], r['stage']): r for r in json.load(f)['results']}
+    regressions = []
+    print(f"\n📈 Against {baseline_path} (tolerance {tolerance:.0%}):")
+    for result in results:
+        old = baseline.get((result['marketplace'], result['catalog_rows'], result['stage']))
+        if old is None or not old['rows_per_sec']:
+            continue
+        ratio = result['rows_per_sec'] / old['rows_per_sec']
+        flag = '❌' if ratio < 1 - tolerance else '✅'
+        if ratio < 1 - tolerance:
+            regressions.append(result)
+        print(f"{flag} {result['marketplace']:9s} {result['catalog_rows']:>9d} {result['stage']:21s} "
+              f"{old['rows_per_sec']:>11.0f} -> {result['rows_per_sec']:>11.0f} rows/s ({ratio:.2f}x)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark every pipeline stage on synthetic catalogs')
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000], help='catalog sizes (10k to 5M)')
+    parser.add_argument('--marketplace', nargs='+', choices=sorted(STAGES), default=sorted(STAGES))
+    parser.add_argument('--stages', nargs='+', help='only these stages (their inputs are still built)')
+    parser.add_argument('--rowwise-rows', type=int, default=100000,
+                        help='rows for the row-wise assign_amazon_bucket reference (it is slow)')
+    parser.add_argument('--train-rows', type=int, default=200000, help='cap on the training sample')
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--out', help='results JSON (default: benchmarks/results/<time>-<revision>.json)')
+    parser.add_argument('--compare', help='previous results JSON to check for regressions')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed slowdown before a stage is flagged')
+    args = parser.parse_args()
+
+    revision = git_revision()
+    results = []
+    print(f"{'marketplace':11s} {'rows':>9s} {'stage':21s} {'seconds':>8s} {'rows/s':>11s} {'peak RSS MB':>12s}")
+    for marketplace in args.marketplace:
+        for rows in args.rows:
+            with tempfile.TemporaryDirectory() as workdir:
+                config_path = os.path.join(workdir, 'config.json')
+                with open(config_path, 'w') as f:
+                    json.dump(bench_config(marketplace, workdir, args.train_rows), f)
+                for stage in STAGES[marketplace]:
+                    selected = not args.stages or stage in args.stages
+                    if not selected and stage not in INPUT_STAGES:
+                        continue
+                    result = run_measure(stage, config_path, rows, args.rowwise_rows, args.workers)
+                    if not selected:
+                        continue
+                    result.update(marketplace=marketplace, stage=stage, catalog_rows=rows,
+                                  rows_per_sec=result['rows'] / result['seconds'] if result['seconds'] else None)
+                    results.append(result)
+                    print(f"{marketplace:11s} {rows:>9d} {stage:21s} {result['seconds']:8.2f} "
+                          f"{result['rows_per_sec'] or 0:11.0f} {result['peak_rss_mb']:12.0f}")
+
+    out = args.out or os.path.join(ROOT, 'benchmarks', 'results',
+                                   f"{time.strftime('%Y%m%d-%H%M%S')}-{revision}.json")
+    os.makedirs(os.path.dirname(out) or '.', exist_ok=True)
+    with open(out, 'w') as f:
+        json.dump({
+            'revision': revision,
+            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'python': platform.python_version(),
+            'machine': platform.platform(),
+            'cpus': os.cpu_count(),
+            'workers': args.workers,
+            'results': results,
+        }, f, indent=1)
+    print(f"\n💾 Results saved to '{out}'")
+
+    if args.compare and compare(results, args.compare, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == '--measure':
+        measure(sys.argv[2], sys.argv[3], int(sys.argv[4]), int(sys.argv[5]), int(sys.argv[6]))
+    else:
+        main()
@@ -0,0 +1,143 @@
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+from amazon_keyword_matcher import synthetic_catalog
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Load test for the online classification service (pipeline/service.py).
+# Opens --concurrency keep-alive connections to localhost, each sending
+# single-product /classify requests back to back, and reports client-side
+# p50/p99 latency, throughput and the server's own /stats (batch sizes).
+# Without --port it starts a service on a free port and stops it afterwards;
+# with --check it also compares the served labels with a direct batch predict.
+#
+#   python benchmarks/service_load_test.py [--requests 5000] [--concurrency 64] [--port 8080]
+
+
+async def request(reader, writer, method, path, payload=None):
+    body = json.dumps(payload).encode('utf-8') if payload is not None else b''
+    writer.write(f'{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n'
+                 f'Content-Length: {len(body)}\r\n\r\n'.encode('latin-1') + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        key, _, value = line.decode('latin-1').partition(':')
+        if key.strip().lower() == 'content-length':
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+
+async def get(port, path):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        return (await request(reader, writer, 'GET', path))[1]
+    finally:
+        writer.close()
+
+
+async def client(port, items, latencies, labels):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        for index, item in items:
+            start = time.perf_counter()
+            status, payload = await request(reader, writer, 'POST', '/classify', item)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if status != 200:
+                raise RuntimeError(f'service answered {status}: {payload}')
+            labels[index] = payload['bucket']
+    finally:
+        writer.close()
+
+
+async def run_load(port, items, concurrency):
+    latencies, labels = [], [None] * len(items)
+    indexed = list(enumerate(items))
+    start = time.perf_counter()
+    await asyncio.gather(*(client(port, indexed[i::concurrency], latencies, labels) for i in range(concurrency)))
+    return time.perf_counter() - start, sorted(latencies), labels
+
+
+def percentile(ordered, q):
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_until_up(port, proc, timeout=120):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            sys.exit(f"❌ Service exited with code {proc.returncode}")
+        try:
+            asyncio.run(get(port, '/health'))
+            return
+        except OSError:
+            time.sleep(0.2)
+    sys.exit("❌ Service did not come up in time")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the local classification service')
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--port', type=int, help='test an already running service instead of starting one')
+    parser.add_argument('--max-batch', type=int, default=256)
+    parser.add_argument('--max-wait-ms', type=float, default=2.0)
+    parser.add_argument('--check', action='store_true', help='compare labels with a direct batch predict')
+    args = parser.parse_args()
+
+    catalog = synthetic_catalog(args.requests)
+    items = [{'title': row.TITLE, 'description': row.DESCRIPTION, 'bullet_points': row.BULLET_POINTS}
+             for row in catalog.astype(object).where(catalog.notna(), None).itertuples()]
+
+    proc = None
+    port = args.port
+    if port is None:
+        port = free_port()
+        proc = subprocess.Popen([sys.executable, '-m', 'pipeline.service', '--port', str(port),
+                                 '--max-batch', str(args.max_batch), '--max-wait-ms', str(args.max_wait_ms)],
+                                cwd=ROOT)
+        wait_until_up(port, proc)
+
+    try:
+        elapsed, latencies, labels = asyncio.run(run_load(port, items, args.concurrency))
+        stats = asyncio.run(get(port, '/stats'))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+
+    print(f"\n⏱️ {len(items)} requests, concurrency {args.concurrency}: {elapsed:.2f}s "
+          f"({len(items) / elapsed:.0f} req/s)")
+    print(f"⏱️ Client latency: p50 {percentile(latencies, 50):.2f} ms, p99 {percentile(latencies, 99):.2f} ms")
+    print(f"📊 Server: {stats}")
+
+    if args.check:
+        sys.path.insert(0, ROOT)
+        from pipeline.service import item_text, load_predict_fn
+
+        predict = load_predict_fn(os.path.join(ROOT, 'models/amazon/bucket_classifier.pkl'),
+                                  os.path.join(ROOT, 'models/amazon/vectorizer.pkl'))
+        expected = [str(label) for label in predict([item_text(item) for item in items])]
+        mismatches = sum(a != b for a, b in zip(labels, expected))
+        print("✅ Served labels match batch predict" if mismatches == 0
+              else f"❌ {mismatches} labels differ from batch predict")
+
+
+if __name__ == '__main__':
+    main()
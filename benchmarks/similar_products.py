@@ -0,0 +1,109 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from catalog import amazon_catalog
+from pipeline import config, similar
+from pipeline.keyword_matcher import KeywordMatcher, build_texts
+
+# Recall and latency of the per-bucket IVF index (pipeline.similar) against
+# exact brute-force search, on a synthetic Amazon catalog: TF-IDF as in
+# training, the TruncatedSVD embeddings of predict_bucket.py --embeddings,
+# keyword buckets standing in for the predicted ones. Recall@k counts the
+# returned neighbours scoring at least the exact k-th best (ties count as
+# hits); latency is per single-product query. Each --nprobe is one row, plus
+# the index's own default (a share of each bucket's lists); --check fails when
+# recall at that default drops below --min-recall.
+#
+#   python benchmarks/similar_products.py [--rows 100000] [-k 10] [--queries 300] [--check]
+
+
+def embed_catalog(rows, dims):
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    df = amazon_catalog(rows)
+    texts = (df['TITLE'] + ' ' + df['DESCRIPTION'].fillna('') + ' ' + df['BULLET_POINTS'].fillna('')).tolist()
+    keywords = config.load('amazon')['bucket']['labels']['final_bucket']['keywords']
+    buckets = np.asarray(KeywordMatcher(keywords).assign_many(build_texts(df)), dtype=object)
+    X = TfidfVectorizer(max_features=15000, ngram_range=(1, 2), stop_words='english').fit_transform(texts)
+    start = time.perf_counter()
+    projection = similar.fit_projection(X[:similar.SVD_SAMPLE], dims)
+    vectors = similar.project(X, projection)
+    print(f"🧮 TruncatedSVD to {projection.shape[1]} dims: {time.perf_counter() - start:.1f}s")
+    return df['PRODUCT_ID'].to_numpy(), buckets, vectors
+
+
+def percentile_ms(seconds, q):
+    return float(np.percentile(seconds, q)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Similar-product index recall and latency against exact search')
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--dims', type=int, default=similar.DIMS)
+    parser.add_argument('-k', type=int, default=10)
+    parser.add_argument('--queries', type=int, default=300, help='sampled query products')
+    parser.add_argument('--nprobe', type=int, nargs='+', default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument('--check', action='store_true', help='fail when recall at the default nprobe is low')
+    parser.add_argument('--min-recall', type=float, default=0.9)
+    args = parser.parse_args()
+
+    print(f"🧪 Embedding a {args.rows}-row synthetic catalog...")
+    ids, buckets, vectors = embed_catalog(args.rows, args.dims)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        start = time.perf_counter()
+        indexes = {}
+        for n, bucket in enumerate(sorted(set(buckets))):
+            rows = np.flatnonzero(buckets == bucket)
+            directory = os.path.join(workdir, str(n))
+            similar.build_bucket_index(directory, vectors[rows], ids[rows], rows)
+            indexes[bucket] = similar.BucketIndex(directory)
+        print(f"🏗️  {len(indexes)} bucket indexes built in {time.perf_counter() - start:.1f}s")
+
+        rng = np.random.default_rng(0)
+        queries = []
+        for row in rng.choice(len(ids), min(args.queries, len(ids)), replace=False):
+            index = indexes[buckets[row]]
+            queries.append((index, index.position(ids[row])))
+
+        exact_scores, exact_seconds = [], []
+        for index, position in queries:
+            start = time.perf_counter()
+            _, scores = index.exact(index.vectors[position], args.k)
+            exact_seconds.append(time.perf_counter() - start)
+            exact_scores.append(scores[0])
+
+        print(f"\n{'search':12s} {'recall@' + str(args.k):>9s} {'p50 ms':>8s} {'p95 ms':>8s}")
+        print(f"{'exact':12s} {1:9.3f} {percentile_ms(exact_seconds, 50):8.2f} {percentile_ms(exact_seconds, 95):8.2f}")
+        recalls = {}
+        for nprobe in args.nprobe + [None]:
+            hits = wanted = 0
+            seconds = []
+            for (index, position), exact in zip(queries, exact_scores):
+                start = time.perf_counter()
+                _, scores = index.search(index.vectors[position], args.k, nprobe)
+                seconds.append(time.perf_counter() - start)
+                found = np.isfinite(exact)
+                hits += int((scores[0][np.isfinite(scores[0])] >= exact[found][-1] - 1e-5).sum())
+                wanted += int(found.sum())
+            recalls[nprobe] = hits / wanted if wanted else 1.0
+            print(f"{'ivf nprobe ' + str(nprobe) if nprobe else 'ivf default':12s} {recalls[nprobe]:9.3f} {percentile_ms(seconds, 50):8.2f} "
+                  f"{percentile_ms(seconds, 95):8.2f}")
+
+    if args.check:
+        recall = recalls[None]
+        if recall < args.min_recall:
+            sys.exit(f"❌ Recall@{args.k} {recall:.3f} at the default nprobe is below {args.min_recall}")
+        print(f"\n✅ Recall@{args.k} {recall:.3f} at the default nprobe")
+
+
+if __name__ == '__main__':
+    main()
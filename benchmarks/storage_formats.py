@@ -0,0 +1,90 @@
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from pipeline import storage
+
+# Read time and peak RSS of the Parquet storage path against CSV for a
+# synthetic Amazon-schema catalog. Every measurement runs in a fresh
+# subprocess so peak RSS is not polluted by earlier reads.
+#
+#   python benchmarks/storage_formats.py [rows]
+
+TRAINING_COLUMNS = ['TITLE', 'DESCRIPTION', 'BULLET_POINTS', 'final_bucket']
+
+
+def peak_rss_mb():
+    # VmHWM is reset on exec; ru_maxrss would carry over the parent's peak
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure(name, fmt, mode):
+    """Runs inside the subprocess: read once, report seconds and peak RSS."""
+    start = time.time()
+    columns = TRAINING_COLUMNS if mode == 'projected' else None
+    if mode == 'imports':
+        rows = 0  # baseline: interpreter + pandas/pyarrow only
+    elif mode == 'chunked':
+        rows = sum(len(chunk) for chunk in storage.read_chunks(name, columns=columns))
+    else:
+        rows = len(storage.read_frame(name, columns=columns))
+    elapsed = time.time() - start
+    print(json.dumps({'rows': rows, 'seconds': elapsed, 'peak_rss_mb': peak_rss_mb()}))
+
+
+def run_measure(name, fmt, mode):
+    out = subprocess.run([sys.executable, __file__, '--measure', name, fmt, mode],
+                         check=True, capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from amazon_keyword_matcher import synthetic_catalog
+
+    df = synthetic_catalog(n_rows)
+    df.insert(0, 'PRODUCT_ID', range(len(df)))
+    df['final_bucket'] = 'Uncategorized'
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sizes = {}
+        for fmt in storage.FORMATS:
+            name = os.path.join(tmp, fmt, 'amazon_buckets')
+            path = storage.write_frame(name, df, fmt)
+            if os.path.isdir(path):
+                sizes[fmt] = sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+            else:
+                sizes[fmt] = os.path.getsize(path)
+        del df
+
+        print(f"🧪 {n_rows} synthetic rows — csv {sizes['csv'] / 2**20:.1f} MB, parquet {sizes['parquet'] / 2**20:.1f} MB\n")
+        print(f"{'mode':10s} {'format':8s} {'seconds':>8s} {'peak RSS MB':>12s}")
+        baseline = run_measure(os.path.join(tmp, 'csv', 'amazon_buckets'), 'csv', 'imports')
+        print(f"{'imports':10s} {'-':8s} {0:8.2f} {baseline['peak_rss_mb']:12.0f}")
+        for mode in ('full', 'projected', 'chunked'):
+            for fmt in storage.FORMATS:
+                result = run_measure(os.path.join(tmp, fmt, 'amazon_buckets'), fmt, mode)
+                print(f"{mode:10s} {fmt:8s} {result['seconds']:8.2f} {result['peak_rss_mb']:12.0f}")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == '--measure':
+        measure(*sys.argv[2:5])
+    else:
+        main()
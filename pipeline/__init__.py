@@ -0,0 +1 @@
+"""Shared building blocks for the Flipkart and Amazon bucketing scripts."""
@@ -0,0 +1,168 @@
+import multiprocessing
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+# Chunk-level parallelism for the streaming scripts: map_chunks spreads the
+# per-chunk work over processes, prefetch() and BackgroundWriter move the
+# reading and the writing onto threads, so parsing the next chunk, labeling
+# this one and writing the previous one overlap (file and Parquet I/O
+# release the GIL). Every hand-off is a bounded queue: at most ``depth``
+# chunks wait on each side, so memory stays capped when one side is slower.
+#
+# Pool workers are started from a forkserver (spawn where there is none), never
+# forked from this process: by the first submit the reader and writer threads
+# are already running, and a fork can copy a lock one of them holds (in I/O,
+# logging, pyarrow's pools) into a child where nothing will ever release it.
+# Worker functions and initargs are therefore pickled, so they must be
+# module-level and plain data.
+
+
+def _pool_context():
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+
+def map_chunks(func, chunks, workers=1, initializer=None, initargs=()):
+    """Yield ``func(i, chunk)`` for every chunk, in input order.
+
+    With ``workers > 1`` the chunks are processed on a process pool; at most
+    ``2 * workers`` chunks are in flight so the reader never runs far ahead
+    of the writer. ``initializer(*initargs)`` runs once per process (once in
+    this process for the serial path) to load models or build matchers.
+    """
+    if workers <= 1:
+        if initializer is not None:
+            initializer(*initargs)
+        for i, chunk in enumerate(chunks):
+            yield func(i, chunk)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=_pool_context(), initializer=initializer,
+                             initargs=initargs) as pool:
+        pending = deque()
+        for i, chunk in enumerate(chunks):
+            pending.append(pool.submit(func, i, chunk))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def merge_counts(total, counts):
+    """Add one chunk's ``{label: count}`` into the running ``total``."""
+    for label, count in counts.items():
+        total[label] = total.get(label, 0) + count
+    return total
+
+
+_DONE = object()
+
+
+class _Failed:
+    def __init__(self, exc):
+        self.exc = exc
+
+
+def _put(q, item, stop):
+    # a blocking put that gives up once the consumer has gone away
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+def prefetch(iterable, depth=2):
+    """Iterate ``iterable`` on a reader thread, keeping up to ``depth`` items ready.
+
+    Exceptions from the reader are raised in the consumer; with ``depth < 1``
+    the items are read inline.
+    """
+    if depth < 1:
+        yield from iterable
+        return
+
+    q = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+
+    def read():
+        try:
+            for item in iterable:
+                if not _put(q, item, stop):
+                    return
+            _put(q, _DONE, stop)
+        except BaseException as exc:
+            _put(q, _Failed(exc), stop)
+
+    reader = threading.Thread(target=read, name='chunk-reader', daemon=True)
+    reader.start()
+    try:
+        while True:
+            item = q.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _Failed):
+                raise item.exc
+            yield item
+    finally:
+        stop.set()
+        reader.join()
+
+
+class BackgroundWriter:
+    """Calls ``write(item)`` on a writer thread for every submitted item, in order.
+
+    ``submit`` blocks while ``depth`` items are waiting (backpressure). An
+    exception in ``write`` is raised by the next ``submit`` or by ``close``;
+    leaving the ``with`` block waits for everything submitted to be written.
+    """
+
+    def __init__(self, write, depth=2):
+        self._write = write
+        self._queue = queue.Queue(maxsize=max(depth, 1))
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name='chunk-writer', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _DONE:
+                return
+            if self._error is None:
+                try:
+                    self._write(item)
+                except BaseException as exc:
+                    self._error = exc  # keep draining so submit never blocks forever
+
+    def submit(self, item):
+        if self._error is not None:
+            raise self._error
+        self._queue.put(item)
+
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(_DONE)
+            self._thread.join()
+        if self._error is not None:
+            raise self._error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+        else:
+            # the original error wins over one from the writer
+            self._queue.put(_DONE)
+            self._thread.join()
+
+
+def add_inflight_argument(parser):
+    parser.add_argument('--inflight', type=int, default=2,
+                        help='chunks read ahead / waiting to be written (0: read and write inline)')
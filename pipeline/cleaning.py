@@ -0,0 +1,152 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from pipeline import storage
+from pipeline.config import available, load as load_config
+
+# Streaming cleaners for the raw marketplace dumps. The raw CSV is read
+# chunk by chunk, every chunk is cleaned independently and appended to the
+# output dataset, so memory stays flat no matter how large the input is.
+# Statistics are kept as running counters in CleaningStats.
+
+
+class CleaningStats:
+    def __init__(self):
+        self.rows_read = 0
+        self.dropped_missing_title = 0
+        self.empty_details = 0
+        self.dropped_empty_details = 0
+        self.rows_written = 0
+
+    @property
+    def total_products(self):
+        """Products left after dropping rows without a title."""
+        return self.rows_read - self.dropped_missing_title
+
+    def report(self, detail_columns):
+        details = ' + '.join(col.upper() for col in detail_columns)
+        print(f"📊 Total Products                  : {self.total_products}")
+        print(f"❌ Rows with NO {details}: {self.empty_details}")
+        print(f"✅ Products with at least one field : {self.total_products - self.empty_details}")
+        if self.dropped_empty_details:
+            print(f"🗑️  Dropped rows missing both fields : {self.dropped_empty_details}")
+        print(f"💾 Rows written                     : {self.rows_written}")
+
+
+# === Amazon ===
+
+def clean_amazon_chunk(chunk):
+    # Drop rows with missing TITLE (essential for classification)
+    chunk = chunk.dropna(subset=['TITLE'])
+    # Drop unnecessary columns
+    chunk = chunk.drop(columns=['PRODUCT_TYPE_ID', 'PRODUCT_LENGTH'], errors='ignore')
+    # Replace missing BULLET_POINTS and DESCRIPTION with empty strings
+    chunk['BULLET_POINTS'] = chunk['BULLET_POINTS'].fillna('')
+    chunk['DESCRIPTION'] = chunk['DESCRIPTION'].fillna('')
+    # Convert all text columns to lowercase
+    for col in ['TITLE', 'BULLET_POINTS', 'DESCRIPTION']:
+        chunk[col] = chunk[col].astype(str).str.lower()
+    return chunk
+
+
+# === Flipkart ===
+
+def clean_flipkart_chunk(chunk):
+    chunk = chunk.dropna(subset=['product_name'])
+    # "No rating available" -> NaN, then numeric
+    for col in ['product_rating', 'overall_rating']:
+        chunk[col] = pd.to_numeric(chunk[col].replace('No rating available', np.nan), errors='coerce')
+    # Numeric prices, missing ones as 0
+    for col in ['retail_price', 'discounted_price']:
+        chunk[col] = pd.to_numeric(chunk[col], errors='coerce').fillna(0)
+    chunk['brand'] = chunk['brand'].fillna('Unknown')
+    # Lowercase the text columns used for bucketing
+    for col in ['product_name', 'description', 'product_category_tree']:
+        chunk[col] = chunk[col].str.lower()
+    return chunk
+
+
+# === Other marketplaces (config-driven) ===
+
+def make_cleaner(spec, title_column):
+    """Chunk cleaner from a config dict, for marketplaces without their own function.
+
+    Rows without a title are dropped; ``spec`` keys (all optional):
+    ``drop_columns``, ``numeric`` (coerced, missing as 0), ``fill``
+    ({column: value}) and ``lowercase`` (text columns used for bucketing).
+    """
+    def clean_chunk(chunk):
+        chunk = chunk.dropna(subset=[title_column])
+        chunk = chunk.drop(columns=spec.get('drop_columns', []), errors='ignore')
+        for col in spec.get('numeric', []):
+            chunk[col] = pd.to_numeric(chunk[col], errors='coerce').fillna(0)
+        for col, value in spec.get('fill', {}).items():
+            chunk[col] = chunk[col].fillna(value)
+        for col in spec.get('lowercase', []):
+            chunk[col] = chunk[col].str.lower()
+        return chunk
+
+    return clean_chunk
+
+
+CLEANERS = {'amazon': clean_amazon_chunk, 'flipkart': clean_flipkart_chunk}
+
+
+def empty_details_mask(chunk, detail_columns):
+    """Rows where every detail column is missing or blank."""
+    mask = np.ones(len(chunk), dtype=bool)
+    for col in detail_columns:
+        mask &= (chunk[col].fillna('').astype(str).str.strip() == '').to_numpy()
+    return mask
+
+
+def settings_from_config(config):
+    """A MARKETPLACES-style entry built from a marketplace config (pipeline.config)."""
+    clean = config['clean']
+    cleaner = clean['cleaner']
+    return {
+        'input': clean['input'],
+        'output': os.path.join(config['data_dir'], clean['output']),
+        'title_column': clean['title_column'],
+        'text_columns': clean['str_columns'],
+        'detail_columns': clean['detail_columns'],
+        'clean_chunk': CLEANERS[cleaner] if isinstance(cleaner, str) else make_cleaner(cleaner, clean['title_column']),
+    }
+
+
+# Bundled marketplaces, from configs/<marketplace>.json
+MARKETPLACES = {name: settings_from_config(load_config(name)) for name in available()}
+
+
+def clean_stream(marketplace, drop_empty=False, fmt=storage.DEFAULT_FORMAT, chunksize=100000,
+                 input_path=None, output_name=None):
+    """Clean a raw marketplace CSV chunk by chunk; returns the CleaningStats.
+
+    ``marketplace`` is a MARKETPLACES key or an entry of the same shape.
+    """
+    config = MARKETPLACES[marketplace] if isinstance(marketplace, str) else marketplace
+    input_path = input_path or config['input']
+    output_name = output_name or config['output']
+    stats = CleaningStats()
+
+    # text columns are read as str so every output part gets the same schema
+    reader = pd.read_csv(input_path, chunksize=chunksize, dtype={col: str for col in config['text_columns']})
+    with storage.DatasetWriter(output_name, fmt) as writer:
+        for raw in reader:
+            stats.rows_read += len(raw)
+            chunk = config['clean_chunk'](raw)
+            stats.dropped_missing_title += len(raw) - len(chunk)
+
+            empty = empty_details_mask(chunk, config['detail_columns'])
+            stats.empty_details += int(empty.sum())
+            if drop_empty:
+                chunk = chunk[~empty]
+                stats.dropped_empty_details += int(empty.sum())
+
+            if len(chunk) or writer.parts == 0:
+                writer.write(chunk)
+            stats.rows_written += len(chunk)
+
+    return stats
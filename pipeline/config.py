@@ -0,0 +1,45 @@
+import json
+import os
+
+# Per-marketplace pipeline configs ('configs/<marketplace>.json'): where the
+# raw dump and the datasets live, which columns hold the product text, the
+# cleaner, the bucketing keyword dicts / rules and the model settings. The
+# runner (python -m pipeline) and the per-marketplace scripts read their
+# keyword sets from here, so a new marketplace is a new JSON file.
+
+CONFIG_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'configs')
+STAGES = ('clean', 'bucket', 'train', 'predict')
+REQUIRED = ('name', 'data_dir', 'model_dir', 'text_columns') + STAGES
+
+
+def available():
+    """Names of the bundled marketplace configs."""
+    return sorted(name[:-len('.json')] for name in os.listdir(CONFIG_DIR) if name.endswith('.json'))
+
+
+def config_path(marketplace):
+    return os.path.join(CONFIG_DIR, f'{marketplace}.json')
+
+
+def load(marketplace):
+    """The config of a bundled marketplace, or of a JSON file given by path."""
+    path = marketplace if marketplace.endswith('.json') else config_path(marketplace)
+    with open(path, encoding='utf-8') as f:
+        config = json.load(f)
+    missing = [key for key in REQUIRED if key not in config]
+    if missing:
+        raise ValueError(f"Config '{path}' is missing {', '.join(missing)}")
+    config.setdefault('chunksize', 100000)
+    return config
+
+
+def dataset(config, name):
+    """Dataset path (without extension) of ``name`` in the marketplace's data dir."""
+    return os.path.join(config['data_dir'], name)
+
+
+def model_paths(config):
+    """``(artifact, model pickle, vectorizer pickle)`` in the marketplace's model dir."""
+    model_dir = config['model_dir']
+    return (os.path.join(model_dir, 'bucket_model'), os.path.join(model_dir, 'bucket_classifier.pkl'),
+            os.path.join(model_dir, 'vectorizer.pkl'))
@@ -0,0 +1,167 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from pipeline import storage
+
+# Incremental (delta) processing keyed on the product ID.
+#
+# Every labeling stage keeps a state dataset next to its output
+# ('<output>_state'): one row per product with the product ID, a hash of the
+# input row and the label it produced, plus the fingerprint of the rules or
+# model that produced it ('<output>_state.json'). A stage can store more
+# per-row values with the label (bucketing keeps its keyword scores). In delta
+# mode a row whose ID and hash match the state reuses the stored label and
+# values; only new and changed rows are labeled again. The output itself is
+# rebuilt from the current input, so removed products simply disappear and
+# bucket counts stay exact.
+
+ROW_HASH = '_row_hash'
+PREVIOUS = '_previous_label'
+CARRIED = '_previous_value_'  # + column number: values carried with the previous label
+
+
+def state_name(output_name):
+    return f'{output_name}_state'
+
+
+def row_hashes(chunk):
+    """Stable 64-bit content hash of every row (all columns, not the index).
+
+    Arrow string columns are hashed as the object columns they replace, and
+    missing text (NaN from CSV, None from Parquet, pd.NA from Arrow strings)
+    hashes the same in every layout.
+    """
+    text = [column for column, dtype in chunk.dtypes.items() if dtype.name in ('string', 'object')]
+    if text:
+        chunk = chunk.copy()
+        for column in text:
+            chunk[column] = chunk[column].astype(object).where(chunk[column].notna(), np.nan)
+    return pd.util.hash_pandas_object(chunk, index=False).to_numpy()
+
+
+def fingerprint_of(obj):
+    """Fingerprint for JSON-serializable rules such as a keyword dict."""
+    return hashlib.sha256(json.dumps(obj, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class DeltaState:
+    """Labels from the previous run, looked up per chunk of the current input."""
+
+    def __init__(self, table, id_column, carry=()):
+        self.id_column = id_column
+        self.carry = list(carry)
+        self.table = table[~table.index.duplicated(keep='last')]
+        self._values = self.table[self.carry].to_numpy() if self.carry else None
+        self._seen = np.zeros(len(self.table), dtype=bool)
+        self.new = 0
+        self.changed = 0
+        self.unchanged = 0
+
+    @classmethod
+    def load(cls, output_name, id_column, fingerprint, carry=()):
+        """Previous state, or None when missing, produced by other rules/model or without the ``carry`` values."""
+        name = state_name(output_name)
+        try:
+            with open(f'{name}.json') as f:
+                meta = json.load(f)
+            table = storage.read_frame(name)
+        except (OSError, ValueError):
+            return None
+        if meta.get('fingerprint') != fingerprint or not set(carry) <= set(table.columns):
+            return None
+        return cls(table.set_index(id_column), id_column, carry)
+
+    def lookup(self, chunk, hashes):
+        """``(labels, values)``: previous label per row, None where the row is new or changed,
+        and the ``carry`` values stored with it (``(rows, len(carry))``, -1 where there is no label).
+        """
+        positions = self.table.index.get_indexer(chunk[self.id_column])
+        known = positions >= 0
+        self._seen[positions[known]] = True
+
+        previous = np.full(len(chunk), None, dtype=object)
+        same = known.copy()
+        same[known] = self.table['row_hash'].to_numpy()[positions[known]] == hashes[known]
+        previous[same] = self.table['label'].to_numpy()[positions[same]]
+        values = None
+        if self._values is not None:
+            values = np.full((len(chunk), len(self.carry)), -1, dtype=self._values.dtype)
+            values[same] = self._values[positions[same]]
+
+        self.new += int((~known).sum())
+        self.changed += int((known & ~same).sum())
+        self.unchanged += int(same.sum())
+        return previous, values
+
+    @property
+    def removed(self):
+        return int((~self._seen).sum())
+
+    def report(self):
+        print(f"🔁 Delta: {self.new} new, {self.changed} changed, {self.unchanged} unchanged (reused), "
+              f"{self.removed} removed")
+
+
+def annotate(chunks, state=None):
+    """Attach row hashes (and previous labels and values in delta mode) to every chunk."""
+    for chunk in chunks:
+        hashes = row_hashes(chunk)
+        previous, values = (state.lookup(chunk, hashes) if state is not None
+                            else (np.full(len(chunk), None, dtype=object), None))
+        chunk[ROW_HASH] = hashes
+        chunk[PREVIOUS] = previous
+        if values is not None:
+            attach_values(chunk, values)
+        yield chunk
+
+
+def attach_values(chunk, values):
+    """Carry ``(rows, n)`` values with the chunk's previous labels, for ``detach_values``."""
+    for j in range(values.shape[1]):
+        chunk[f'{CARRIED}{j}'] = values[:, j]
+
+
+def detach(chunk):
+    """Split an annotated chunk into ``(chunk, hashes, previous_labels, todo_mask)``."""
+    hashes = chunk.pop(ROW_HASH).to_numpy()
+    previous = chunk.pop(PREVIOUS).to_numpy(dtype=object, copy=True)
+    return chunk, hashes, previous, pd.isna(previous)
+
+
+def detach_values(chunk, width, dtype):
+    """Pop the ``(rows, width)`` values carried with the previous labels; -1 where none were."""
+    columns = [f'{CARRIED}{j}' for j in range(width)]
+    if not width or columns[0] not in chunk:
+        return np.full((len(chunk), width), -1, dtype=dtype)
+    return np.column_stack([chunk.pop(column).to_numpy() for column in columns]).astype(dtype, copy=False)
+
+
+class StateWriter:
+    """Collects ``(id, row_hash, label)`` and any stored values per chunk and writes the new state."""
+
+    def __init__(self, output_name, id_column, fingerprint, fmt=storage.DEFAULT_FORMAT):
+        self.name = state_name(output_name)
+        self.id_column = id_column
+        self.fingerprint = fingerprint
+        self._meta_path = f'{self.name}.json'
+        # the old state stays valid until the new one is complete
+        self._writer = storage.DatasetWriter(f'{self.name}.tmp', fmt)
+
+    def write(self, ids, hashes, labels, values=None):
+        """``values``: optional frame of per-row columns stored with the label (see ``DeltaState.carry``)."""
+        frame = pd.DataFrame({self.id_column: ids, 'row_hash': hashes, 'label': labels})
+        if values is not None:
+            frame = pd.concat([frame, values.reset_index(drop=True)], axis=1)
+        self._writer.write(frame)
+
+    def close(self):
+        self._writer.close()
+        storage.remove_dataset(self.name)
+        for suffix in (storage.dataset_path('', self._writer.fmt), '.manifest.json'):
+            os.replace(f'{self.name}.tmp{suffix}', f'{self.name}{suffix}')
+        with open(self._meta_path, 'w') as f:
+            json.dump({'fingerprint': self.fingerprint, 'id_column': self.id_column}, f)
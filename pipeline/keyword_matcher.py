@@ -0,0 +1,152 @@
+import re
+
+import numpy as np
+import scipy.sparse as sp
+
+try:
+    import ahocorasick
+except ImportError:  # optional: falls back to a compiled trie regex
+    ahocorasick = None
+
+
+class KeywordMatcher:
+    """Scores every bucket in a single pass over the text.
+
+    Built once from a ``{bucket: [keywords]}`` dict. The hit count of a bucket
+    is the number of its keywords that occur anywhere in the text as a
+    substring, exactly like ``sum(kw in text for kw in keywords)``; ties go to
+    the first bucket in dict order, exactly like ``max(scores, key=scores.get)``.
+
+    Uses a pyahocorasick automaton when the package is installed and a single
+    compiled trie regex otherwise. For a batch, ``score_matrix`` returns the
+    hit counts of every text and bucket, from which ``label_scores`` picks the
+    labels (optionally with other bucket weights or tie order, no rescan).
+    """
+
+    def __init__(self, bucket_keywords, fallback='Uncategorized', use_automaton=True):
+        self.buckets = list(bucket_keywords)
+        self.fallback = fallback
+
+        # keyword -> bucket indexes (one entry per occurrence in the lists)
+        self.keyword_buckets = {}
+        for i, keywords in enumerate(bucket_keywords.values()):
+            for kw in keywords:
+                self.keyword_buckets.setdefault(kw, []).append(i)
+        keywords = sorted(self.keyword_buckets)
+        self.keywords = keywords
+        self._keyword_index = {kw: j for j, kw in enumerate(keywords)}
+        # keywords x buckets: how often each keyword is listed under each bucket
+        rows = [self._keyword_index[kw] for kw in keywords for _ in self.keyword_buckets[kw]]
+        cols = [i for kw in keywords for i in self.keyword_buckets[kw]]
+        self.keyword_bucket_matrix = sp.csr_matrix(
+            (np.ones(len(rows), dtype=np.int32), (rows, cols)), shape=(len(keywords), len(self.buckets)))
+
+        if use_automaton and ahocorasick is not None:
+            self._automaton = ahocorasick.Automaton()
+            for kw in keywords:
+                self._automaton.add_word(kw, kw)
+            self._automaton.make_automaton()
+        else:
+            self._automaton = None
+            # The lookahead reports the longest keyword starting at every
+            # position; any shorter keyword starting there is one of its
+            # prefixes, so expanding through ``_prefixes`` recovers them all.
+            self._regex = re.compile('(?=(' + _trie_pattern(keywords) + '))')
+            self._prefixes = {kw: [p for p in keywords if kw.startswith(p)] for kw in keywords}
+
+    def found(self, text):
+        """Return the set of distinct keywords occurring in ``text``."""
+        if self._automaton is not None:
+            return {kw for _, kw in self._automaton.iter(text)}
+        found = set()
+        for longest in set(self._regex.findall(text)):
+            found.update(self._prefixes[longest])
+        return found
+
+    def scores(self, text):
+        """Per-bucket hit counts, in bucket order."""
+        scores = [0] * len(self.buckets)
+        for kw in self.found(text):
+            for i in self.keyword_buckets[kw]:
+                scores[i] += 1
+        return scores
+
+    def assign(self, text):
+        scores = self.scores(text)
+        best = max(scores)
+        return self.buckets[scores.index(best)] if best > 0 else self.fallback
+
+    def keyword_matrix(self, texts):
+        """Sparse texts x keywords 0/1 matrix of the keywords occurring in each text."""
+        indptr, indices = [0], []
+        for text in texts:
+            indices.extend(self._keyword_index[kw] for kw in self.found(text))
+            indptr.append(len(indices))
+        return sp.csr_matrix((np.ones(len(indices), dtype=np.int32), indices, indptr),
+                             shape=(len(indptr) - 1, len(self.keywords)))
+
+    def score_matrix(self, texts):
+        """texts x buckets int32 hit counts: ``scores(text)`` for a whole batch."""
+        return (self.keyword_matrix(texts) @ self.keyword_bucket_matrix).toarray().astype(np.int32, copy=False)
+
+    def label_scores(self, scores, weights=None, order=None):
+        """Labels from a score matrix, as ``assign`` picks them from ``scores``.
+
+        ``weights`` ({bucket: factor}, default 1) rescale the counts and
+        ``order`` (bucket names, the rest after them) decides ties instead of
+        the dict order; rows whose best weighted score is not positive get
+        the fallback.
+        """
+        scores = np.asarray(scores)
+        if weights:
+            scores = scores * np.array([weights.get(bucket, 1) for bucket in self.buckets])
+        columns = np.arange(len(self.buckets))
+        if order:
+            position = {bucket: i for i, bucket in enumerate(self.buckets)}
+            first = [position[bucket] for bucket in order]
+            columns = np.array(first + [i for i in columns if i not in set(first)])
+            scores = scores[:, columns]
+        best = scores.argmax(axis=1)  # first maximum, like max(scores, key=scores.get)
+        labels = np.array(self.buckets, dtype=object)[columns[best]]
+        labels[scores[np.arange(len(scores)), best] <= 0] = self.fallback
+        return labels
+
+    def assign_many(self, texts):
+        return self.label_scores(self.score_matrix(texts)).tolist()
+
+
+def _trie_pattern(keywords):
+    trie = {}
+    for kw in keywords:
+        node = trie
+        for ch in kw:
+            node = node.setdefault(ch, {})
+        node[''] = {}
+
+    def build(node):
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        # greedy optional: try the longer keyword first, then stop here
+        return '(?:' + body + ')?' if '' in node else body
+
+    return build(trie)
+
+
+def _values(column, missing):
+    if column.dtype.name in ('string', 'object') or missing != 'nan':
+        # str(pd.NA) would be '<NA>' and Parquet nulls read as None: all missing text reads alike
+        column = column.astype(object).where(column.notna(), missing)
+    return column.tolist()
+
+
+def build_texts(df, columns=('TITLE', 'DESCRIPTION', 'BULLET_POINTS'), missing='nan'):
+    """Lower-cased ``TITLE DESCRIPTION BULLET_POINTS`` text for every row.
+
+    Mirrors the row-wise ``' '.join([str(row.get(col, '')) ...]).lower()``,
+    so missing values read as ``'nan'`` in every layout (NaN, None or pd.NA).
+    ``missing=''`` gives the models' text instead (``fillna('')``, lower-cased).
+    """
+    parts = [_values(df[col], missing) if col in df.columns else [''] * len(df) for col in columns]
+    return [' '.join(map(str, values)).lower() for values in zip(*parts)]
@@ -0,0 +1,246 @@
+import cProfile
+import json
+import os
+import resource
+import time
+from contextlib import nullcontext
+
+# Lightweight per-stage instrumentation for the chunk loops.
+#
+# A Metrics object keeps wall-clock timers (calls + seconds) and counters
+# per sub-step, rows and chunks seen, and the process's memory high-water
+# mark. Worker processes keep their own Metrics and send a snapshot back
+# with every chunk (take()); the writer side merges them (chunk_done()) and
+# appends one JSON line per chunk to the metrics file. On close the stage
+# summary goes to the same file, or to a Prometheus text file when the path
+# ends in '.prom' (for node_exporter's textfile collector).
+#
+# Disabled (the default), timer() returns one shared null context and every
+# other call returns immediately, so instrumented loops cost a few attribute
+# lookups per chunk. ``--profile-chunks DIR`` additionally runs every chunk
+# under cProfile and dumps '<stage>-chunk<i>.prof' (snakeviz / pstats); the
+# chunk lines carry the worker pid for attaching ``py-spy dump --pid``.
+
+_NULL = nullcontext()
+
+
+def peak_rss_bytes():
+    """High-water mark of this process's resident memory."""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class _Timer:
+    __slots__ = ('timers', 'name', 'start')
+
+    def __init__(self, timers, name):
+        self.timers = timers
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        timer = self.timers.get(self.name)
+        if timer is None:
+            timer = self.timers[self.name] = [0, 0.0]
+        timer[0] += 1
+        timer[1] += time.perf_counter() - self.start
+
+
+class _ChunkProfile:
+    def __init__(self, path):
+        self.path = path
+        self.profile = cProfile.Profile()
+
+    def __enter__(self):
+        self.profile.enable()
+        return self
+
+    def __exit__(self, *exc):
+        self.profile.disable()
+        self.profile.dump_stats(self.path)
+
+
+class Metrics:
+    """Timers, counters and memory for one stage; ``Metrics(stage, enabled=False)`` does nothing."""
+
+    def __init__(self, stage, enabled=True, path=None, profile_dir=None):
+        self.stage = stage
+        self.enabled = enabled
+        self.path = path
+        self.profile_dir = profile_dir
+        self.timers = {}
+        self.counters = {}
+        self.rows = 0
+        self.chunks = 0
+        self.peak_rss = 0
+        self._start = time.perf_counter()
+        self._last_chunk = self._start
+        self._log = None
+        if enabled and path and not path.endswith('.prom'):
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            self._log = open(path, 'w')
+        if enabled and profile_dir:
+            os.makedirs(profile_dir, exist_ok=True)
+
+    def worker_args(self):
+        """Arguments for a worker process's own Metrics (no file of its own)."""
+        return (self.stage, self.enabled, None, self.profile_dir)
+
+    def timer(self, name):
+        """Context manager adding the wall time of its block to timer ``name``."""
+        if not self.enabled:
+            return _NULL
+        return _Timer(self.timers, name)
+
+    def timed(self, name, iterable):
+        """``iterable``, with the time spent producing each item added to timer ``name``."""
+        if not self.enabled:
+            return iterable
+        return self._timed(name, iter(iterable))
+
+    def _timed(self, name, iterator):
+        while True:
+            with self.timer(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def count(self, name, value=1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def profile(self, index):
+        """Context manager running chunk ``index`` under cProfile when --profile-chunks is set."""
+        if not (self.enabled and self.profile_dir):
+            return _NULL
+        return _ChunkProfile(os.path.join(self.profile_dir, f'{self.stage}-chunk{index:05d}.prof'))
+
+    def take(self):
+        """Timers and counters since the last take, to send back from a worker; None when disabled."""
+        if not self.enabled:
+            return None
+        snapshot = {'timers': self.timers, 'counters': self.counters, 'peak_rss': peak_rss_bytes(),
+                    'pid': os.getpid()}
+        self.timers, self.counters = {}, {}
+        return snapshot
+
+    def merge(self, snapshot):
+        for name, (calls, seconds) in snapshot['timers'].items():
+            timer = self.timers.setdefault(name, [0, 0.0])
+            timer[0] += calls
+            timer[1] += seconds
+        for name, value in snapshot['counters'].items():
+            self.counters[name] = self.counters.get(name, 0) + value
+        self.peak_rss = max(self.peak_rss, snapshot['peak_rss'])
+
+    def chunk_done(self, index, rows, snapshot=None):
+        """Account one finished chunk and its worker snapshot; logs a JSON line."""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.chunks += 1
+        self.rows += rows
+        if snapshot is not None:
+            self.merge(snapshot)
+        if self._log is not None:
+            seconds = now - self._last_chunk
+            line = {'stage': self.stage, 'chunk': index, 'rows': rows, 'seconds': round(seconds, 4),
+                    'rows_per_sec': round(rows / seconds, 1) if seconds else None}
+            if snapshot is not None:
+                line.update(pid=snapshot['pid'], peak_rss_mb=round(snapshot['peak_rss'] / 2**20, 1),
+                            timers={name: round(t[1], 4) for name, t in snapshot['timers'].items()},
+                            counters=snapshot['counters'])
+            self._log.write(json.dumps(line) + '\n')
+            self._log.flush()
+        self._last_chunk = now
+
+    def summary(self):
+        seconds = time.perf_counter() - self._start
+        self.peak_rss = max(self.peak_rss, peak_rss_bytes())
+        return {
+            'stage': self.stage,
+            'seconds': round(seconds, 3),
+            'rows': self.rows,
+            'chunks': self.chunks,
+            'rows_per_sec': round(self.rows / seconds, 1) if seconds else None,
+            'peak_rss_mb': round(self.peak_rss / 2**20, 1),
+            'timers': {name: {'calls': calls, 'seconds': round(total, 4)}
+                       for name, (calls, total) in self.timers.items()},
+            'counters': self.counters,
+        }
+
+    def report(self):
+        summary = self.summary()
+        print(f"\n⏱️  {self.stage}: {summary['rows']} rows in {summary['seconds']:.1f}s "
+              f"({summary['rows_per_sec'] or 0:.0f} rows/s), peak RSS {summary['peak_rss_mb']:.0f} MB")
+        for name, timer in sorted(summary['timers'].items(), key=lambda item: -item[1]['seconds']):
+            share = 100 * timer['seconds'] / summary['seconds'] if summary['seconds'] else 0.0
+            print(f"   {name:18s} {timer['seconds']:9.2f}s {share:5.1f}%  ({timer['calls']} calls)")
+        held, as_object = summary['counters'].get('chunk_bytes'), summary['counters'].get('chunk_bytes_as_object')
+        if held and as_object and summary['chunks']:
+            print(f"   chunk memory {held / summary['chunks'] / 2**20:.1f} MB "
+                  f"(object strings: {as_object / summary['chunks'] / 2**20:.1f} MB, -{100 * (1 - held / as_object):.0f}%)")
+        return summary
+
+    def prometheus(self, summary):
+        labels = f'stage="{self.stage}"'
+        lines = [
+            '# HELP pipeline_step_seconds_total Wall time per sub-step of a pipeline stage.',
+            '# TYPE pipeline_step_seconds_total counter',
+        ]
+        lines += [f'pipeline_step_seconds_total{{{labels},step="{name}"}} {t["seconds"]}'
+                  for name, t in summary['timers'].items()]
+        lines += ['# HELP pipeline_step_calls_total Calls per sub-step of a pipeline stage.',
+                  '# TYPE pipeline_step_calls_total counter']
+        lines += [f'pipeline_step_calls_total{{{labels},step="{name}"}} {t["calls"]}'
+                  for name, t in summary['timers'].items()]
+        lines += ['# HELP pipeline_events_total Counters recorded by a pipeline stage.',
+                  '# TYPE pipeline_events_total counter']
+        lines += [f'pipeline_events_total{{{labels},name="{name}"}} {value}'
+                  for name, value in summary['counters'].items()]
+        for name, value, help_text in (
+                ('pipeline_rows_total', summary['rows'], 'Rows processed by the last run.'),
+                ('pipeline_seconds', summary['seconds'], 'Wall time of the last run.'),
+                ('pipeline_rows_per_second', summary['rows_per_sec'] or 0, 'Throughput of the last run.'),
+                ('pipeline_peak_rss_bytes', int(summary['peak_rss_mb'] * 2**20), 'Largest process RSS seen.')):
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} gauge', f'{name}{{{labels}}} {value}']
+        return '\n'.join(lines) + '\n'
+
+    def close(self):
+        """Print the summary and write it to the metrics file (no-op when disabled)."""
+        if not self.enabled:
+            return None
+        summary = self.report()
+        if self._log is not None:
+            self._log.write(json.dumps(dict(summary, event='summary')) + '\n')
+            self._log.close()
+            self._log = None
+        elif self.path:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            with open(self.path + '.tmp', 'w') as f:
+                f.write(self.prometheus(summary))
+            os.replace(self.path + '.tmp', self.path)
+        return summary
+
+
+def add_metrics_arguments(parser):
+    parser.add_argument('--metrics', metavar='FILE',
+                        help='record per-step timers, rows/s and peak RSS: JSON lines, or Prometheus text for *.prom')
+    parser.add_argument('--profile-chunks', metavar='DIR', help='cProfile every chunk into DIR/<stage>-chunk<i>.prof')
+
+
+def from_args(stage, args):
+    """Metrics for ``stage`` from the --metrics / --profile-chunks options."""
+    enabled = bool(args.metrics or args.profile_chunks)
+    return Metrics(stage, enabled=enabled, path=args.metrics, profile_dir=args.profile_chunks)
@@ -0,0 +1,300 @@
+import argparse
+import json
+import os
+import shutil
+
+import numpy as np
+import scipy.sparse as sp
+
+# Compact model artifact: a directory replacing the joblib pickles.
+#
+#   meta.json      vectorizer settings, classes, weight mode, shapes
+#   vocab.npy      vocabulary as a sorted fixed-width UTF-8 string table
+#   columns.npy    feature column of every vocabulary entry (same order)
+#   idf.npy        IDF weights, if the vectorizer has them
+#   weights.npy    coefficients as (n_features, n_classes), float64/float32/int8
+#   scale.npy      per-class dequantization scale (int8 weights only)
+#   intercept.npy
+#
+# Every array is opened with np.load(mmap_mode='r'), so loading is a few
+# small reads and all worker processes share one copy of the pages in the OS
+# page cache instead of each unpickling a vocabulary dict. Tokens are looked
+# up with np.searchsorted on the string table, the analyzer is rebuilt from
+# the saved settings (the pickled ``stop_words_`` set is not needed to
+# transform), and the default float64 weights give the same predictions as
+# the pickles.
+#
+#   python -m pipeline.model_artifact export ./models/amazon/bucket_classifier.pkl \
+#       ./models/amazon/vectorizer.pkl ./models/amazon/bucket_model [--weights int8]
+
+FORMAT_VERSION = 1
+WEIGHT_MODES = ('float64', 'float32', 'int8')
+_INT8_BLOCK = 4096  # rows per gather when scoring against int8 weights
+_ANALYZER_PARAMS = ('input', 'encoding', 'decode_error', 'strip_accents', 'lowercase',
+                    'stop_words', 'token_pattern', 'ngram_range', 'analyzer')
+
+
+def artifact_files(path):
+    """Files that make up the artifact at ``path``, for fingerprinting."""
+    return [os.path.join(path, name) for name in sorted(os.listdir(path))]
+
+
+# === Export ===
+
+def _json_params(params, names=None):
+    out = {}
+    for key, value in params.items():
+        if names is not None and key not in names:
+            continue
+        if callable(value) and not isinstance(value, type):
+            raise ValueError(f"Cannot export a vectorizer with a custom '{key}'")
+        if key == 'dtype':
+            value = np.dtype(value).name
+        elif isinstance(value, (set, frozenset)):
+            value = sorted(value)
+        elif isinstance(value, tuple):
+            value = list(value)
+        out[key] = value
+    return out
+
+
+def _vectorizer_meta(vectorizer):
+    """``(meta, arrays)`` describing how ``vectorizer`` turns texts into features."""
+    steps = [step for _, step in getattr(vectorizer, 'steps', [(None, vectorizer)])]
+    head, tail = steps[0], steps[-1]
+    if len(steps) > 2:
+        raise ValueError('Only a vectorizer or a hasher followed by a TfidfTransformer can be exported')
+    if len(steps) == 2 and not hasattr(tail, 'idf_'):
+        raise ValueError(f"Unsupported pipeline step '{type(tail).__name__}'")
+
+    arrays = {}
+    idf = getattr(tail, 'idf_', None) if getattr(tail, 'use_idf', True) else None
+    if idf is not None:
+        arrays['idf'] = np.asarray(idf, dtype=np.float64)
+    meta = {
+        'norm': getattr(tail, 'norm', None) if tail is not head or hasattr(head, 'vocabulary_') else None,
+        'sublinear_tf': bool(getattr(tail, 'sublinear_tf', False)),
+        'binary': bool(getattr(head, 'binary', False)),
+        'idf': idf is not None,
+    }
+
+    if hasattr(head, 'vocabulary_'):
+        if head.get_params().get('tokenizer') is not None or head.get_params().get('preprocessor') is not None:
+            raise ValueError("Cannot export a vectorizer with a custom tokenizer or preprocessor")
+        terms = sorted(head.vocabulary_, key=lambda term: term.encode('utf-8'))
+        arrays['vocab'] = np.array([term.encode('utf-8') for term in terms])
+        arrays['columns'] = np.array([head.vocabulary_[term] for term in terms], dtype=np.int32)
+        meta.update(kind='vocabulary', n_features=len(terms),
+                    analyzer=_json_params(head.get_params(), _ANALYZER_PARAMS))
+    elif hasattr(head, 'n_features'):
+        # the hasher normalizes itself when nothing follows it
+        meta.update(kind='hashing', n_features=head.n_features, hasher=_json_params(head.get_params()))
+    else:
+        raise ValueError(f"Unsupported vectorizer '{type(head).__name__}'")
+    return meta, arrays
+
+
+def _weight_arrays(clf, weights):
+    coef = np.asarray(clf.coef_, dtype=np.float64)
+    arrays = {'intercept': np.asarray(clf.intercept_, dtype=np.float64).ravel()}
+    if weights == 'int8':
+        # symmetric per-class scale: the largest weight of a class maps to 127
+        scale = np.abs(coef).max(axis=1) / 127
+        scale[scale == 0] = 1.0
+        arrays['weights'] = np.ascontiguousarray(np.round(coef / scale[:, None]).astype(np.int8).T)
+        arrays['scale'] = scale
+    else:
+        arrays['weights'] = np.ascontiguousarray(coef.astype(weights).T)
+    return arrays
+
+
+def export(clf, vectorizer, path, weights='float64'):
+    """Write ``clf`` + ``vectorizer`` as an artifact directory at ``path``."""
+    from pipeline.fast_inference import proba_kind
+
+    if weights not in WEIGHT_MODES:
+        raise ValueError(f"Unknown weight mode '{weights}'")
+    if not hasattr(clf, 'coef_'):
+        raise ValueError(f"Only linear classifiers can be exported, not '{type(clf).__name__}'")
+
+    meta, arrays = _vectorizer_meta(vectorizer)
+    arrays.update(_weight_arrays(clf, weights))
+    if arrays['weights'].shape[0] != meta['n_features']:
+        raise ValueError('Classifier and vectorizer disagree on the number of features')
+    meta.update(format_version=FORMAT_VERSION, weights=weights, classes=np.asarray(clf.classes_).tolist(),
+                proba=proba_kind(clf))
+
+    # build next to the target and swap in, so readers never see half an artifact
+    tmp = f'{path}.tmp'
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    for name, array in arrays.items():
+        np.save(os.path.join(tmp, f'{name}.npy'), array)
+    with open(os.path.join(tmp, 'meta.json'), 'w') as f:
+        json.dump(meta, f, indent=1)
+    shutil.rmtree(path, ignore_errors=True)
+    os.rename(tmp, path)
+    return path
+
+
+# === Load ===
+
+def _load_array(path, name):
+    file = os.path.join(path, f'{name}.npy')
+    return np.load(file, mmap_mode='r') if os.path.exists(file) else None
+
+
+class ArtifactVectorizer:
+    """``transform(texts)`` of the exported vectorizer, backed by memory-mapped arrays."""
+
+    def __init__(self, meta, vocab=None, columns=None, idf=None):
+        self.meta = meta
+        self.n_features = meta['n_features']
+        self.vocab = vocab
+        self.columns = columns
+        self.idf = idf
+        if meta['kind'] == 'vocabulary':
+            from sklearn.feature_extraction.text import CountVectorizer
+
+            params = dict(meta['analyzer'], ngram_range=tuple(meta['analyzer']['ngram_range']))
+            self.analyzer = CountVectorizer(**params).build_analyzer()
+            self.lowercase = params['lowercase']
+            self._width = vocab.dtype.itemsize
+        else:
+            from sklearn.feature_extraction.text import HashingVectorizer
+
+            params = dict(meta['hasher'], ngram_range=tuple(meta['hasher']['ngram_range']),
+                          dtype=np.dtype(meta['hasher']['dtype']).type)
+            self.hasher = HashingVectorizer(**params)
+            self.lowercase = params['lowercase']
+
+    def lookup(self, tokens):
+        """Feature column of every token, -1 where it is not in the vocabulary."""
+        import pandas as pd
+
+        codes, uniques = pd.factorize(np.asarray(tokens, dtype=object))
+        encoded = [token.encode('utf-8') for token in uniques]
+        too_long = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded)) > self._width
+        keys = np.array([b'' if skip else key for key, skip in zip(encoded, too_long)], dtype=self.vocab.dtype)
+        pos = np.minimum(np.searchsorted(self.vocab, keys), len(self.vocab) - 1)
+        found = (self.vocab[pos] == keys) & ~too_long & (keys != b'')
+        return np.where(found, self.columns[pos], -1)[codes]
+
+    def counts(self, texts):
+        docs = [self.analyzer(text) for text in texts]
+        lengths = np.fromiter(map(len, docs), dtype=np.int64, count=len(docs))
+        tokens = [token for doc in docs for token in doc]
+        cols = self.lookup(tokens) if tokens else np.zeros(0, dtype=np.int64)
+        rows = np.repeat(np.arange(len(docs)), lengths)
+        keep = cols >= 0
+        X = sp.csr_matrix((np.ones(int(keep.sum())), (rows[keep], cols[keep])),
+                          shape=(len(docs), self.n_features))  # duplicates are summed
+        X.sort_indices()
+        return X
+
+    def transform(self, texts):
+        if self.meta['kind'] == 'hashing':
+            X = self.hasher.transform(texts)
+        else:
+            X = self.counts(texts)
+        if self.meta['binary']:
+            X.data[:] = 1.0
+        if self.meta['sublinear_tf']:
+            np.log(X.data, X.data)
+            X.data += 1
+        if self.idf is not None:
+            X.data *= np.asarray(self.idf)[X.indices]
+        if self.meta['norm'] is not None:
+            from sklearn.preprocessing import normalize
+
+            X = normalize(X, norm=self.meta['norm'], copy=False)
+        return X
+
+
+class ArtifactClassifier:
+    """``predict(X)`` of the exported linear classifier."""
+
+    def __init__(self, meta, weights, intercept, scale=None):
+        self.classes_ = np.array(meta['classes'])
+        self.proba = meta.get('proba')  # how scores become probabilities, see fast_inference
+        self.weights = weights
+        self.intercept = np.asarray(intercept)
+        self.scale = None if scale is None else np.asarray(scale)
+
+    def decision_function(self, X):
+        X = sp.csr_matrix(X)
+        if self.scale is None:
+            # same dtype as the weights, so the mapped matrix is used in place
+            scores = X.astype(self.weights.dtype) @ self.weights
+        else:
+            # int8: dequantize only the feature rows a block of documents touches
+            scores = np.empty((X.shape[0], self.weights.shape[1]))
+            for start in range(0, X.shape[0], _INT8_BLOCK):
+                block = X[start:start + _INT8_BLOCK]
+                picker = sp.csr_matrix((block.data, np.arange(block.nnz), block.indptr),
+                                       shape=(block.shape[0], block.nnz))
+                scores[start:start + _INT8_BLOCK] = picker @ (self.weights[block.indices] * self.scale)
+        scores = scores + self.intercept
+        return scores.ravel() if scores.shape[1] == 1 else scores
+
+    def predict(self, X):
+        scores = self.decision_function(X)
+        if scores.ndim == 1:
+            return self.classes_[(scores > 0).astype(int)]
+        return self.classes_[scores.argmax(axis=1)]
+
+
+def load(path):
+    """``(clf, vectorizer)`` from the artifact directory at ``path``."""
+    with open(os.path.join(path, 'meta.json')) as f:
+        meta = json.load(f)
+    if meta.get('format_version') != FORMAT_VERSION:
+        raise ValueError(f"Unsupported model artifact version in '{path}'")
+    vectorizer = ArtifactVectorizer(meta, _load_array(path, 'vocab'), _load_array(path, 'columns'),
+                                    _load_array(path, 'idf'))
+    clf = ArtifactClassifier(meta, _load_array(path, 'weights'), _load_array(path, 'intercept'),
+                             _load_array(path, 'scale'))
+    return clf, vectorizer
+
+
+def load_model(artifact_path, model_path, vectorizer_path):
+    """``(clf, vectorizer, files)``: the artifact if it exists, else the pickles.
+
+    ``files`` are what was loaded, for fingerprinting caches and delta state.
+    """
+    if artifact_path and os.path.isdir(artifact_path):
+        clf, vectorizer = load(artifact_path)
+        return clf, vectorizer, artifact_files(artifact_path)
+    import joblib
+
+    return joblib.load(model_path), joblib.load(vectorizer_path), [model_path, vectorizer_path]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export and inspect compact model artifacts')
+    sub = parser.add_subparsers(dest='command', required=True)
+    exp = sub.add_parser('export', help='convert the joblib pickles into an artifact directory')
+    exp.add_argument('model')
+    exp.add_argument('vectorizer')
+    exp.add_argument('path')
+    exp.add_argument('--weights', choices=WEIGHT_MODES, default='float64',
+                     help='coefficient storage; float32/int8 are smaller but may flip near-ties')
+    info = sub.add_parser('info', help='show what an artifact contains')
+    info.add_argument('path')
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        import joblib
+
+        export(joblib.load(args.model), joblib.load(args.vectorizer), args.path, args.weights)
+        print(f"✅ Exported model artifact to '{args.path}'")
+    else:
+        with open(os.path.join(args.path, 'meta.json')) as f:
+            meta = json.load(f)
+        size = sum(os.path.getsize(file) for file in artifact_files(args.path))
+        print(f"📦 {args.path} — {meta['kind']} vectorizer, {meta['n_features']} features, "
+              f"{len(meta['classes'])} classes, {meta['weights']} weights, {size / 1e6:.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
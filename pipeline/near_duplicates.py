@@ -0,0 +1,360 @@
+import argparse
+import json
+import re
+import time
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from pipeline import delta, storage
+
+# Near-duplicate products via MinHash + locality-sensitive hashing.
+#
+# Every product's text is normalized (lower case, alphanumeric words) and cut
+# into word 3-shingles; NUM_PERM MinHash values are computed per product with
+# vectorized universal hashing. The signature is split into BANDS bands and
+# products sharing a whole band are candidates (Jaccard ~0.77 and up collide
+# with high probability). Rows are then clustered in dataset order (leader
+# clustering): a row joins the most similar earlier representative it shares
+# a band with when their Jaccard estimate, from the low byte of every MinHash
+# value (b-bit MinHash, 64 bytes per product), clears the threshold, and
+# starts a new cluster otherwise. Copies are never
+# linked through other copies, so chains of small edits stay apart. Work is
+# linear in the number of products; memory is ~130 bytes per product.
+#
+# A cluster's representative is its first product in dataset order, so a
+# streaming pass always sees a representative before its copies. Bucketing
+# and prediction can label representatives only and fan the label out.
+#
+#   python -m pipeline.near_duplicates ./data/amazon/amazon_cleaned [--check-sample 3000]
+
+TEXT_COLUMNS = ['TITLE', 'DESCRIPTION', 'BULLET_POINTS']
+NUM_PERM = 64
+BANDS = 8
+THRESHOLD = 0.8
+SHINGLE = 3
+MAX_TOKENS = 200  # caps the cost of very long descriptions
+_PRIME = (1 << 31) - 1
+_FNV = np.uint64(0x100000001B3)
+_WORD = re.compile(r'[^\W_]+')
+
+
+def product_texts(chunk, columns=TEXT_COLUMNS):
+    text = chunk[columns[0]].fillna('').astype(str)
+    for col in columns[1:]:
+        text = text + ' ' + chunk[col].fillna('').astype(str)
+    return text.tolist()
+
+
+def shingles(text, k=SHINGLE, max_tokens=MAX_TOKENS):
+    tokens = _WORD.findall(text.lower())[:max_tokens]
+    if len(tokens) < k:
+        return [' '.join(tokens)] if tokens else []
+    return list(map(' '.join, zip(*(tokens[i:] for i in range(k)))))
+
+
+def shingle_hashes(texts, k=SHINGLE, max_tokens=MAX_TOKENS):
+    """``(hashes, indptr)``: 32-bit shingle hashes of all texts, CSR style."""
+    flat, indptr = [], np.zeros(len(texts) + 1, dtype=np.int64)
+    for i, text in enumerate(texts):
+        flat.extend(shingles(text, k, max_tokens))
+        indptr[i + 1] = len(flat)
+    if not flat:
+        return np.zeros(0, dtype=np.int64), indptr
+    hashes = pd.util.hash_array(np.array(flat, dtype=object)) & np.uint64(0xFFFFFFFF)
+    return hashes.astype(np.int64), indptr
+
+
+class MinHasher:
+    def __init__(self, num_perm=NUM_PERM, seed=1):
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, _PRIME, num_perm, dtype=np.int64)
+        self.b = rng.integers(0, _PRIME, num_perm, dtype=np.int64)
+
+    def signatures(self, texts):
+        """``(signatures, nonempty)``: one uint32 MinHash row per text."""
+        hashes, indptr = shingle_hashes(texts)
+        nonempty = np.diff(indptr) > 0
+        sig = np.full((len(texts), len(self.a)), _PRIME, dtype=np.uint32)
+        if hashes.size:
+            starts = indptr[:-1][nonempty]
+            for j, (a, b) in enumerate(zip(self.a, self.b)):
+                # a * x < 2**31 * 2**32, so int64 never overflows
+                sig[nonempty, j] = np.minimum.reduceat((a * hashes + b) % _PRIME, starts)
+        return sig, nonempty
+
+
+def band_keys(sig, bands=BANDS):
+    """64-bit key per (product, band); equal keys mean an identical band."""
+    rows = sig.shape[1] // bands
+    keys = np.empty((len(sig), bands), dtype=np.uint64)
+    with np.errstate(over='ignore'):
+        for band in range(bands):
+            h = np.full(len(sig), np.uint64(band + 1) * np.uint64(0x9E3779B97F4A7C15), dtype=np.uint64)
+            for col in range(band * rows, (band + 1) * rows):
+                h = (h ^ sig[:, col].astype(np.uint64)) * _FNV
+            keys[:, band] = h
+    return keys
+
+
+def estimated_jaccard(low_bytes_u, low_bytes_v):
+    """Jaccard estimate from the low byte of every MinHash value (b-bit MinHash, b = 8)."""
+    match = np.mean(low_bytes_u == low_bytes_v, axis=1)
+    return (match - 1 / 256) / (1 - 1 / 256)
+
+
+class NearDuplicateIndex:
+    def __init__(self, num_perm=NUM_PERM, bands=BANDS, threshold=THRESHOLD, verify_slack=0.05, seed=1):
+        if num_perm % bands:
+            raise ValueError('num_perm must be a multiple of bands')
+        self.hasher = MinHasher(num_perm, seed)
+        self.bands = bands
+        self.threshold = threshold
+        # b-bit estimates have ~0.05 std at 64 permutations; a row keeps the best of its
+        # candidates' estimates, so a wider slack mostly admits products below the threshold
+        self.verify_slack = verify_slack
+        self._keys, self._low, self._nonempty = [], [], []
+
+    def add(self, texts):
+        sig, nonempty = self.hasher.signatures(texts)
+        self._keys.append(band_keys(sig, self.bands))
+        self._low.append((sig & 0xFF).astype(np.uint8))
+        self._nonempty.append(nonempty)
+
+    def clusters(self):
+        """Leader clustering in dataset order over the LSH candidates.
+
+        A row joins the earlier representative it shares a band with and is
+        most similar to, if that estimate clears the threshold; otherwise it
+        starts a cluster of its own. Every copy is checked against its own
+        representative, so a chain of small edits (A~B, B~C, ...) does not
+        pull unrelated products into one cluster.
+        """
+        keys = np.concatenate(self._keys) if self._keys else np.zeros((0, self.bands), dtype=np.uint64)
+        low = np.concatenate(self._low) if self._low else np.zeros((0, 0), dtype=np.uint8)
+        nonempty = np.concatenate(self._nonempty) if self._nonempty else np.zeros(0, dtype=bool)
+        n = len(keys)
+        candidates = np.flatnonzero(nonempty)  # empty texts never match anything
+
+        # global id of every (row, band) group shared with another row, -1 otherwise
+        groups = np.full((n, self.bands), -1, dtype=np.int64)
+        next_group = 0
+        for band in range(self.bands):
+            unique, inverse, counts = np.unique(keys[candidates, band], return_inverse=True, return_counts=True)
+            shared = counts[inverse] > 1
+            groups[candidates[shared], band] = inverse[shared] + next_group
+            next_group += len(unique)
+
+        representative = np.arange(n, dtype=np.int64)
+        cutoff = self.threshold - self.verify_slack
+        leaders = {}  # group id -> representatives in it so far, in row order
+        for row in np.flatnonzero((groups >= 0).any(axis=1)):
+            row_groups = groups[row][groups[row] >= 0]
+            known = sorted({leader for group in row_groups for leader in leaders.get(group, ())})
+            if known:
+                known = np.asarray(known, dtype=np.int64)
+                similarity = estimated_jaccard(low[known], low[row])
+                best = int(np.argmax(similarity))  # ties go to the earliest representative
+                if similarity[best] >= cutoff:
+                    representative[row] = known[best]
+                    continue
+            for group in row_groups:
+                leaders.setdefault(group, []).append(row)
+        return Clusters(representative)
+
+
+class Clusters:
+    """Representative row (first row of its cluster, in dataset order) for every row."""
+
+    def __init__(self, representative):
+        self.representative = np.asarray(representative, dtype=np.int64)
+
+    @property
+    def rows(self):
+        return len(self.representative)
+
+    @property
+    def is_representative(self):
+        return self.representative == np.arange(self.rows)
+
+    @property
+    def n_clusters(self):
+        return int(self.is_representative.sum())
+
+    def summary(self):
+        sizes = np.bincount(self.representative, minlength=self.rows)
+        sizes = sizes[sizes > 0]
+        saved = self.rows - self.n_clusters
+        return {
+            'rows': self.rows,
+            'clusters': self.n_clusters,
+            'rows_in_multi_product_clusters': int(sizes[sizes > 1].sum()),
+            'largest_cluster': int(sizes.max()) if len(sizes) else 0,
+            'labels_saved': saved,
+            'labels_saved_pct': round(100 * saved / self.rows, 2) if self.rows else 0.0,
+        }
+
+
+# === Building and storing clusters for a dataset ===
+
+def clusters_path(name):
+    return f'{name}_clusters.npz'
+
+
+def _dataset_fingerprint(name):
+    manifest = storage.read_manifest(name)
+    return manifest['sha256'] if manifest else None
+
+
+def build_clusters(name, columns=TEXT_COLUMNS, chunksize=100000, **index_args):
+    index = NearDuplicateIndex(**index_args)
+    for i, chunk in enumerate(storage.read_chunks(name, columns=columns, chunksize=chunksize)):
+        index.add(product_texts(chunk, columns))
+        print(f"🔑 MinHash signatures for chunk {i+1}")
+    return index.clusters()
+
+
+def save_clusters(name, clusters, params):
+    meta = dict(params, dataset=_dataset_fingerprint(name), rows=clusters.rows)
+    np.savez(clusters_path(name), representative=clusters.representative, meta=json.dumps(meta, sort_keys=True))
+
+
+def load_clusters(name, params):
+    """Saved clusters of ``name``, or None if missing, built with other params or stale."""
+    try:
+        saved = np.load(clusters_path(name))
+        meta = json.loads(str(saved['meta']))
+    except (OSError, ValueError, KeyError):
+        return None
+    fingerprint = _dataset_fingerprint(name)
+    expected = dict(params, dataset=fingerprint, rows=meta.get('rows'))
+    if fingerprint is None or meta != expected or storage.dataset_rows(name)[0] != meta['rows']:
+        return None
+    return Clusters(saved['representative'])
+
+
+def load_or_build(name, columns=TEXT_COLUMNS, chunksize=100000):
+    params = {'columns': list(columns), 'num_perm': NUM_PERM, 'bands': BANDS, 'threshold': THRESHOLD}
+    clusters = load_clusters(name, params)
+    if clusters is None:
+        print("🔑 Building near-duplicate clusters (MinHash + LSH)...")
+        clusters = build_clusters(name, columns, chunksize)
+        save_clusters(name, clusters, params)
+    summary = clusters.summary()
+    print(f"🧬 {summary['clusters']} clusters for {summary['rows']} rows — "
+          f"{summary['labels_saved']} labels fanned out ({summary['labels_saved_pct']}%)")
+    return clusters
+
+
+# === Label representatives, fan out to their copies ===
+
+def _positioned(chunks):
+    offset = 0
+    for chunk in chunks:
+        chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+        offset += len(chunk)
+        yield chunk
+
+
+def _label_rows(label_fn, dtype, i, chunk):
+    return chunk.index.to_numpy(), np.asarray(label_fn(i, chunk), dtype=dtype)
+
+
+def representative_labels(chunks, clusters, label_fn, map_chunks, shape=(), dtype=object, **map_args):
+    """Label of every row's representative; ``label_fn(i, chunk)`` only sees representatives.
+
+    ``map_chunks`` is the scripts' chunk pool, so representatives are labeled
+    on ``workers`` processes like a normal run. ``shape`` / ``dtype`` describe
+    one row's result when it is not a label, e.g. ``(n_buckets,)`` keyword
+    scores; rows no representative covers are None, or -1 for numbers.
+    """
+    is_rep = clusters.is_representative
+    reps = (chunk[is_rep[chunk.index.to_numpy()]] for chunk in _positioned(chunks))
+    labels = np.full((clusters.rows,) + tuple(shape), None if dtype is object else -1, dtype=dtype)
+    for rows, chunk_labels in map_chunks(partial(_label_rows, label_fn, dtype), reps, **map_args):
+        labels[rows] = chunk_labels
+    return labels[clusters.representative]
+
+
+def prefill(annotated_chunks, labels, values=None):
+    """Carry fanned-out labels (and ``(rows, n)`` values such as keyword scores)
+    as the chunks' previous labels (see pipeline.delta)."""
+    offset = 0
+    for chunk in annotated_chunks:
+        chunk[delta.PREVIOUS] = labels[offset:offset + len(chunk)]
+        if values is not None:
+            delta.attach_values(chunk, values[offset:offset + len(chunk)])
+        offset += len(chunk)
+        yield chunk
+
+
+# === Recall against brute-force Jaccard ===
+
+def jaccard(u, v):
+    return len(u & v) / len(u | v) if u or v else 0.0
+
+
+def recall_check(texts, threshold=THRESHOLD, **index_args):
+    """Pairs with true Jaccard >= threshold that LSH put in one cluster (recall), and vice versa.
+
+    ``copy_precision`` is the share of copies whose true Jaccard with their
+    own representative reaches the threshold; ``min_copy_jaccard`` the worst.
+    """
+    sets = [set(shingles(text)) for text in texts]
+    truth = set()
+    for i in range(len(sets)):
+        if not sets[i]:
+            continue
+        for j in range(i + 1, len(sets)):
+            if sets[j] and len(sets[i] & sets[j]) >= threshold * len(sets[i] | sets[j]):
+                truth.add((i, j))
+
+    index = NearDuplicateIndex(threshold=threshold, **index_args)
+    index.add(texts)
+    rep = index.clusters().representative
+    found = sum(rep[i] == rep[j] for i, j in truth)
+    sizes = np.bincount(rep)
+    clustered_pairs = int((sizes * (sizes - 1) // 2).sum())
+    copies = [jaccard(sets[row], sets[rep[row]]) for row in np.flatnonzero(rep != np.arange(len(rep)))]
+    return {
+        'sample': len(texts),
+        'true_pairs': len(truth),
+        'recall': round(found / len(truth), 4) if truth else None,
+        'clustered_pairs': clustered_pairs,
+        'precision': round(found / clustered_pairs, 4) if clustered_pairs else None,
+        'copies': len(copies),
+        'copy_precision': round(float(np.mean(np.array(copies) >= threshold)), 4) if copies else None,
+        'min_copy_jaccard': round(min(copies), 4) if copies else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Cluster near-duplicate products with MinHash + LSH')
+    parser.add_argument('dataset', help='dataset path without extension, e.g. ./data/amazon/amazon_cleaned')
+    parser.add_argument('--columns', nargs='+', default=TEXT_COLUMNS)
+    parser.add_argument('--chunksize', type=int, default=100000)
+    parser.add_argument('--check-sample', type=int, default=2000,
+                        help='recall check against brute-force Jaccard on the first N rows (0: skip)')
+    args = parser.parse_args()
+
+    start = time.time()
+    params = {'columns': list(args.columns), 'num_perm': NUM_PERM, 'bands': BANDS, 'threshold': THRESHOLD}
+    clusters = build_clusters(args.dataset, args.columns, args.chunksize)
+    save_clusters(args.dataset, clusters, params)
+    report = dict(clusters.summary(), seconds=round(time.time() - start, 2))
+
+    if args.check_sample:
+        sample = next(storage.read_chunks(args.dataset, columns=args.columns, chunksize=args.check_sample), None)
+        if sample is not None:
+            report['recall_check'] = recall_check(product_texts(sample, args.columns))
+
+    report_path = f'{args.dataset}_clusters.json'
+    with open(report_path, 'w') as f:
+        json.dump(report, f, indent=1)
+    print(json.dumps(report, indent=1))
+    print(f"\n✅ Clusters saved to '{clusters_path(args.dataset)}', report to '{report_path}'")
+
+
+if __name__ == '__main__':
+    main()
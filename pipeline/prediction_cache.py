@@ -0,0 +1,144 @@
+import hashlib
+import os
+import sqlite3
+
+# Persistent cache of model predictions keyed by a hash of the normalized
+# product text. Re-runs after a catalog refresh only vectorize and score the
+# rows whose text changed; everything else is a lookup.
+#
+# The cache remembers the fingerprint (SHA-256 of the model and vectorizer
+# pickles) it was filled with and empties itself when that changes, so a
+# retrained model never serves stale labels. Entries carry the run in which
+# they were last used and the least recently used ones are evicted once the
+# cache grows past ``max_entries``.
+
+_BATCH = 900  # stay below SQLite's bound-parameter limit
+
+
+def file_fingerprint(*paths):
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def normalizer_for(vectorizer):
+    """Text normalization that cannot change what ``vectorizer`` sees.
+
+    Whitespace runs never change the tokens (or the n-grams built from
+    them); case only matters when the vectorizer does not lowercase.
+    """
+    lowercase = getattr(vectorizer, 'lowercase', False)
+
+    def normalize(text):
+        text = ' '.join(text.split())
+        return text.lower() if lowercase else text
+
+    return normalize
+
+
+class PredictionCache:
+    def __init__(self, path, fingerprint, normalize=None, max_entries=5_000_000):
+        self.path = path
+        self.fingerprint = fingerprint
+        self.normalize = normalize or (lambda text: text)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=60)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        with self._db:
+            self._db.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+            self._db.execute('CREATE TABLE IF NOT EXISTS predictions '
+                             '(key BLOB PRIMARY KEY, bucket TEXT NOT NULL, used INTEGER NOT NULL)')
+            self._db.execute('CREATE INDEX IF NOT EXISTS predictions_used ON predictions (used)')
+            stored = self._meta('fingerprint')
+            if stored != fingerprint:
+                # model or vectorizer changed: every cached label is stale
+                self._db.execute('DELETE FROM predictions')
+                self._set_meta('fingerprint', fingerprint)
+                self._set_meta('run', '0')
+            self.run = int(self._meta('run') or 0)
+
+    def _meta(self, key):
+        row = self._db.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key, value):
+        self._db.execute('INSERT OR REPLACE INTO meta VALUES (?, ?)', (key, value))
+
+    def start_run(self):
+        """Mark a new prediction run; entries touched from now on count as recently used."""
+        with self._db:
+            self.run += 1
+            self._set_meta('run', str(self.run))
+
+    def _key(self, text):
+        return hashlib.blake2b(self.normalize(text).encode('utf-8'), digest_size=16).digest()
+
+    def predict(self, texts, predict_fn, by_row=False):
+        """Labels for ``texts``; only cache misses are passed to ``predict_fn``.
+
+        With ``by_row`` it gets their positions in ``texts`` instead of the
+        texts, e.g. to score rows of a matrix that is already vectorized.
+        """
+        keys = [self._key(text) for text in texts]
+
+        found = {}
+        unique = list(dict.fromkeys(keys))
+        for start in range(0, len(unique), _BATCH):
+            batch = unique[start:start + _BATCH]
+            marks = ','.join('?' * len(batch))
+            found.update(self._db.execute(f'SELECT key, bucket FROM predictions WHERE key IN ({marks})', batch))
+
+        misses = [i for i, key in enumerate(keys) if key not in found]
+        self.hits += len(keys) - len(misses)
+        self.misses += len(misses)
+
+        miss_rows = {}  # first row of every distinct missing text
+        for i in misses:
+            miss_rows.setdefault(keys[i], i)
+
+        if miss_rows:
+            rows = list(miss_rows.values())
+            labels = predict_fn(rows if by_row else [texts[i] for i in rows])
+            new = dict(zip(miss_rows, (str(label) for label in labels)))
+            found.update(new)
+        else:
+            new = {}
+
+        with self._db:
+            self._db.executemany('UPDATE predictions SET used = ? WHERE key = ? AND used < ?',
+                                 ((self.run, key, self.run) for key in found if key not in new))
+            self._db.executemany('INSERT OR REPLACE INTO predictions VALUES (?, ?, ?)',
+                                 ((key, label, self.run) for key, label in new.items()))
+        return [found[key] for key in keys]
+
+    def evict(self):
+        """Drop least recently used entries beyond ``max_entries``; returns how many."""
+        with self._db:
+            size = self._db.execute('SELECT COUNT(*) FROM predictions').fetchone()[0]
+            excess = size - self.max_entries
+            if excess > 0:
+                self._db.execute('DELETE FROM predictions WHERE key IN '
+                                 '(SELECT key FROM predictions ORDER BY used LIMIT ?)', (excess,))
+        return max(excess, 0)
+
+    def __len__(self):
+        return self._db.execute('SELECT COUNT(*) FROM predictions').fetchone()[0]
+
+    def close(self):
+        self._db.close()
+
+
+def report(hits, misses, cache=None):
+    total = hits + misses
+    rate = 100 * hits / total if total else 0.0
+    print(f"\n🗃️ Prediction cache: {hits} hits / {misses} misses ({rate:.1f}% hit rate)")
+    if cache is not None:
+        print(f"🗃️ Cache entries: {len(cache)} (max {cache.max_entries}) in '{cache.path}'")
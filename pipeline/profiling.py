@@ -0,0 +1,313 @@
+import argparse
+import json
+import math
+import time
+
+import numpy as np
+import pandas as pd
+
+from pipeline import storage
+from pipeline.cleaning import MARKETPLACES
+
+# Streaming data-quality profiler. A dataset is read chunk by chunk and every
+# check is updated from the same chunk, so one pass covers the whole report
+# and memory is bounded by the chunk plus fixed-size sketches:
+#
+#   - nulls and blank strings per column: running counters
+#   - duplicate rows / URLs / names: 64-bit hashes in an exact sorted set up
+#     to --exact-limit distinct values, HyperLogLog beyond that; "near"
+#     duplicates hash a normalized form (case, punctuation, URL query and
+#     item id stripped)
+#   - ratings outside 0-5 or non-numeric, discounted price > retail price
+#   - price quantiles and outliers: log-spaced histogram (1% relative error)
+#
+#   python -m pipeline.profiling --marketplace amazon [--output report.json]
+
+PROFILES = {
+    'amazon': {
+        'urls': [],
+        'names': ['TITLE'],
+        'ratings': [],
+        'prices': [],
+        'discount': None,
+        'structured': None,
+    },
+    'flipkart': {
+        'urls': ['product_url'],
+        'names': ['product_name'],
+        'ratings': ['product_rating', 'overall_rating'],
+        'prices': ['retail_price', 'discounted_price'],
+        'discount': ('discounted_price', 'retail_price'),
+        'structured': 'product_specifications',
+    },
+}
+MISSING_RATING = 'No rating available'
+MAX_EXAMPLES = 20
+
+
+# === Sketches ===
+
+class HyperLogLog:
+    """Distinct count of 64-bit hashes in ``2 ** p`` one-byte registers (~1.04 / sqrt(2 ** p) error)."""
+
+    _POWERS = np.uint64(1) << np.arange(64, dtype=np.uint64)
+
+    def __init__(self, p=14):
+        self.p = p
+        self.registers = np.zeros(1 << p, dtype=np.uint8)
+
+    def add(self, hashes):
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        index = (hashes >> np.uint64(64 - self.p)).astype(np.int64)
+        rest = hashes & np.uint64((1 << (64 - self.p)) - 1)
+        # rank = position of the leftmost 1 in the remaining 64 - p bits
+        bit_length = np.searchsorted(self._POWERS, rest, side='right')
+        rank = (64 - self.p - bit_length + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def count(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.exp2(-self.registers.astype(np.float64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)  # linear counting for small sets
+        return int(round(estimate))
+
+
+class DistinctCounter:
+    """Distinct values seen, exact until ``exact_limit`` distinct hashes, then HyperLogLog."""
+
+    def __init__(self, exact_limit=10_000_000):
+        self.exact_limit = exact_limit
+        self.rows = 0
+        self._seen = np.zeros(0, dtype=np.uint64)
+        self._hll = HyperLogLog()
+
+    @property
+    def exact(self):
+        return self._seen is not None
+
+    def add(self, hashes):
+        self.rows += len(hashes)
+        self._hll.add(hashes)
+        if self._seen is not None:
+            self._seen = np.union1d(self._seen, hashes)
+            if len(self._seen) > self.exact_limit:
+                self._seen = None  # from here on the estimate is all we keep
+
+    def distinct(self):
+        return len(self._seen) if self._seen is not None else min(self._hll.count(), self.rows)
+
+    def summary(self):
+        distinct = self.distinct()
+        return {'rows': self.rows, 'distinct': distinct, 'duplicates': self.rows - distinct,
+                'exact': self.exact}
+
+
+class LogHistogram:
+    """Quantiles of non-negative values from log-spaced bins ``ratio`` apart."""
+
+    def __init__(self, low=1e-2, high=1e10, ratio=1.01):
+        self.edges = np.exp(np.arange(math.log(low), math.log(high) + math.log(ratio), math.log(ratio)))
+        self.counts = np.zeros(len(self.edges) + 1, dtype=np.int64)  # [0, low) ... [high, inf)
+        self.negative = 0
+        self.n = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return
+        self.negative += int(np.count_nonzero(values < 0))
+        values = values[values >= 0]
+        self.counts += np.bincount(np.searchsorted(self.edges, values, side='right'), minlength=len(self.counts))
+        self.n += len(values)
+        if len(values):
+            self.min = min(self.min, float(values.min()))
+            self.max = max(self.max, float(values.max()))
+
+    def quantile(self, q):
+        """Upper edge of the bin holding the q-quantile (clamped to the observed range)."""
+        if not self.n:
+            return None
+        i = int(np.searchsorted(np.cumsum(self.counts), q * self.n, side='left'))
+        value = self.edges[i] if i < len(self.edges) else self.max
+        return float(min(max(value, self.min), self.max))
+
+    def count_above(self, threshold):
+        """Values in bins entirely above ``threshold``."""
+        return int(self.counts[np.searchsorted(self.edges, threshold, side='right') + 1:].sum())
+
+    def summary(self):
+        quantiles = {f'p{int(q * 1000) / 10:g}': self.quantile(q) for q in (0.01, 0.25, 0.5, 0.75, 0.9, 0.99, 0.999)}
+        out = {'count': self.n, 'negative': self.negative, 'min': self.min if self.n else None,
+               'max': self.max if self.n else None, 'quantiles': quantiles}
+        if self.n:
+            q1, q3 = quantiles['p25'], quantiles['p75']
+            fence = q3 + 3 * (q3 - q1)
+            out['outliers'] = {'above_p99': self.count_above(quantiles['p99']),
+                               'iqr_fence': fence, 'above_iqr_fence': self.count_above(fence)}
+        return out
+
+
+# === Normalization for near-duplicates ===
+
+def hash_values(series):
+    return pd.util.hash_array(series.to_numpy(dtype=object))
+
+
+def normalize_name(series):
+    return series.fillna('').astype(str).str.lower().str.replace(r'[^0-9a-z]+', ' ', regex=True).str.strip()
+
+
+def normalize_url(series):
+    # scheme, www., query/fragment, trailing slash and the per-listing '/p/<item id>' segment
+    return (series.fillna('').astype(str).str.lower()
+            .str.replace(r'^[a-z]+://(www\.)?', '', regex=True)
+            .str.replace(r'[?#].*$', '', regex=True)
+            .str.replace(r'/p/[^/]*$', '', regex=True)
+            .str.rstrip('/'))
+
+
+# === Profiler ===
+
+class DataProfiler:
+    def __init__(self, profile, exact_limit=10_000_000):
+        self.profile = profile
+        self.exact_limit = exact_limit
+        self.rows = 0
+        self.columns = None
+        self.nulls = {}
+        self.blanks = {}
+        self.duplicates = {'rows': DistinctCounter(exact_limit)}
+        for col in profile['urls'] + profile['names']:
+            self.duplicates[col] = DistinctCounter(exact_limit)
+            self.duplicates[f'{col} (normalized)'] = DistinctCounter(exact_limit)
+        self.invalid_ratings = {col: {'count': 0, 'examples': {}} for col in profile['ratings']}
+        self.prices = {col: LogHistogram() for col in profile['prices']}
+        self.discount_above_retail = 0
+        self.structured_invalid = 0
+
+    def _present(self, chunk, columns):
+        return [col for col in columns if col in chunk.columns]
+
+    def update(self, chunk):
+        self.rows += len(chunk)
+        if self.columns is None:
+            self.columns = list(chunk.columns)
+
+        # nulls and blank strings
+        for col, count in chunk.isna().sum().items():
+            self.nulls[col] = self.nulls.get(col, 0) + int(count)
+        for col in chunk.columns[chunk.dtypes == object]:
+            blank = chunk[col].str.strip().eq('').sum()  # non-strings give NaN, which is not blank
+            self.blanks[col] = self.blanks.get(col, 0) + int(blank)
+
+        # duplicates: one row hash, one hash per raw and normalized key column
+        self.duplicates['rows'].add(pd.util.hash_pandas_object(chunk, index=False).to_numpy())
+        for col in self._present(chunk, self.profile['urls'] + self.profile['names']):
+            normalize = normalize_url if col in self.profile['urls'] else normalize_name
+            self.duplicates[col].add(hash_values(chunk[col]))
+            self.duplicates[f'{col} (normalized)'].add(hash_values(normalize(chunk[col])))
+
+        # ratings: missing (or "No rating available") is fine, anything else must be a number in 0-5
+        for col in self._present(chunk, self.profile['ratings']):
+            raw = chunk[col]
+            value = pd.to_numeric(raw, errors='coerce')
+            missing = raw.isna() | raw.astype(str).str.strip().isin(['', MISSING_RATING])
+            invalid = ~missing & (value.isna() | (value < 0) | (value > 5))
+            stats = self.invalid_ratings[col]
+            stats['count'] += int(invalid.sum())
+            for example, count in raw[invalid].astype(str).value_counts().items():
+                if example in stats['examples'] or len(stats['examples']) < MAX_EXAMPLES:
+                    stats['examples'][example] = stats['examples'].get(example, 0) + int(count)
+
+        for col in self._present(chunk, self.profile['prices']):
+            self.prices[col].add(pd.to_numeric(chunk[col], errors='coerce'))
+
+        if self.profile['discount'] and all(col in chunk.columns for col in self.profile['discount']):
+            discounted, retail = (pd.to_numeric(chunk[col], errors='coerce') for col in self.profile['discount'])
+            self.discount_above_retail += int((discounted > retail).sum())
+
+        structured = self.profile['structured']
+        if structured and structured in chunk.columns:
+            values = chunk[structured]
+            # anything but a string starting with '{' (missing values included) is suspicious
+            ok = values.str.startswith('{', na=False) if values.dtype == object else np.zeros(len(values), bool)
+            self.structured_invalid += int(len(values) - np.count_nonzero(ok))
+
+    def report(self):
+        report = {
+            'rows': self.rows,
+            'columns': self.columns or [],
+            'nulls': self.nulls,
+            'blank_strings': self.blanks,
+            'duplicates': {key: counter.summary() for key, counter in self.duplicates.items()},
+        }
+        if self.invalid_ratings:
+            report['invalid_ratings'] = self.invalid_ratings
+        if self.prices:
+            report['prices'] = {col: hist.summary() for col, hist in self.prices.items()}
+        if self.profile['discount']:
+            report['discount_above_retail'] = self.discount_above_retail
+        if self.profile['structured']:
+            report['invalid_structured'] = {self.profile['structured']: self.structured_invalid}
+        return report
+
+
+def profile_dataset(marketplace, name=None, chunksize=100000, exact_limit=10_000_000):
+    """Profile the stored dataset ``name`` (default: the marketplace's cleaned output) in one pass."""
+    name = name or MARKETPLACES[marketplace]['output']
+    profiler = DataProfiler(PROFILES[marketplace], exact_limit)
+    for chunk in storage.read_chunks(name, chunksize=chunksize):
+        profiler.update(chunk)
+    return profiler.report()
+
+
+def print_summary(report):
+    print(f"📊 Rows: {report['rows']}, columns: {len(report['columns'])}")
+    nulls = {col: n for col, n in report['nulls'].items() if n}
+    print(f"🕳️ Missing values: {nulls or 'none'}")
+    for key, dup in report['duplicates'].items():
+        approx = '' if dup['exact'] else '~'
+        print(f"🔁 Duplicate {key}: {approx}{dup['duplicates']}")
+    for col, stats in report.get('invalid_ratings', {}).items():
+        print(f"⚠️ Invalid entries in '{col}': {stats['count']} {list(stats['examples'])[:5]}")
+    if 'discount_above_retail' in report:
+        print(f"💸 Products with discounted price > retail price: {report['discount_above_retail']}")
+    for col, prices in report.get('prices', {}).items():
+        if 'outliers' in prices:
+            print(f"🚩 '{col}': p50 {prices['quantiles']['p50']:.0f}, p99 {prices['quantiles']['p99']:.0f}, "
+                  f"{prices['outliers']['above_p99']} above p99")
+    for col, count in report.get('invalid_structured', {}).items():
+        print(f"🧪 Possibly invalid '{col}' entries: {count}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Single-pass data-quality report for a marketplace dataset')
+    parser.add_argument('--marketplace', choices=sorted(PROFILES), default='flipkart')
+    parser.add_argument('--dataset', help="dataset path without extension (default: the cleaned output)")
+    parser.add_argument('--output', help="JSON report path (default: next to the dataset)")
+    parser.add_argument('--chunksize', type=int, default=100000)
+    parser.add_argument('--exact-limit', type=int, default=10_000_000,
+                        help='distinct hashes kept for exact duplicate counts before switching to HyperLogLog')
+    args = parser.parse_args()
+
+    name = args.dataset or MARKETPLACES[args.marketplace]['output']
+    start = time.time()
+    report = profile_dataset(args.marketplace, name, args.chunksize, args.exact_limit)
+    report['dataset'] = name
+    report['seconds'] = round(time.time() - start, 2)
+
+    print_summary(report)
+    output = args.output or f'{name}_quality.json'
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=1)
+    print(f"\n✅ Report saved to '{output}' ({report['seconds']}s)")
+
+
+if __name__ == '__main__':
+    main()
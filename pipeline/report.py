@@ -0,0 +1,124 @@
+import argparse
+import csv
+import os
+import sys
+
+# Bucket count charts, as a separate reporting step.
+#
+# The bucketing and predict scripts save their final counts as small
+# 'Bucket,Count' CSVs and only call plot_counts() at the end (skipped with
+# --no-plot); plot_counts renders them. matplotlib is imported on first use,
+# with the non-interactive Agg backend when there is no display, so neither
+# the scripts' startup nor headless runs pay for it.
+#
+#   python -m pipeline.report [amazon_buckets amazon_predicted ...] [--show]
+
+CHARTS = {
+    'amazon_buckets': {
+        'counts': './data/amazon/final_bucket_plot.csv',
+        'figure': './figures/amazon/bucket_distribution.png',
+        'title': 'Product Count per Bucket', 'xlabel': 'Bucket',
+        'figsize': (10, 6), 'rotation': 15, 'tick_size': 9, 'title_size': 16, 'label_size': 12,
+        'colors': ['#5DADE2', '#EC7063', '#58D68D', '#A569BD', '#95A5A6', '#F5B041', '#76D7C4', '#DC7633',
+                   '#D98880', '#7DCEA0'],
+    },
+    'amazon_predicted': {
+        'counts': './data/amazon/predicted_bucket_counts.csv',
+        'figure': './figures/amazon/bucket_prediction.png',
+        'title': 'ML-Predicted Amazon Product Bucket Distribution', 'xlabel': 'Buckets',
+        'figsize': (12, 7), 'rotation': 25, 'tick_size': 10, 'title_size': 18, 'label_size': 14,
+        'colors': 'tab20',
+    },
+    'flipkart_buckets': {
+        'counts': './data/flipkart/final_bucket_counts.csv',
+        'figure': './figures/flipkart/bucket_distribution.png',
+        'title': 'Product Count per Bucket', 'xlabel': 'Bucket',
+        'figsize': (10, 6), 'rotation': 0, 'tick_size': 11, 'title_size': 16, 'label_size': 12,
+        'colors': ['#5DADE2', '#EC7063', '#58D68D', '#A569BD', '#F4D03F', '#95A5A6'],
+    },
+    'flipkart_predicted': {
+        'counts': './data/flipkart/predicted_bucket_counts.csv',
+        'figure': './figures/flipkart/bucket_prediction.png',
+        'title': 'ML-Predicted Product Bucket Distribution', 'xlabel': 'Buckets',
+        'figsize': (10, 6), 'rotation': 0, 'tick_size': 11, 'title_size': 16, 'label_size': 12,
+        'colors': ['#5DADE2', '#EC7063', '#58D68D', '#A569BD', '#F4D03F', '#95A5A6'],
+    },
+}
+
+
+def save_counts(chart, counts):
+    """Write ``{bucket: count}`` (in the given order) to the chart's counts CSV."""
+    path = CHARTS[chart]['counts']
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Bucket', 'Count'])
+        writer.writerows(counts.items())
+    return path
+
+
+def load_counts(path):
+    with open(path, newline='') as f:
+        return {row['Bucket']: int(row['Count']) for row in csv.DictReader(f)}
+
+
+def has_display():
+    return sys.platform in ('win32', 'darwin') or bool(os.environ.get('DISPLAY') or os.environ.get('WAYLAND_DISPLAY'))
+
+
+def plot_counts(chart, show=False):
+    """Render the chart from its saved counts; shown too if asked and a display is there."""
+    spec = CHARTS[chart]
+    counts = load_counts(spec['counts'])
+    show = show and has_display()
+
+    import matplotlib
+    if not show:
+        matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=spec['figsize'])
+    colors = plt.get_cmap(spec['colors']).colors if isinstance(spec['colors'], str) else spec['colors']
+    bars = plt.bar(list(counts), list(counts.values()), color=colors)
+    offset = max(counts.values(), default=0) * 0.01
+    for bar in bars:
+        yval = bar.get_height()
+        plt.text(bar.get_x() + bar.get_width()/2, yval + offset, f'{yval:.0f}', ha='center', va='bottom',
+                 fontsize=10, fontweight='bold')
+
+    plt.title(spec['title'], fontsize=spec['title_size'])
+    plt.xlabel(spec['xlabel'], fontsize=spec['label_size'], fontweight='bold')
+    plt.ylabel('Number of Products', fontsize=spec['label_size'], fontweight='bold')
+    plt.xticks(rotation=spec['rotation'], fontsize=spec['tick_size'])
+    plt.yticks(fontsize=spec['tick_size'])
+    plt.grid(axis='y', linestyle='--', alpha=0.4)
+    plt.tight_layout()
+
+    os.makedirs(os.path.dirname(spec['figure']), exist_ok=True)
+    plt.savefig(spec['figure'], dpi=300, bbox_inches='tight')
+    print(f"🖼️ Saved bucket distribution chart to '{spec['figure']}'")
+    if show:
+        plt.show()
+    plt.close()
+    return spec['figure']
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Render bucket count charts from the saved counts')
+    parser.add_argument('charts', nargs='*', metavar='chart',
+                        help=f"{', '.join(CHARTS)} (default: every chart whose counts file exists)")
+    parser.add_argument('--show', action='store_true', help='also open the charts when a display is available')
+    args = parser.parse_args()
+    unknown = [chart for chart in args.charts if chart not in CHARTS]
+    if unknown:
+        parser.error(f"Unknown charts: {', '.join(unknown)}")
+
+    charts = args.charts or [name for name, spec in CHARTS.items() if os.path.exists(spec['counts'])]
+    if not charts:
+        sys.exit("❌ No saved bucket counts found — run a bucketing or predict script first")
+    for chart in charts:
+        plot_counts(chart, show=args.show)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+from pipeline.storage import TEXT_DTYPE
+
+# Column-wise building blocks for the Flipkart bucketing rules: every
+# condition becomes a boolean mask over the whole frame and the if/elif
+# priority order is resolved once with np.select.
+#
+# Text is held as Arrow strings when pyarrow is installed, so a keyword set
+# is one RE2 alternation over the whole column (a linear-time automaton, one
+# pass per set). Python's backtracking re over the same alternation was
+# slower than the row-wise apply; without pyarrow plain substring checks are
+# used instead.
+
+
+def text_column(df, column):
+    """``str(value)`` for every cell, with missing values as ``''``."""
+    values = df[column].fillna('').astype(str)
+    return values.astype(TEXT_DTYPE) if TEXT_DTYPE is not None else values
+
+
+def joined_text(df, columns):
+    """Space-joined, lower-cased text of ``columns`` for every row."""
+    text = text_column(df, columns[0])
+    for column in columns[1:]:
+        text = text + ' ' + text_column(df, column)
+    return text.str.lower()
+
+
+def _arrow_backed(text):
+    return getattr(text.dtype, 'storage', None) == 'pyarrow'
+
+
+def contains_any(text, keywords):
+    """Mask of rows whose text contains at least one of ``keywords``."""
+    if _arrow_backed(text):
+        pattern = '|'.join(re.escape(kw) for kw in keywords)
+        return text.str.contains(pattern, regex=True).to_numpy(dtype=bool)
+    return np.fromiter((any(kw in value for kw in keywords) for value in text), dtype=bool, count=len(text))
+
+
+def below(values, threshold):
+    return (values < threshold).to_numpy(dtype=bool)
+
+
+def above(values, threshold):
+    return (values > threshold).to_numpy(dtype=bool)
+
+
+def apply_rules(rules, default):
+    """Label rows with the first matching ``(mask, label)`` rule, like an if/elif chain."""
+    masks = [mask for mask, _ in rules]
+    labels = [label for _, label in rules]
+    return np.select(masks, labels, default=default)
+
+
+def discount_percent(df):
+    """Vectorized ``(retail - discounted) / retail * 100``, 0 where retail <= 0."""
+    retail = df['retail_price'].to_numpy(dtype=float)
+    discounted = df['discounted_price'].to_numpy(dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        percent = (retail - discounted) / retail * 100
+    return pd.Series(np.where(retail > 0, percent, 0), index=df.index)
+
+
+# === Declarative rules (marketplace configs) ===
+# A rule set is an ordered list of ``{"label": ..., "when": condition}``; the
+# first rule whose condition holds wins, ``default`` otherwise. Conditions:
+#
+#   {"text": keywords}                          joined text contains any keyword
+#   {"column": c, "contains": keywords}         str(c) contains any keyword
+#                                               (add "lower": true to lower-case c first)
+#   {"column": c, "below": x} / {"column": c, "above": x}
+#   {"any": [conditions]} / {"all": [conditions]}
+#
+# ``keywords`` is a list or the name of one of the config's keyword sets.
+
+DERIVED_COLUMNS = {'discount_percent': discount_percent}
+
+
+class RuleSet:
+    def __init__(self, rules, default, keyword_sets=None):
+        self.rules = rules
+        self.default = default
+        self.keyword_sets = keyword_sets or {}
+        for rule in rules:
+            self._check(rule['when'])
+
+    def _check(self, condition):
+        if 'any' in condition or 'all' in condition:
+            for sub in condition.get('any', condition.get('all')):
+                self._check(sub)
+            return
+        keywords = condition.get('text', condition.get('contains'))
+        if isinstance(keywords, str) and keywords not in self.keyword_sets:
+            raise ValueError(f"Unknown keyword set '{keywords}'")
+        if not ({'text', 'contains', 'below', 'above'} & condition.keys()):
+            raise ValueError(f"Unknown rule condition {condition}")
+
+    def _keywords(self, keywords):
+        return self.keyword_sets[keywords] if isinstance(keywords, str) else keywords
+
+    def _mask(self, condition, df, text, columns):
+        if 'any' in condition:
+            return np.logical_or.reduce([self._mask(sub, df, text, columns) for sub in condition['any']])
+        if 'all' in condition:
+            return np.logical_and.reduce([self._mask(sub, df, text, columns) for sub in condition['all']])
+        if 'text' in condition:
+            return contains_any(text, self._keywords(condition['text']))
+        column = condition['column']
+        if 'contains' in condition:
+            lower = condition.get('lower', False)
+            if (column, lower) not in columns:
+                values = text_column(df, column)
+                columns[column, lower] = values.str.lower() if lower else values
+            return contains_any(columns[column, lower], self._keywords(condition['contains']))
+        if 'below' in condition:
+            return below(df[column], condition['below'])
+        return above(df[column], condition['above'])
+
+    def label(self, df, text):
+        """Labels for every row of ``df``; ``text`` is its joined, lower-cased text."""
+        columns = {}
+        rules = [(self._mask(rule['when'], df, text, columns), rule['label']) for rule in self.rules]
+        return apply_rules(rules, default=self.default)
@@ -0,0 +1,168 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+
+from pipeline import config as marketplace_config
+from pipeline import stages, storage
+from pipeline.chunk_pool import add_inflight_argument
+from pipeline.config import STAGES
+
+# Config-driven pipeline runner with stage caching.
+#
+# Each stage's run is stamped in '<data_dir>/.stages/<stage>.json' with a key
+# hashed from what the stage's output depends on:
+#   - its inputs: a dataset's manifest checksum, a file's size + mtime
+#   - its config section plus the shared keys (text columns, chunksize, ...)
+#     and the storage format
+#   - its code: the source of the pipeline modules it runs
+# A stage whose key matches its stamp and whose outputs are still in place
+# is skipped; a changed keyword list or re-cleaned dataset reruns exactly the
+# stages downstream of it.
+#
+#   python -m pipeline run-all --marketplace amazon [--workers N] [--force]
+#   python -m pipeline bucket --marketplace flipkart
+#   python -m pipeline status --marketplace configs/new_shop.json
+
+PIPELINE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Modules whose code a stage's output depends on
+STAGE_CODE = {
+    'clean': ['stages.py', 'config.py', 'cleaning.py', 'storage.py'],
+    'bucket': ['stages.py', 'config.py', 'chunk_pool.py', 'delta.py', 'keyword_matcher.py', 'rule_engine.py',
+               'storage.py'],
+    'train': ['stages.py', 'config.py', 'model_artifact.py', 'storage.py'],
+    'predict': ['stages.py', 'config.py', 'chunk_pool.py', 'delta.py', 'fast_inference.py', 'model_artifact.py',
+                'storage.py'],
+}
+
+
+def stamp_path(config, stage):
+    return os.path.join(config['data_dir'], '.stages', f'{stage}.json')
+
+
+def read_stamp(config, stage):
+    try:
+        with open(stamp_path(config, stage)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_stamp(config, stage, stamp):
+    path = stamp_path(config, stage)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(stamp, f, indent=1, default=int)
+    os.replace(path + '.tmp', path)
+
+
+def input_fingerprint(path):
+    """Manifest checksum of a dataset, size + mtime of a file, None if missing."""
+    manifest = storage.read_manifest(path)
+    if manifest is not None:
+        return manifest['sha256']
+    try:
+        # a dataset without a usable manifest (older run or written by hand)
+        path = storage.dataset_path(path, storage.detect_format(path))
+    except FileNotFoundError:
+        pass
+    if not os.path.exists(path):
+        return None
+    info = os.stat(path)
+    return f'{info.st_size}:{info.st_mtime_ns}'
+
+
+def output_exists(path):
+    return storage.read_manifest(path) is not None or os.path.isfile(path)
+
+
+def code_version(stage):
+    digest = hashlib.sha256()
+    for name in STAGE_CODE[stage]:
+        with open(os.path.join(PIPELINE_DIR, name), 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def stage_key(config, stage, fmt, fingerprints):
+    settings = {key: value for key, value in config.items() if key not in STAGES}
+    digest = hashlib.sha256()
+    digest.update(json.dumps({'stage': stage, 'format': fmt, 'settings': settings, 'config': config[stage],
+                              'inputs': fingerprints}, sort_keys=True).encode('utf-8'))
+    digest.update(code_version(stage).encode('ascii'))
+    return digest.hexdigest()
+
+
+def stage_state(config, stage, fmt):
+    """``(state, key)`` with state one of 'up to date', 'stale', 'never run', 'missing input'."""
+    inputs, outputs = stages.stage_io(config, stage)
+    fingerprints = {path: input_fingerprint(path) for path in inputs}
+    if None in fingerprints.values():
+        return 'missing input', None
+    key = stage_key(config, stage, fmt, fingerprints)
+    stamp = read_stamp(config, stage)
+    if stamp is None:
+        return 'never run', key
+    if stamp['key'] == key and all(output_exists(path) for path in outputs):
+        return 'up to date', key
+    return 'stale', key
+
+
+def run_stage(config, stage, fmt, workers=1, force=False, inflight=2):
+    """Run ``stage`` unless its cached output is up to date; True if it ran."""
+    state, key = stage_state(config, stage, fmt)
+    if state == 'up to date' and not force:
+        stamp = read_stamp(config, stage)
+        print(f"⏭️  {stage}: up to date (last run {stamp['finished']}), skipped")
+        return False
+    if state == 'missing input':
+        inputs, _ = stages.stage_io(config, stage)
+        missing = [path for path in inputs if input_fingerprint(path) is None]
+        raise FileNotFoundError(f"{stage}: missing input {', '.join(missing)}")
+
+    print(f"\n▶️  {config['name']} {stage} ({state})")
+    start = time.time()
+    summary = stages.STAGE_FUNCTIONS[stage](config, fmt, workers=workers, inflight=inflight)
+    elapsed = time.time() - start
+    write_stamp(config, stage, {
+        'key': key,
+        'finished': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'seconds': round(elapsed, 2),
+        'summary': summary,
+    })
+    print(f"✅ {stage} finished in {elapsed:.1f}s")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the bucketing pipeline for one marketplace')
+    parser.add_argument('command', choices=STAGES + ('run-all', 'status'))
+    parser.add_argument('--marketplace', default='amazon',
+                        help=f"bundled config ({', '.join(marketplace_config.available())}) or a config .json path")
+    parser.add_argument('--workers', type=int, default=1, help='label chunks on N processes (default: 1, serial)')
+    add_inflight_argument(parser)
+    parser.add_argument('--force', action='store_true', help='run even if the cached output is up to date')
+    storage.add_format_argument(parser)
+    args = parser.parse_args()
+    config = marketplace_config.load(args.marketplace)
+
+    if args.command == 'status':
+        for stage in STAGES:
+            state, _ = stage_state(config, stage, args.format)
+            stamp = read_stamp(config, stage)
+            last = f" — last run {stamp['finished']} ({stamp['seconds']}s)" if stamp else ''
+            print(f"{stage:8s} {state}{last}")
+        return
+
+    ran, skipped = [], []
+    for stage in (STAGES if args.command == 'run-all' else (args.command,)):
+        ran_stage = run_stage(config, stage, args.format, workers=args.workers, force=args.force,
+                              inflight=args.inflight)
+        (ran if ran_stage else skipped).append(stage)
+    print(f"\n🏁 {config['name']}: ran {', '.join(ran) or 'nothing'}; cached {', '.join(skipped) or 'nothing'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,206 @@
+import argparse
+import asyncio
+import json
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# Long-lived local classification service around the saved model.
+#
+# The model and vectorizer are loaded once. Concurrent requests are
+# micro-batched: the first queued text opens a batch that closes after
+# --max-wait-ms or --max-batch texts, and the whole batch goes through a
+# single vectorizer.transform / clf.predict call on a worker thread, so the
+# event loop keeps accepting connections while the model runs.
+#
+#   python -m pipeline.service --port 8080
+#
+#   POST /classify        {"title": ..., "description": ..., "bullet_points": ...}  or  {"text": ...}
+#   POST /classify/batch  {"items": [<same objects>, ...]}
+#   GET  /stats           request count, batch sizes, p50/p99 latency
+#   GET  /health
+
+TEXT_FIELDS = ('title', 'description', 'bullet_points')
+
+
+def item_text(item):
+    """Same text the batch predict script builds: TITLE DESCRIPTION BULLET_POINTS."""
+    if 'text' in item:
+        return str(item['text'])
+    return ' '.join(str(item.get(field) or '') for field in TEXT_FIELDS)
+
+
+class LatencyStats:
+    def __init__(self, window=10000):
+        self.samples = deque(maxlen=window)
+        self.requests = 0
+        self.batches = 0
+        self.batched_texts = 0
+
+    def record(self, seconds):
+        self.requests += 1
+        self.samples.append(seconds * 1000)
+
+    def percentile(self, q):
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+    def snapshot(self):
+        return {
+            'requests': self.requests,
+            'batches': self.batches,
+            'avg_batch_size': round(self.batched_texts / self.batches, 2) if self.batches else 0.0,
+            'p50_ms': round(self.percentile(50), 3),
+            'p99_ms': round(self.percentile(99), 3),
+        }
+
+
+class MicroBatcher:
+    def __init__(self, predict_fn, max_batch=256, max_wait_ms=2.0, stats=None):
+        self.predict_fn = predict_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.stats = stats or LatencyStats()
+        self._queue = asyncio.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def classify(self, texts):
+        loop = asyncio.get_running_loop()
+        futures = [loop.create_future() for _ in texts]
+        for text, future in zip(texts, futures):
+            self._queue.put_nowait((text, future))
+        return await asyncio.gather(*futures)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            texts = [text for text, _ in batch]
+            try:
+                labels = await loop.run_in_executor(self._executor, self.predict_fn, texts)
+            except Exception as exc:  # fail the waiting requests, keep serving
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+            self.stats.batches += 1
+            self.stats.batched_texts += len(batch)
+            for (_, future), label in zip(batch, labels):
+                if not future.done():
+                    future.set_result(str(label))
+
+
+class ClassifyService:
+    def __init__(self, predict_fn, max_batch=256, max_wait_ms=2.0):
+        self.stats = LatencyStats()
+        self.batcher = MicroBatcher(predict_fn, max_batch, max_wait_ms, self.stats)
+
+    async def handle(self, method, path, body):
+        """Returns ``(status, payload)`` for one request."""
+        if method == 'GET' and path == '/health':
+            return 200, {'status': 'ok'}
+        if method == 'GET' and path == '/stats':
+            return 200, self.stats.snapshot()
+        if method != 'POST' or path not in ('/classify', '/classify/batch'):
+            return 404, {'error': f'no route for {method} {path}'}
+
+        try:
+            payload = json.loads(body or b'{}')
+            items = payload['items'] if path == '/classify/batch' else [payload]
+            texts = [item_text(item) for item in items]
+        except (ValueError, KeyError, TypeError, AttributeError) as exc:
+            return 400, {'error': f'bad request body: {exc}'}
+
+        start = time.perf_counter()
+        try:
+            labels = await self.batcher.classify(texts)
+        except Exception as exc:  # the batch's predict call failed: answer it, keep serving
+            return 500, {'error': f'classification failed: {type(exc).__name__}: {exc}'}
+        self.stats.record(time.perf_counter() - start)
+        if path == '/classify':
+            return 200, {'bucket': labels[0]}
+        return 200, {'buckets': labels}
+
+    async def serve_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode('latin-1').split(' ', 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    key, _, value = line.decode('latin-1').partition(':')
+                    headers[key.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+
+                status, payload = await self.handle(method, path.split('?', 1)[0], body)
+                data = json.dumps(payload).encode('utf-8')
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                writer.write(
+                    f'HTTP/1.1 {status} {"OK" if status == 200 else "Error"}\r\n'
+                    f'Content-Type: application/json\r\nContent-Length: {len(data)}\r\n'
+                    f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n'.encode('latin-1') + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host, port):
+        self.batcher.start()
+        server = await asyncio.start_server(self.serve_connection, host, port)
+        print(f"🚀 Classifying on http://{host}:{port} (POST /classify, /classify/batch; GET /stats)")
+        async with server:
+            await server.serve_forever()
+
+
+def load_predict_fn(model_path, vectorizer_path, artifact_path=None):
+    from pipeline import fast_inference, model_artifact
+
+    clf, vectorizer, _ = model_artifact.load_model(artifact_path, model_path, vectorizer_path)
+    return fast_inference.predict_fn(clf, vectorizer)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Online bucket classification service')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--model', default='./models/amazon/bucket_classifier.pkl')
+    parser.add_argument('--vectorizer', default='./models/amazon/vectorizer.pkl')
+    parser.add_argument('--artifact', default='./models/amazon/bucket_model',
+                        help='compact model artifact (used when present, else --model/--vectorizer)')
+    parser.add_argument('--max-batch', type=int, default=256, help='most texts per transform/predict call')
+    parser.add_argument('--max-wait-ms', type=float, default=2.0, help='how long a batch waits to fill up')
+    args = parser.parse_args()
+
+    service = ClassifyService(load_predict_fn(args.model, args.vectorizer, args.artifact), args.max_batch, args.max_wait_ms)
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        print(f"\n📊 {service.stats.snapshot()}")
+
+
+if __name__ == '__main__':
+    main()
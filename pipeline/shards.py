@@ -0,0 +1,230 @@
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+from collections import namedtuple
+
+from pipeline import delta, storage
+from pipeline.chunk_pool import merge_counts
+from pipeline.report import CHARTS, save_counts
+
+# Sharded runs of the Amazon chunk loops across nodes (or local processes).
+#
+# Shard k of N is a contiguous range of the chunks a single-node run reads
+# from the cleaned input: chunks [k*C//N, (k+1)*C//N) of C, counted exactly
+# from the input's manifest. A shard labels its chunks exactly as the
+# single-node run would and writes its outputs, delta state and bucket counts
+# under '<output>-shard<k>of<N>'. `merge` copies the shard parts in order into
+# the final datasets without re-encoding them, so data, manifests and
+# checksums are byte-identical to a single-node run, and sums the bucket
+# counts into the final counts CSV. `simulate` runs every shard as a local
+# process and merges them; with --check it then compares the merged files
+# against a single-node run.
+#
+#   python scripts_amazon/bucketing.py --shard 3/8          (one shard per node, 0/8 ... 7/8)
+#   python -m pipeline.shards merge bucketing --shards 8 [--remove-shards]
+#   python -m pipeline.shards simulate predict --shards 4 [--check] [-- --no-cache ...]
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STAGES = {
+    'bucketing': {
+        'script': os.path.join(ROOT, 'scripts_amazon', 'bucketing.py'),
+        'output': './data/amazon/amazon_buckets',
+        # datasets written next to the output, by suffix
+        'datasets': ['', '_scores'],
+        'chart': 'amazon_buckets',
+        'sort_counts': False,
+    },
+    'predict': {
+        'script': os.path.join(ROOT, 'scripts_amazon', 'predict_bucket.py'),
+        'output': './data/amazon/amazon_predicted_buckets',
+        'datasets': [''],
+        'chart': 'amazon_predicted',
+        'sort_counts': True,
+    },
+}
+
+
+class Shard(namedtuple('Shard', ['index', 'count'])):
+    """Shard ``index`` of ``count``, written 'k/N' on the command line."""
+
+    def __str__(self):
+        return f'{self.index}/{self.count}'
+
+    def name(self, path):
+        """``path`` (a dataset name or a file) with this shard's suffix before the extension."""
+        root, ext = os.path.splitext(path)
+        return f'{root}-shard{self.index:03d}of{self.count:03d}{ext}'
+
+    def chunk_range(self, input_name, chunksize):
+        """``(start, stop)`` of the input chunks this shard processes."""
+        chunks, exact = storage.dataset_chunks(input_name, chunksize)
+        if not exact:
+            raise ValueError(f"'{input_name}' has no manifest, so it cannot be split into exact shards — "
+                             f"rewrite it through pipeline.storage (e.g. rerun the cleaning step)")
+        return self.index * chunks // self.count, (self.index + 1) * chunks // self.count
+
+
+def parse_shard(text):
+    try:
+        index, count = (int(part) for part in text.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected K/N, e.g. 0/4, got '{text}'")
+    if not 0 <= index < count:
+        raise argparse.ArgumentTypeError(f"shard index must be in 0..{count - 1}, got '{text}'")
+    return Shard(index, count)
+
+
+def add_shard_argument(parser):
+    parser.add_argument('--shard', type=parse_shard, metavar='K/N',
+                        help='process only shard K of N of the input (merge with python -m pipeline.shards)')
+
+
+# === Shard bucket counts ===
+# Saved last by a shard run, so their presence marks a completed shard.
+
+def counts_path(shard_output):
+    return f'{shard_output}.counts.json'
+
+
+def save_shard_counts(shard_output, counts):
+    # pairs rather than an object: the merged counts keep the single-node order
+    with open(counts_path(shard_output), 'w') as f:
+        json.dump(list(counts.items()), f)
+    return counts_path(shard_output)
+
+
+def load_shard_counts(shard_output):
+    with open(counts_path(shard_output)) as f:
+        return dict(json.load(f))
+
+
+# === Merge ===
+
+def shard_files(spec, shard):
+    """``(datasets, files)`` a shard run leaves behind."""
+    output = shard.name(spec['output'])
+    datasets = [output + suffix for suffix in spec['datasets']] + [delta.state_name(output)]
+    return datasets, [f'{delta.state_name(output)}.json', counts_path(output)]
+
+
+def merge(stage, count, remove_shards=False):
+    """Combine the ``count`` shards of ``stage`` into its final outputs; returns the bucket counts."""
+    spec = STAGES[stage]
+    shards = [Shard(index, count) for index in range(count)]
+    missing = [str(shard) for shard in shards if not os.path.exists(counts_path(shard.name(spec['output'])))]
+    if missing:
+        raise FileNotFoundError(f"Shards not (completely) run yet: {', '.join(missing)}")
+
+    output = spec['output']
+    for name in [output + suffix for suffix in spec['datasets']] + [delta.state_name(output)]:
+        path = storage.concat_datasets([shard.name(output) + name[len(output):] for shard in shards], name)
+        print(f"✅ Merged {count} shards into '{path}'")
+    shutil.copyfile(f'{delta.state_name(shards[0].name(output))}.json', f'{delta.state_name(output)}.json')
+
+    bucket_counts = {}
+    for shard in shards:
+        merge_counts(bucket_counts, load_shard_counts(shard.name(output)))
+    if spec['sort_counts']:
+        bucket_counts = dict(sorted(bucket_counts.items(), key=lambda x: -x[1]))
+    print(f"💾 Bucket counts saved to '{save_counts(spec['chart'], bucket_counts)}'")
+
+    if remove_shards:
+        for shard in shards:
+            datasets, files = shard_files(spec, shard)
+            for name in datasets:
+                storage.remove_dataset(name)
+            for path in files:
+                os.remove(path)
+    return bucket_counts
+
+
+# === Local simulation ===
+
+def run_shards(stage, count, extra_args=()):
+    """Run every shard of ``stage`` as a local process; output goes to '<shard output>.log'."""
+    spec = STAGES[stage]
+    procs = []
+    for shard in (Shard(index, count) for index in range(count)):
+        log_path = f"{shard.name(spec['output'])}.log"
+        os.makedirs(os.path.dirname(log_path) or '.', exist_ok=True)
+        with open(log_path, 'w') as log:
+            procs.append((shard, log_path, subprocess.Popen(
+                [sys.executable, spec['script'], '--shard', str(shard), *extra_args],
+                stdout=log, stderr=subprocess.STDOUT)))
+    failed = [(shard, log_path) for shard, log_path, proc in procs if proc.wait()]
+    for shard, log_path in failed:
+        print(f"❌ Shard {shard} failed, see '{log_path}'")
+    return not failed
+
+
+def fingerprints(stage):
+    """Checksums of the stage's final datasets and the contents of its counts CSV."""
+    spec = STAGES[stage]
+    output = spec['output']
+    result = {}
+    for name in [output + suffix for suffix in spec['datasets']] + [delta.state_name(output)]:
+        manifest = storage.read_manifest(name)
+        result[name] = manifest and manifest['sha256']
+    with open(CHARTS[spec['chart']]['counts'], 'rb') as f:
+        result[CHARTS[spec['chart']]['counts']] = f.read()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Merge or locally simulate sharded Amazon runs')
+    sub = parser.add_subparsers(dest='command', required=True)
+    merge_parser = sub.add_parser('merge', help='combine completed shards into the final outputs')
+    simulate_parser = sub.add_parser('simulate', help='run all shards as local processes, then merge',
+                                     description="Options after '--' go to every script run, "
+                                                 "e.g. -- --no-cache --format csv")
+    for p in (merge_parser, simulate_parser):
+        p.add_argument('stage', choices=list(STAGES))
+        p.add_argument('--shards', type=int, required=True, help='number of shards N')
+        p.add_argument('--remove-shards', action='store_true', help='delete the shard outputs once merged')
+    simulate_parser.add_argument('--check', action='store_true',
+                                 help='rerun on a single node and compare outputs, state and counts')
+    # everything after '--' is passed through to the scripts
+    argv = sys.argv[1:]
+    split = argv.index('--') if '--' in argv else len(argv)
+    args = parser.parse_args(argv[:split])
+    script_args = argv[split + 1:]
+    if args.shards < 1:
+        parser.error('--shards must be at least 1')
+
+    if args.command == 'merge':
+        try:
+            merge(args.stage, args.shards, args.remove_shards)
+        except (FileNotFoundError, ValueError) as e:
+            sys.exit(f"❌ {e}")
+        return
+
+    start = time.perf_counter()
+    if not run_shards(args.stage, args.shards, script_args):
+        sys.exit(1)
+    print(f"🧩 {args.shards} shards ran in {time.perf_counter() - start:.1f}s")
+    merge(args.stage, args.shards, args.remove_shards)
+    if not args.check:
+        return
+
+    merged = fingerprints(args.stage)
+    print("\n🔁 Single-node run for comparison...")
+    start = time.perf_counter()
+    subprocess.run([sys.executable, STAGES[args.stage]['script'], '--no-plot', *script_args],
+                   stdout=subprocess.DEVNULL, check=True)
+    print(f"⏱️  Single node ran in {time.perf_counter() - start:.1f}s")
+    single = fingerprints(args.stage)
+    mismatched = [name for name in single if single[name] != merged[name]]
+    for name in single:
+        print(f"{'❌' if name in mismatched else '✅'} {name}")
+    if mismatched:
+        sys.exit("❌ Sharded and single-node results differ")
+    print("✅ Sharded results are identical to the single-node run")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,349 @@
+import argparse
+import glob
+import json
+import os
+import re
+import shutil
+import sys
+import time
+
+import numpy as np
+
+from pipeline import storage
+
+# "Similar products in the same bucket" from the TF-IDF vectors the predict
+# stage already computes.
+#
+# predict_bucket.py --embeddings projects every product's TF-IDF row onto a
+# TruncatedSVD basis (fitted once on a sample of the input and kept while the
+# model is unchanged) and saves the L2-normalized float32 embeddings chunk by
+# chunk in '<output>_embeddings/', in output order. `build` groups them by
+# predicted bucket and builds one inverted-file (IVF) index per bucket:
+# spherical k-means centroids (~sqrt(n) lists) and the vectors stored list by
+# list. A query scores its --nprobe closest lists only (by default a fixed
+# share of the bucket's lists, so recall holds as buckets grow), so a lookup
+# reads a few thousand vectors instead of the whole bucket. Everything is plain .npy,
+# memory-mapped at query time. Cosine similarity = dot product of embeddings.
+#
+#   python scripts_amazon/predict_bucket.py --embeddings [--svd-dims 128]
+#   python -m pipeline.similar build [--nlist N]
+#   python -m pipeline.similar query <PRODUCT_ID> [-k 10] [--nprobe N]
+#   python benchmarks/similar_products.py --check       (recall/latency against exact search)
+
+ID_COLUMN = 'PRODUCT_ID'
+LABEL_COLUMN = 'predicted_bucket'
+OUTPUT = './data/amazon/amazon_predicted_buckets'
+DIMS = 128
+SVD_SAMPLE = 50000
+NPROBE_FRACTION = 0.125  # share of a bucket's lists a query scans by default
+MIN_NPROBE = 8
+TRAIN_PER_LIST = 64  # k-means training rows per list
+KMEANS_ITERATIONS = 10
+BLOCK = 16384  # rows per matrix product when assigning vectors to lists
+
+
+def embeddings_dir(output_name):
+    return f'{output_name}_embeddings'
+
+
+def index_dir(output_name):
+    return f'{output_name}_similar'
+
+
+# === Embeddings ===
+
+def normalize_rows(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    np.divide(vectors, norms, out=vectors, where=norms > 0)
+    return vectors
+
+
+def fit_projection(X, dims=DIMS, seed=42):
+    """``(n_features, dims)`` float32 TruncatedSVD basis of the TF-IDF rows ``X``."""
+    from sklearn.decomposition import TruncatedSVD
+
+    dims = max(1, min(dims, X.shape[1] - 1, X.shape[0] - 1))
+    svd = TruncatedSVD(n_components=dims, algorithm='randomized', random_state=seed).fit(X)
+    return np.ascontiguousarray(svd.components_.T, dtype=np.float32)
+
+
+def project(X, projection):
+    """L2-normalized float32 embeddings of the TF-IDF rows ``X``."""
+    return normalize_rows(np.asarray(X @ projection, dtype=np.float32))
+
+
+def load_projection(directory, fingerprint, dims):
+    """The basis of the saved embeddings if made by the same model with ``dims`` dimensions, else None."""
+    try:
+        with open(os.path.join(directory, 'meta.json')) as f:
+            meta = json.load(f)
+        if meta['fingerprint'] != fingerprint or meta['requested_dims'] != dims:
+            return None
+        return np.load(os.path.join(directory, 'projection.npy'))
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def start_embeddings(directory, projection):
+    """Fresh '<directory>.tmp' holding the basis; workers save 'part-<i>.npy' there."""
+    tmp = directory + '.tmp'
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    np.save(os.path.join(tmp, 'projection.npy'), projection)
+    return tmp
+
+
+def save_part(directory, index, vectors):
+    np.save(os.path.join(directory, f'part-{index:05d}.npy'), vectors)
+
+
+def finish_embeddings(directory, fingerprint, dims):
+    """Write the meta of a complete '<directory>.tmp' and move it in place of the old embeddings."""
+    tmp = directory + '.tmp'
+    parts = sorted(glob.glob(os.path.join(tmp, 'part-*.npy')))
+    rows = [len(np.load(part, mmap_mode='r')) for part in parts]
+    projection = np.load(os.path.join(tmp, 'projection.npy'), mmap_mode='r')
+    meta = {'fingerprint': fingerprint, 'requested_dims': dims, 'dims': projection.shape[1],
+            'rows': sum(rows), 'parts': [os.path.basename(part) for part in parts], 'part_rows': rows}
+    with open(os.path.join(tmp, 'meta.json'), 'w') as f:
+        json.dump(meta, f, indent=1)
+    shutil.rmtree(directory, ignore_errors=True)
+    os.replace(tmp, directory)
+    return meta
+
+
+# === IVF index ===
+
+def _nearest(vectors, centroids):
+    assign = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), BLOCK):
+        assign[start:start + BLOCK] = (vectors[start:start + BLOCK] @ centroids.T).argmax(axis=1)
+    return assign
+
+
+def train_lists(vectors, nlist, iterations=KMEANS_ITERATIONS, seed=0):
+    """``(nlist, dims)`` unit centroids: spherical k-means on a sample of ``vectors``."""
+    import scipy.sparse as sp
+
+    rng = np.random.default_rng(seed)
+    train = vectors[np.sort(rng.choice(len(vectors), min(len(vectors), nlist * TRAIN_PER_LIST), replace=False))]
+    centroids = train[rng.choice(len(train), nlist, replace=False)].copy()
+    for _ in range(iterations):
+        assign = _nearest(train, centroids)
+        # per-list sums as one sparse (lists x rows) product
+        members = sp.csr_matrix((np.ones(len(train), dtype=np.float32), (assign, np.arange(len(train)))),
+                                shape=(nlist, len(train)))
+        sums = np.asarray(members @ train, dtype=np.float32)
+        empty = np.bincount(assign, minlength=nlist) == 0
+        sums[empty] = centroids[empty]
+        centroids = normalize_rows(sums)
+    return centroids
+
+
+def build_bucket_index(directory, vectors, ids, rows, nlist=None):
+    """IVF index of one bucket's ``vectors`` (product ``ids``, dataset ``rows``) in ``directory``."""
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    nlist = min(nlist or max(1, int(round(np.sqrt(len(vectors))))), len(vectors))
+    centroids = train_lists(vectors, nlist)
+    assign = _nearest(vectors, centroids)
+    order = np.argsort(assign, kind='stable')
+    offsets = np.zeros(nlist + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(np.bincount(assign, minlength=nlist))
+
+    ids = np.asarray(ids)
+    if ids.dtype.kind not in 'iu':
+        ids = ids.astype(str)
+    ids = ids[order]
+    os.makedirs(directory, exist_ok=True)
+    np.save(os.path.join(directory, 'centroids.npy'), centroids)
+    np.save(os.path.join(directory, 'offsets.npy'), offsets)
+    np.save(os.path.join(directory, 'vectors.npy'), vectors[order])
+    np.save(os.path.join(directory, 'ids.npy'), ids)
+    np.save(os.path.join(directory, 'id_order.npy'), np.argsort(ids, kind='stable'))
+    np.save(os.path.join(directory, 'rows.npy'), np.asarray(rows, dtype=np.int64)[order])
+    return nlist
+
+
+def _slug(bucket, n):
+    return f"{n:02d}-{re.sub(r'[^a-z0-9]+', '_', str(bucket).lower()).strip('_')}"
+
+
+def build_index(output_name=OUTPUT, nlist=None):
+    """Per-bucket IVF indexes of a predict run's embeddings, in '<output>_similar/'."""
+    source = embeddings_dir(output_name)
+    with open(os.path.join(source, 'meta.json')) as f:
+        meta = json.load(f)
+    labels = storage.read_frame(output_name, columns=[ID_COLUMN, LABEL_COLUMN])
+    if len(labels) != meta['rows']:
+        raise ValueError(f"'{source}' has {meta['rows']} rows but '{output_name}' has {len(labels)} — "
+                         f"rerun predict_bucket.py --embeddings")
+    buckets = labels[LABEL_COLUMN].astype(object).to_numpy()
+    ids = labels[ID_COLUMN].to_numpy()
+    parts = [np.load(os.path.join(source, part), mmap_mode='r') for part in meta['parts']]
+    offsets = np.concatenate([[0], np.cumsum(meta['part_rows'])])
+
+    target = index_dir(output_name)
+    tmp = target + '.tmp'
+    shutil.rmtree(tmp, ignore_errors=True)
+    index = {'dims': meta['dims'], 'fingerprint': meta['fingerprint'], 'buckets': {}}
+    for n, bucket in enumerate(sorted(set(buckets), key=str)):
+        start = time.perf_counter()
+        rows = np.flatnonzero(buckets == bucket)
+        # one bucket in memory at a time, gathered from the memory-mapped parts
+        vectors = np.concatenate([parts[p][rows[(rows >= offsets[p]) & (rows < offsets[p + 1])] - offsets[p]]
+                                  for p in range(len(parts))])
+        lists = build_bucket_index(os.path.join(tmp, _slug(bucket, n)), vectors, ids[rows], rows, nlist)
+        index['buckets'][str(bucket)] = {'dir': _slug(bucket, n), 'rows': len(rows), 'lists': lists}
+        print(f"✅ {str(bucket):25s}: {len(rows):>9d} products in {lists} lists "
+              f"({time.perf_counter() - start:.1f}s)")
+    os.makedirs(tmp, exist_ok=True)
+    with open(os.path.join(tmp, 'index.json'), 'w') as f:
+        json.dump(index, f, indent=1)
+    shutil.rmtree(target, ignore_errors=True)
+    os.replace(tmp, target)
+    return target
+
+
+# === Queries ===
+
+class BucketIndex:
+    """One bucket's IVF index; arrays are memory-mapped."""
+
+    def __init__(self, directory):
+        load = lambda name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode='r')
+        self.centroids = np.asarray(load('centroids'))
+        self.offsets = np.asarray(load('offsets'))
+        self.vectors = load('vectors')
+        self.ids = load('ids')
+        self.rows = load('rows')
+        self._id_order = load('id_order')
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def position(self, product_id):
+        """Position of ``product_id`` in this index, or None (also for an ID that cannot be one)."""
+        if self.ids.dtype.kind in 'iu':
+            try:
+                key = int(product_id)
+            except (TypeError, ValueError):
+                return None
+        else:
+            key = str(product_id)
+        i = np.searchsorted(self.ids, key, sorter=self._id_order)
+        if i < len(self.ids) and self.ids[self._id_order[i]] == key:
+            return int(self._id_order[i])
+        return None
+
+    @property
+    def default_nprobe(self):
+        """Lists a query scans unless told otherwise: ``NPROBE_FRACTION`` of them, at least ``MIN_NPROBE``."""
+        return min(len(self.centroids), max(MIN_NPROBE, int(np.ceil(NPROBE_FRACTION * len(self.centroids)))))
+
+    def search(self, queries, k=10, nprobe=None):
+        """``(positions, scores)``, each ``(n_queries, k)``, best first; padded with -1 / -inf."""
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        nprobe = min(nprobe or self.default_nprobe, len(self.centroids))
+        probes = np.argpartition(-(queries @ self.centroids.T), nprobe - 1, axis=1)[:, :nprobe]
+        positions = np.full((len(queries), k), -1, dtype=np.int64)
+        scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        for q, (query, lists) in enumerate(zip(queries, probes)):
+            spans = [(self.offsets[l], self.offsets[l + 1]) for l in lists]
+            candidates = np.concatenate([np.arange(a, b) for a, b in spans])
+            found = _top_k(np.concatenate([self.vectors[a:b] for a, b in spans]) @ query, k)
+            positions[q, :len(found[0])] = candidates[found[0]]
+            scores[q, :len(found[0])] = found[1]
+        return positions, scores
+
+    def exact(self, queries, k=10):
+        """Brute-force ``(positions, scores)`` over the whole bucket, for recall checks."""
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        positions = np.full((len(queries), k), -1, dtype=np.int64)
+        scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        for q, query in enumerate(queries):
+            found = _top_k(self.vectors @ query, k)
+            positions[q, :len(found[0])], scores[q, :len(found[0])] = found
+        return positions, scores
+
+
+def _top_k(scores, k):
+    k = min(k, len(scores))
+    if not k:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+    best = np.argpartition(-scores, k - 1)[:k]
+    best = best[np.argsort(-scores[best], kind='stable')]
+    return best, scores[best]
+
+
+class SimilarProducts:
+    """Similar-product lookups over the per-bucket indexes of ``build_index``."""
+
+    def __init__(self, directory=index_dir(OUTPUT)):
+        self.directory = directory
+        with open(os.path.join(directory, 'index.json')) as f:
+            self.meta = json.load(f)
+        self._indexes = {}
+
+    @property
+    def buckets(self):
+        return list(self.meta['buckets'])
+
+    def bucket(self, name):
+        if name not in self._indexes:
+            self._indexes[name] = BucketIndex(os.path.join(self.directory, self.meta['buckets'][name]['dir']))
+        return self._indexes[name]
+
+    def locate(self, product_id):
+        """``(bucket, position)`` of a product, or ``(None, None)``."""
+        for name in self.buckets:
+            position = self.bucket(name).position(product_id)
+            if position is not None:
+                return name, position
+        return None, None
+
+    def similar(self, product_id, k=10, nprobe=None):
+        """Up to ``k`` ``(product_id, cosine)`` pairs from the product's bucket, most similar first."""
+        bucket, position = self.locate(product_id)
+        if bucket is None:
+            raise KeyError(product_id)
+        index = self.bucket(bucket)
+        positions, scores = index.search(index.vectors[position], k + 1, nprobe)
+        return [(index.ids[p].item(), float(s)) for p, s in zip(positions[0], scores[0])
+                if p >= 0 and p != position][:k]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Similar products within a bucket (SVD embeddings + IVF index)')
+    sub = parser.add_subparsers(dest='command', required=True)
+    build = sub.add_parser('build', help='build the per-bucket indexes from predict_bucket.py --embeddings')
+    build.add_argument('--output', default=OUTPUT, help='predict output dataset the embeddings belong to')
+    build.add_argument('--nlist', type=int, help='lists per bucket (default: sqrt of the bucket size)')
+    query = sub.add_parser('query', help='most similar products in the same bucket')
+    query.add_argument('product_id')
+    query.add_argument('--output', default=OUTPUT)
+    query.add_argument('-k', type=int, default=10)
+    query.add_argument('--nprobe', type=int, help=f'lists scanned per query (recall vs latency; default: '
+                                                  f'{NPROBE_FRACTION:.1%} of the bucket\'s lists, at least {MIN_NPROBE})')
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        start = time.perf_counter()
+        target = build_index(args.output, args.nlist)
+        print(f"\n💾 Similar-product index saved to '{target}' ({time.perf_counter() - start:.1f}s)")
+        return
+
+    index = SimilarProducts(index_dir(args.output))
+    start = time.perf_counter()
+    try:
+        results = index.similar(args.product_id, args.k, args.nprobe)
+    except KeyError:
+        sys.exit(f"❌ Product '{args.product_id}' is not in the index")
+    bucket, _ = index.locate(args.product_id)
+    print(f"🔎 {len(results)} products similar to {args.product_id} in '{bucket}' "
+          f"({(time.perf_counter() - start) * 1000:.1f} ms):")
+    for product_id, score in results:
+        print(f"➡️  {product_id}: {score:.3f}")
+
+
+if __name__ == '__main__':
+    main()
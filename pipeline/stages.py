@@ -0,0 +1,597 @@
+import os
+import shutil
+import time
+from contextlib import nullcontext
+
+import numpy as np
+import pandas as pd
+
+from pipeline import cleaning, delta, fast_inference, metrics, model_artifact, near_duplicates, similar, storage
+from pipeline.chunk_pool import BackgroundWriter, map_chunks, merge_counts, prefetch
+from pipeline.config import dataset, model_paths
+from pipeline.keyword_matcher import KeywordMatcher, build_texts
+from pipeline.prediction_cache import PredictionCache, file_fingerprint, normalizer_for, report
+from pipeline.rule_engine import DERIVED_COLUMNS, RuleSet, joined_text
+
+# The four pipeline stages, driven by a marketplace config (pipeline.config):
+#
+#   clean    raw CSV                -> <clean.output>
+#   bucket   <clean.output>         -> <bucket.output> (+ <bucket.seed.output>)
+#   train    <train.input>          -> model pickles (+ bucket_model/ artifact)
+#   predict  <clean.output> + model -> <predict.output>
+#
+# Every stage streams its input in ``chunksize`` chunks; bucket and predict
+# label chunks on ``workers`` processes, with up to ``inflight`` chunks read
+# ahead and waiting to be written on background threads. stage_io() tells the runner what a
+# stage reads and writes so it can skip stages whose inputs did not change.
+#
+# The marketplace scripts (scripts_*/bucketing.py, predict_bucket.py,
+# training_model_amazon.py) are thin CLIs over bucket / predict / train; their
+# --delta, --dedupe, --shard, --cache, --embeddings and --metrics options map to
+# the keyword arguments below. The runner calls the stages without them.
+
+
+def model_texts(chunk, columns):
+    """``col1 col2 ...`` with missing values as ``''``, as the models were trained on."""
+    text = chunk[columns[0]].fillna('')
+    for column in columns[1:]:
+        text = text + ' ' + chunk[column].fillna('')
+    return text
+
+
+def stage_io(config, stage):
+    """``(inputs, outputs)`` of ``stage``: dataset names (no extension) and files."""
+    cleaned = dataset(config, config['clean']['output'])
+    _, model_path, vectorizer_path = model_paths(config)
+    if stage == 'clean':
+        return [config['clean']['input']], [cleaned]
+    if stage == 'bucket':
+        outputs = [dataset(config, config['bucket']['output'])]
+        if scored_column(config['bucket']):
+            outputs.append(f"{outputs[0]}_scores")
+        if 'seed' in config['bucket']:
+            outputs.append(dataset(config, config['bucket']['seed']['output']))
+        return [cleaned], outputs
+    if stage == 'train':
+        return [dataset(config, config['train']['input'])], [model_path, vectorizer_path]
+    if stage == 'predict':
+        return [cleaned, model_path, vectorizer_path], [dataset(config, config['predict']['output'])]
+    raise ValueError(f"Unknown stage '{stage}'")
+
+
+def _total_chunks(name, chunksize):
+    total, exact = storage.dataset_chunks(name, chunksize)
+    return f"{total}" if exact else f"~{total}"
+
+
+def _read_chunks(config, name, arrow_strings=False, **kwargs):
+    """``chunksize`` chunks of ``name``, the text columns as Arrow strings with ``arrow_strings``."""
+    return storage.read_chunks(name, chunksize=config['chunksize'], encoding='utf-8',
+                               text_columns=config['text_columns'] if arrow_strings else (), **kwargs)
+
+
+def _shard_name(name, shard):
+    return shard.name(name) if shard is not None else name
+
+
+def _shard_range(cleaned, output, chunksize, shard, total_chunks):
+    """``(first chunk, stop chunk, output name)`` of ``shard`` (pipeline.shards), or of the whole input."""
+    if shard is None:
+        return 0, None, output
+    first_chunk, stop_chunk = shard.chunk_range(cleaned, chunksize)
+    print(f"🧩 Shard {shard}: chunks {first_chunk + 1}-{stop_chunk} of {total_chunks}")
+    return first_chunk, stop_chunk, shard.name(output)
+
+
+# === clean ===
+
+def clean(config, fmt, workers=1, inflight=2):
+    settings = cleaning.settings_from_config(config)
+    stats = cleaning.clean_stream(settings, drop_empty=config['clean'].get('drop_empty', False), fmt=fmt,
+                                  chunksize=config['chunksize'])
+    stats.report(settings['detail_columns'])
+    return {'rows_read': stats.rows_read, 'rows_written': stats.rows_written}
+
+
+# === bucket (runs in worker processes with workers > 1) ===
+_bucket = None
+_labelers = None
+_scored = None
+_text_columns = None
+_id_column = None
+_output_format = None
+_metrics = None
+
+def labelers(bucket_config):
+    """``{label column: (kind, labeler)}``: a KeywordMatcher or a RuleSet per column."""
+    keyword_sets = bucket_config.get('keyword_sets', {})
+    result = {}
+    for column, spec in bucket_config['labels'].items():
+        if 'keywords' in spec:
+            result[column] = ('keywords', KeywordMatcher(spec['keywords'], spec.get('fallback', 'Uncategorized')))
+        else:
+            result[column] = ('rules', RuleSet(spec['rules'], spec['default'], keyword_sets))
+    return result
+
+def scored_column(bucket_config):
+    """The label column whose keyword hit counts are kept ('<output>_scores' and the delta
+    state): the only label column, if it is keyword-matched; else None."""
+    (column, spec), *others = bucket_config['labels'].items()
+    return column if not others and 'keywords' in spec else None
+
+def init_bucket_worker(bucket_config, text_columns, id_column, output_format, metrics_args=('bucket', False)):
+    global _bucket, _labelers, _scored, _text_columns, _id_column, _output_format, _metrics
+    _bucket = bucket_config
+    _labelers = labelers(bucket_config)
+    _scored = scored_column(bucket_config)
+    _text_columns = text_columns
+    _id_column = id_column
+    _output_format = output_format
+    _metrics = metrics.Metrics(*metrics_args)
+
+def bucket_chunk(i, chunk):
+    with _metrics.profile(i):
+        # with delta_mode / dedupe only new or changed rows are labeled, the rest keep
+        # the label (and keyword scores) stored or fanned out with them
+        with _metrics.timer('delta'):
+            scores = (delta.detach_values(chunk, len(_labelers[_scored][1].buckets), np.int16)
+                      if _scored is not None else None)
+            chunk, hashes, previous, todo = delta.detach(chunk)
+        if _metrics.enabled:
+            with _metrics.timer('memory'):
+                _metrics.count('chunk_bytes', storage.frame_bytes(chunk))
+                _metrics.count('chunk_bytes_as_object', storage.object_frame_bytes(chunk))
+        for column in _bucket.get('derived', []):
+            chunk[column] = DERIVED_COLUMNS[column](chunk)
+        rows = chunk if todo.all() else chunk[todo]
+
+        # keyword matching sees the bucketing scripts' str(value) text, rules the
+        # joined text with missing values as ''
+        texts = {}
+        for column, (kind, labeler) in _labelers.items():
+            if kind not in texts:
+                with _metrics.timer('concat'):
+                    texts[kind] = (build_texts(rows, _text_columns) if kind == 'keywords'
+                                   else joined_text(rows, _text_columns))
+            labels = previous.copy()
+            with _metrics.timer('match'):
+                if kind == 'keywords':
+                    hits = labeler.score_matrix(texts[kind])
+                    labels[todo] = labeler.label_scores(hits)
+                    if column == _scored:
+                        scores[todo] = hits
+                elif len(rows):
+                    labels[todo] = labeler.label(rows, texts[kind])
+            # a handful of distinct labels: codes instead of one pointer per row
+            chunk[column] = pd.Categorical(labels)
+        _metrics.count('matched', len(rows))
+
+        with _metrics.timer('summarize'):
+            counts = {column: chunk[column].value_counts().to_dict() for column in _labelers}
+            seed = None
+            if 'seed' in _bucket:
+                spec = _bucket['seed']
+                seed = chunk[~chunk[spec['label_column']].isin(spec['exclude'])]
+            score_frame = pd.DataFrame(scores, columns=_labelers[_scored][1].buckets) if scores is not None else None
+            # the delta state keeps the (only) label column, with its keyword scores
+            state_rows = (chunk[_id_column].to_numpy(), hashes, labels, score_frame) if _id_column else None
+        with _metrics.timer('encode'):
+            part = storage.encode_part(chunk, _output_format, i)
+            score_part = None
+            if score_frame is not None:
+                score_frame = score_frame.copy()
+                if _id_column:
+                    score_frame.insert(0, _id_column, chunk[_id_column].to_numpy())
+                score_part = storage.encode_part(score_frame, _output_format, i)
+    return part, score_part, seed, counts, state_rows, _metrics.take()
+
+def score_representatives(i, chunk):
+    # dedupe: only the first product of every near-duplicate cluster comes here
+    return _labelers[_scored][1].score_matrix(build_texts(chunk, _text_columns))
+
+def bucket(config, fmt, workers=1, inflight=2, delta_mode=False, dedupe=False, shard=None, stage_metrics=None,
+           arrow_strings=False):
+    """Label the cleaned data with the config's keyword dicts / rules.
+
+    ``delta_mode`` labels only rows that are new or changed since the last
+    run (by ``id_column`` and row content) and ``dedupe`` one product per
+    near-duplicate cluster; both need a single label column, dedupe a
+    keyword-matched one. A ``shard`` (pipeline.shards) labels its range of
+    chunks into '<output>-shard<k>of<N>'. ``arrow_strings`` reads the text
+    columns as Arrow strings (faster keyword matching, slower rules).
+    """
+    spec = config['bucket']
+    cleaned = dataset(config, config['clean']['output'])
+    output = dataset(config, spec['output'])
+    chunksize = config['chunksize']
+    text_columns = config['text_columns']
+    # the delta state holds one label per product
+    id_column = config.get('id_column') if len(spec['labels']) == 1 else None
+    scored = scored_column(spec)
+    if delta_mode and id_column is None:
+        raise ValueError(f"delta mode needs an id_column and a single label column ({config['name']} bucket)")
+    if dedupe and scored is None:
+        raise ValueError(f"dedupe needs a single keyword-matched label column ({config['name']} bucket)")
+    stage_metrics = stage_metrics or metrics.Metrics(f"{config['name']}_bucketing", enabled=False)
+    total_chunks = _total_chunks(cleaned, chunksize)
+    first_chunk, stop_chunk, target = _shard_range(cleaned, output, chunksize, shard, total_chunks)
+    print(f"📦 Total chunks to process: {total_chunks}")
+
+    # labels of the last run keyed on the ID (invalidated when the keywords or rules change)
+    fingerprint = delta.fingerprint_of({key: spec[key] for key in ('labels', 'keyword_sets', 'derived') if key in spec})
+    buckets = labelers(spec)[scored][1].buckets if scored else ()
+    state = delta.DeltaState.load(output, id_column, fingerprint, carry=buckets) if delta_mode else None
+    if delta_mode and state is None:
+        print("⚠️  No usable state from a previous run — labeling every product")
+    state_writer = delta.StateWriter(target, id_column, fingerprint, fmt) if id_column else None
+
+    # chunks are parsed on a reader thread, ``inflight`` ahead of the labeling loop
+    chunks = prefetch(stage_metrics.timed('read', _read_chunks(config, cleaned, arrow_strings, start_chunk=first_chunk,
+                                                               stop_chunk=stop_chunk)), inflight)
+    chunks = delta.annotate(stage_metrics.timed('read_wait', chunks), state)
+    initargs = (spec, text_columns, id_column, fmt, stage_metrics.worker_args())
+    if dedupe:
+        # score cluster representatives first; the main pass then only copies labels and scores
+        clusters = near_duplicates.load_or_build(cleaned, text_columns, chunksize)
+        scores = near_duplicates.representative_labels(
+            _read_chunks(config, cleaned, arrow_strings, columns=text_columns), clusters,
+            score_representatives, map_chunks, shape=(len(buckets),), dtype=np.int16,
+            workers=workers, initializer=init_bucket_worker, initargs=initargs)
+        chunks = near_duplicates.prefill(chunks, labelers(spec)[scored][1].label_scores(scores), scores)
+    results = map_chunks(bucket_chunk, chunks, workers=workers, initializer=init_bucket_worker, initargs=initargs)
+
+    totals = {column: {} for column in spec['labels']}
+    seed_writer = (storage.DatasetWriter(_shard_name(dataset(config, spec['seed']['output']), shard), fmt)
+                   if 'seed' in spec else nullcontext())
+    # keyword hit counts (products x buckets) for relabel_buckets.py
+    scores_writer = storage.DatasetWriter(f'{target}_scores', fmt) if scored else nullcontext()
+    with storage.DatasetWriter(target, fmt) as out, seed_writer as seed_out, scores_writer as scores_out:
+
+        def write(item):
+            i, part, score_part, seed, state_rows, snapshot = item
+            with stage_metrics.timer('write'):
+                out.write_part(part)
+                if score_part is not None:
+                    scores_out.write_part(score_part)
+                if seed is not None and (len(seed) or seed_out.parts == 0):
+                    seed_out.write(seed)
+                if state_rows is not None:
+                    state_writer.write(*state_rows)
+            stage_metrics.chunk_done(i, part.rows, snapshot)
+
+        with BackgroundWriter(write, inflight) as writer:
+            for i, (part, score_part, seed, counts, state_rows, snapshot) in enumerate(results):
+                writer.submit((i, part, score_part, seed, state_rows, snapshot))
+                for column, column_counts in counts.items():
+                    merge_counts(totals[column], column_counts)
+                print(f"✅ Chunk {first_chunk + i + 1}/{total_chunks} labeled")
+        rows = out.rows
+
+    if state_writer is not None:
+        state_writer.close()
+    if state is not None:
+        state.report()
+    stage_metrics.close()
+    for column, counts in totals.items():
+        print(f"\n📦 Product Counts by {column}:")
+        for label, count in sorted(counts.items(), key=lambda x: -x[1]):
+            print(f"➡️  {label:25s}: {count}")
+    summary = {'rows': rows, 'counts': totals}
+    if 'seed' in spec:
+        summary['seed_rows'] = seed_out.rows
+    return summary
+
+
+# === train ===
+
+def make_classifier(spec):
+    params = dict(spec)
+    kind = params.pop('type')
+    if kind == 'logistic_regression':
+        from sklearn.linear_model import LogisticRegression
+        return LogisticRegression(**params)
+    if kind == 'sgd':
+        from sklearn.linear_model import SGDClassifier
+        return SGDClassifier(**params)
+    if kind == 'linear_svc':
+        from sklearn.svm import LinearSVC
+        return LinearSVC(**params)
+    if kind == 'complement_nb':
+        from sklearn.naive_bayes import ComplementNB
+        return ComplementNB(**params)
+    if kind == 'random_forest':
+        from sklearn.ensemble import RandomForestClassifier
+        return RandomForestClassifier(**params)
+    raise ValueError(f"Unknown model type '{kind}'")
+
+
+def make_vectorizer(spec):
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    params = dict(spec)
+    if 'ngram_range' in params:
+        params['ngram_range'] = tuple(params['ngram_range'])
+    return TfidfVectorizer(**params)
+
+
+def training_split(config):
+    """``(X_train, X_test, y_train, y_test)`` texts and labels from the train section."""
+    from sklearn.model_selection import train_test_split
+
+    spec = config['train']
+    label_column = spec['label_column']
+    text_columns = config['text_columns']
+    data_path = dataset(config, spec['input'])
+
+    # Labeled rows, one chunk in memory at a time until the final concat
+    frames = []
+    for chunk in storage.read_chunks(data_path, columns=text_columns + [label_column],
+                                     chunksize=config['chunksize']):
+        chunk = chunk[chunk[label_column].notna() & ~chunk[label_column].isin(spec.get('exclude', []))]
+        frames.append(pd.DataFrame({'text': model_texts(chunk, text_columns), 'label': chunk[label_column]}))
+    df = pd.concat(frames, ignore_index=True)
+    random_state = spec.get('random_state', 42)
+    if spec.get('sample') and len(df) > spec['sample']:
+        print(f"📉 Sampling from {len(df)} to {spec['sample']} rows for faster training")
+        df = df.sample(n=spec['sample'], random_state=random_state)
+
+    return train_test_split(df['text'], df['label'], test_size=spec.get('test_size', 0.2),
+                            random_state=random_state, stratify=df['label'])
+
+
+def train(config, fmt=None, workers=1, inflight=2):
+    from sklearn.metrics import accuracy_score, classification_report
+
+    spec = config['train']
+    X_train, X_test, y_train, y_test = training_split(config)
+
+    print("🔄 Fitting vectorizer...")
+    vectorizer = make_vectorizer(spec.get('vectorizer', {}))
+    X_train_vec = vectorizer.fit_transform(X_train)
+    X_test_vec = vectorizer.transform(X_test)
+
+    print(f"⚡ Training {spec['model']['type']} model...")
+    clf = make_classifier(spec['model'])
+    start = time.time()
+    clf.fit(X_train_vec, y_train)
+    print(f"✅ Training completed in {time.time() - start:.2f} seconds.")
+
+    y_pred = clf.predict(X_test_vec)
+    print("\n=== Classification Report ===")
+    print(classification_report(y_test, y_pred))
+
+    save_model(config, clf, vectorizer)
+    return {'rows': len(X_train) + len(X_test), 'accuracy': float(accuracy_score(y_test, y_pred))}
+
+
+def save_model(config, clf, vectorizer):
+    """Pickles into the model dir, plus the bucket_model/ artifact for linear models."""
+    import joblib
+
+    artifact_path, model_path, vectorizer_path = model_paths(config)
+    os.makedirs(config['model_dir'], exist_ok=True)
+    joblib.dump(clf, model_path)
+    joblib.dump(vectorizer, vectorizer_path)
+    if hasattr(clf, 'coef_') and hasattr(clf, 'decision_function'):
+        model_artifact.export(clf, vectorizer, artifact_path, config['train'].get('weights', 'float64'))
+    else:
+        # an artifact from an earlier linear model would shadow the new pickles
+        shutil.rmtree(artifact_path, ignore_errors=True)
+    print(f"✅ Model and vectorizer saved to '{config['model_dir']}'")
+
+
+# === predict (runs in worker processes with workers > 1) ===
+_predict = None
+_transform = None
+_predict_matrix = None
+_label_column = None
+_cache = None
+_embeddings = None
+_projection = None
+
+def init_predict_worker(model_files, text_columns, label_column, id_column, output_format,
+                        metrics_args=('predict', False), cache_path=None, fingerprint=None, embeddings_path=None):
+    global _predict, _transform, _predict_matrix, _text_columns, _label_column, _id_column, _output_format, \
+        _metrics, _cache, _embeddings, _projection
+    _metrics = metrics.Metrics(*metrics_args)
+    # the artifact is memory-mapped, so all workers share one copy of the weights
+    clf, vectorizer, _ = model_artifact.load_model(*model_files)
+    # with metrics, vectorizer transform and model call are timed separately
+    _transform, _predict_matrix = fast_inference.pipeline_fns(clf, vectorizer)
+    _predict = fast_inference.compose(_transform, _predict_matrix, _metrics)
+    _text_columns = text_columns
+    _label_column = label_column
+    _id_column = id_column
+    _output_format = output_format
+    _cache = (PredictionCache(cache_path, fingerprint, normalize=normalizer_for(vectorizer))
+              if cache_path is not None else None)
+    _embeddings = embeddings_path
+    _projection = (np.load(os.path.join(embeddings_path, 'projection.npy'), mmap_mode='r')
+                   if embeddings_path is not None else None)
+
+def predict_texts(texts):
+    return _predict(list(texts))
+
+def predict_chunk(i, chunk):
+    with _metrics.profile(i):
+        with _metrics.timer('delta'):
+            chunk, hashes, labels, todo = delta.detach(chunk)
+        if _metrics.enabled:
+            with _metrics.timer('memory'):
+                _metrics.count('chunk_bytes', storage.frame_bytes(chunk))
+                _metrics.count('chunk_bytes_as_object', storage.object_frame_bytes(chunk))
+        with _metrics.timer('concat'):
+            # joined in Arrow for Arrow string columns; kept out of the chunk, so never written
+            text = model_texts(chunk, _text_columns)
+
+        # with delta_mode only new/changed rows are scored, the rest keep their label
+        # (transform/predict are timed inside predict_texts, cache lookups are the rest)
+        texts = text[todo]
+        X = None
+        if _embeddings is not None:
+            # embeddings: every row is vectorized once, for its embedding and its label
+            # (with the cache, the misses' rows of the same matrix are scored)
+            with _metrics.timer('transform'):
+                X = _transform(text.tolist())
+        hits = misses = 0
+        if _cache is not None:
+            before = (_cache.hits, _cache.misses)
+            if X is not None:
+                todo_rows = np.flatnonzero(todo)
+
+                def predict_rows(rows):
+                    with _metrics.timer('predict'):
+                        return _predict_matrix(X[todo_rows[rows]])
+
+                labels[todo] = _cache.predict(texts.tolist(), predict_rows, by_row=True)
+            else:
+                labels[todo] = _cache.predict(texts.tolist(), predict_texts)
+            hits, misses = _cache.hits - before[0], _cache.misses - before[1]
+        elif X is not None:
+            if todo.any():
+                with _metrics.timer('predict'):
+                    labels[todo] = _predict_matrix(X[todo])
+        elif len(texts):
+            labels[todo] = predict_texts(texts)
+        if X is not None:
+            with _metrics.timer('embed'):
+                similar.save_part(_embeddings, i, similar.project(X, _projection))
+        _metrics.count('cache_hits', hits)
+        _metrics.count('cache_misses', misses)
+        with _metrics.timer('summarize'):
+            chunk[_label_column] = pd.Categorical(labels)
+            counts = chunk[_label_column].value_counts().to_dict()
+            state_rows = (chunk[_id_column].to_numpy(), hashes, labels) if _id_column else None
+        with _metrics.timer('encode'):
+            part = storage.encode_part(chunk, _output_format, i)
+    return part, counts, hits, misses, state_rows, _metrics.take()
+
+def predict_representatives(i, chunk):
+    # dedupe: only the first product of every near-duplicate cluster comes here
+    texts = model_texts(chunk, _text_columns).tolist()
+    if not texts:
+        return []
+    return _cache.predict(texts, predict_texts) if _cache is not None else predict_texts(texts)
+
+def predict(config, fmt, workers=1, inflight=2, artifact=None, cache=None, cache_max_entries=5_000_000,
+            delta_mode=False, dedupe=False, shard=None, embeddings=False, svd_dims=similar.DIMS,
+            svd_sample=similar.SVD_SAMPLE, stage_metrics=None, arrow_strings=False):
+    """Label the cleaned data with the trained model.
+
+    ``artifact`` overrides the model dir's bucket_model/ (the pickles are
+    used when it is missing); ``cache`` is the path of a persistent
+    prediction cache (pipeline.prediction_cache). ``delta_mode``, ``dedupe``
+    and ``shard`` work as in ``bucket``; ``embeddings`` also saves
+    ``svd_dims`` TruncatedSVD embeddings of the TF-IDF vectors for
+    pipeline.similar.
+    """
+    spec = config['predict']
+    cleaned = dataset(config, config['clean']['output'])
+    output = dataset(config, spec['output'])
+    chunksize = config['chunksize']
+    id_column = config.get('id_column')
+    if delta_mode and id_column is None:
+        raise ValueError(f"delta mode needs an id_column ({config['name']} predict)")
+    stage_metrics = stage_metrics or metrics.Metrics(f"{config['name']}_predict", enabled=False)
+
+    default_artifact, model_path, vectorizer_path = model_paths(config)
+    artifact = artifact or default_artifact
+    model_files = (model_artifact.artifact_files(artifact) if os.path.isdir(artifact)
+                   else [model_path, vectorizer_path])
+    print(f"🤖 Model: {artifact if os.path.isdir(artifact) else model_path}")
+
+    total_chunks = _total_chunks(cleaned, chunksize)
+    first_chunk, stop_chunk, target = _shard_range(cleaned, output, chunksize, shard, total_chunks)
+    print(f"📦 Total chunks to process: {total_chunks}")
+
+    # cache and delta state are invalidated automatically when the model files change
+    fingerprint = file_fingerprint(*model_files)
+    prediction_cache = None
+    cache_args = (None, None)
+    if cache is not None:
+        cache = _shard_name(cache, shard)  # a shard keeps a cache file of its own
+        prediction_cache = PredictionCache(cache, fingerprint, max_entries=cache_max_entries)
+        prediction_cache.start_run()
+        cache_args = (cache, fingerprint)
+
+    state = delta.DeltaState.load(output, id_column, fingerprint) if delta_mode else None
+    if delta_mode and state is None:
+        print("⚠️  No usable state from a previous run — scoring every product")
+    state_writer = delta.StateWriter(target, id_column, fingerprint, fmt) if id_column else None
+
+    # chunks are parsed on a reader thread, ``inflight`` ahead of the scoring loop
+    chunks = prefetch(stage_metrics.timed('read', _read_chunks(config, cleaned, arrow_strings, start_chunk=first_chunk,
+                                                               stop_chunk=stop_chunk)), inflight)
+    chunks = delta.annotate(stage_metrics.timed('read_wait', chunks), state)
+    # embeddings: SVD basis of the TF-IDF space, fitted on the first rows (kept while the model is unchanged)
+    embeddings_path = None
+    if embeddings:
+        embeddings_dir = similar.embeddings_dir(output)
+        projection = similar.load_projection(embeddings_dir, fingerprint, svd_dims)
+        if projection is None:
+            print(f"🧮 Fitting a {svd_dims}-dimensional TruncatedSVD on the first {svd_sample} products...")
+            clf, vectorizer, _ = model_artifact.load_model(artifact, model_path, vectorizer_path)
+            transform, _ = fast_inference.pipeline_fns(clf, vectorizer)
+            sample = next(storage.read_chunks(cleaned, columns=config['text_columns'], chunksize=svd_sample,
+                                              encoding='utf-8'), None)
+            if sample is None:
+                raise ValueError(f"No products in '{cleaned}'")
+            projection = similar.fit_projection(transform(model_texts(sample, config['text_columns']).tolist()),
+                                                svd_dims)
+        embeddings_path = similar.start_embeddings(embeddings_dir, projection)
+    initargs = (((artifact, model_path, vectorizer_path), config['text_columns'], spec['label_column'], id_column,
+                 fmt, stage_metrics.worker_args()) + cache_args + (embeddings_path,))
+    if dedupe:
+        # score cluster representatives first; the main pass then only copies labels
+        clusters = near_duplicates.load_or_build(cleaned, config['text_columns'], chunksize)
+        labels = near_duplicates.representative_labels(
+            _read_chunks(config, cleaned, arrow_strings, columns=config['text_columns']), clusters,
+            predict_representatives, map_chunks, workers=workers, initializer=init_predict_worker, initargs=initargs)
+        chunks = near_duplicates.prefill(chunks, labels)
+    results = map_chunks(predict_chunk, chunks, workers=workers, initializer=init_predict_worker, initargs=initargs)
+
+    # predictions are written in input order on a writer thread, overlapped with scoring the next chunks
+    def write(item):
+        i, part, state_rows, snapshot = item
+        with stage_metrics.timer('write'):
+            out.write_part(part)
+            if state_rows is not None:
+                state_writer.write(*state_rows)
+        stage_metrics.chunk_done(i, part.rows, snapshot)
+
+    counts = {}
+    cache_hits = cache_misses = 0
+    with storage.DatasetWriter(target, fmt) as out:
+        with BackgroundWriter(write, inflight) as writer:
+            for i, (part, chunk_counts, hits, misses, state_rows, snapshot) in enumerate(results):
+                writer.submit((i, part, state_rows, snapshot))
+                merge_counts(counts, chunk_counts)
+                cache_hits += hits
+                cache_misses += misses
+                print(f"✅ Chunk {first_chunk + i + 1}/{total_chunks} predicted")
+        rows = out.rows  # the writer has drained: every part is counted
+
+    if state_writer is not None:
+        state_writer.close()
+    if state is not None:
+        state.report()
+    stage_metrics.close()
+    if embeddings:
+        meta = similar.finish_embeddings(embeddings_dir, fingerprint, svd_dims)
+        print(f"🧭 {meta['rows']} embeddings ({meta['dims']} dims) saved to '{embeddings_dir}' — "
+              f"index them with `python -m pipeline.similar build`")
+    if prediction_cache is not None:
+        evicted = prediction_cache.evict()
+        report(cache_hits, cache_misses, prediction_cache)
+        if evicted:
+            print(f"🗃️ Evicted {evicted} least recently used entries")
+        prediction_cache.close()
+
+    counts = dict(sorted(counts.items(), key=lambda x: -x[1]))
+    print("\n📦 Final Predicted Bucket Counts:")
+    for label, count in counts.items():
+        print(f"➡️  {label:25s}: {count}")
+    return {'rows': rows, 'counts': counts, 'cache_hits': cache_hits, 'cache_misses': cache_misses}
+
+
+STAGE_FUNCTIONS = {'clean': clean, 'bucket': bucket, 'train': train, 'predict': predict}
@@ -0,0 +1,429 @@
+import argparse
+import glob
+import hashlib
+import io
+import itertools
+import json
+import os
+from collections import namedtuple
+
+import pandas as pd
+
+try:
+    import pyarrow.dataset as ds
+except ImportError:
+    ds = None
+
+# Shared storage layer for the pipeline's intermediate datasets.
+#
+# A dataset is addressed by its path without extension, e.g.
+# './data/amazon/amazon_cleaned'. It is stored either as a partitioned
+# Parquet directory ('amazon_cleaned.parquet/part-00000.parquet', one part per
+# written chunk) or as a single CSV file ('amazon_cleaned.csv'). Readers pick
+# whichever exists, preferring Parquet, and can project columns so a stage
+# only decodes the columns it needs.
+
+FORMATS = ('parquet', 'csv')
+DEFAULT_FORMAT = 'parquet' if ds is not None else 'csv'
+# dtype for text columns read with ``text_columns``: one Arrow buffer per
+# column instead of a Python str object per value (object columns without pyarrow)
+TEXT_DTYPE = pd.StringDtype('pyarrow') if ds is not None else None
+
+
+def dataset_path(name, fmt):
+    return f'{name}.{fmt}'
+
+
+def detect_format(name):
+    """Format of the stored dataset ``name`` (Parquet wins if both exist)."""
+    if ds is not None and os.path.isdir(dataset_path(name, 'parquet')):
+        return 'parquet'
+    if os.path.exists(dataset_path(name, 'csv')):
+        return 'csv'
+    raise FileNotFoundError(f"No dataset found for '{name}' (.parquet or .csv)")
+
+
+def add_format_argument(parser):
+    parser.add_argument('--format', choices=FORMATS, default=DEFAULT_FORMAT,
+                        help=f'storage format for written datasets (default: {DEFAULT_FORMAT})')
+
+
+# === Reading ===
+
+def _parquet_parts(name):
+    return sorted(glob.glob(os.path.join(dataset_path(name, 'parquet'), 'part-*.parquet')))
+
+
+def _open_dataset(name):
+    # Parts are written chunk by chunk, so pandas may have inferred slightly
+    # different types per part (int vs float, all-null columns); unify them.
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    parts = _parquet_parts(name)
+    schema = pa.unify_schemas([pq.read_schema(part) for part in parts], promote_options='permissive')
+    return ds.dataset(parts, schema=schema, format='parquet')
+
+
+def _is_string(arrow_type):
+    import pyarrow as pa
+
+    return pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type)
+
+
+def _to_pandas(table, text_columns):
+    """``table.to_pandas()`` with ``text_columns`` converted straight to TEXT_DTYPE."""
+    text = [c for c in text_columns if c in table.column_names and _is_string(table.schema.field(c).type)]
+    if not text:
+        return table.to_pandas()
+    df = table.select([c for c in table.column_names if c not in text]).to_pandas()
+    if df.columns.empty:
+        df = pd.DataFrame(index=pd.RangeIndex(table.num_rows))
+    for column in text:
+        values = table.column(column).to_pandas(types_mapper=lambda t: TEXT_DTYPE if _is_string(t) else None)
+        df[column] = values.array
+    # back in file order: text columns were appended after the others
+    return df[table.column_names]
+
+
+def _fragment_batches(dataset, columns, batch_size, skip):
+    """Record batches of ``dataset`` from row ``skip`` on, without decoding the parts before it."""
+    for fragment in dataset.get_fragments():
+        if skip:
+            rows = fragment.count_rows()
+            if rows <= skip:
+                skip -= rows
+                continue
+        for batch in fragment.to_batches(schema=dataset.schema, columns=columns, batch_size=batch_size):
+            if skip:
+                if batch.num_rows <= skip:
+                    skip -= batch.num_rows
+                    continue
+                batch, skip = batch.slice(skip), 0
+            yield batch
+
+
+def _take_rows(batches, limit):
+    for batch in batches:
+        if limit <= 0:
+            return
+        if batch.num_rows > limit:
+            batch = batch.slice(0, limit)
+        limit -= batch.num_rows
+        yield batch
+
+
+def read_chunks(name, columns=None, chunksize=100000, text_columns=(), start_chunk=0, stop_chunk=None,
+                **csv_kwargs):
+    """Yield the dataset as DataFrames of ``chunksize`` rows (the last may be shorter).
+
+    ``text_columns`` are loaded as Arrow-backed strings (TEXT_DTYPE) when
+    pyarrow is installed; missing values then read as ``pd.NA``.
+    ``start_chunk``/``stop_chunk`` restrict the output to that range of the
+    chunks a full read would yield (Parquet parts before it are skipped
+    unread, CSV rows before it are still parsed).
+    """
+    if TEXT_DTYPE is None:
+        text_columns = ()
+    if detect_format(name) == 'csv':
+        if text_columns:
+            csv_kwargs['dtype'] = {**csv_kwargs.get('dtype', {}), **{c: TEXT_DTYPE for c in text_columns}}
+        reader = pd.read_csv(dataset_path(name, 'csv'), usecols=columns, chunksize=chunksize, **csv_kwargs)
+        # skiprows counts lines, not records, so quoted newlines would shift the range
+        yield from itertools.islice(reader, start_chunk, stop_chunk)
+        return
+
+    import pyarrow as pa
+
+    dataset = _open_dataset(name)
+    if start_chunk:
+        batches = _fragment_batches(dataset, columns, chunksize, start_chunk * chunksize)
+    else:
+        # no read-ahead across parts: a streaming reader should hold about one chunk
+        batches = dataset.to_batches(columns=columns, batch_size=chunksize, batch_readahead=1, fragment_readahead=1)
+    if stop_chunk is not None:
+        batches = _take_rows(batches, (stop_chunk - start_chunk) * chunksize)
+    pending, pending_rows = [], 0
+    for batch in batches:
+        pending.append(batch)
+        pending_rows += batch.num_rows
+        while pending_rows >= chunksize:
+            table = pa.Table.from_batches(pending)
+            yield _to_pandas(table.slice(0, chunksize), text_columns)
+            rest = table.slice(chunksize)
+            pending, pending_rows = rest.to_batches(), rest.num_rows
+    if pending_rows:
+        yield _to_pandas(pa.Table.from_batches(pending), text_columns)
+
+
+def read_frame(name, columns=None, **csv_kwargs):
+    """Load the whole dataset (or just ``columns``) into one DataFrame."""
+    if detect_format(name) == 'csv':
+        return pd.read_csv(dataset_path(name, 'csv'), usecols=columns, **csv_kwargs)
+    return _open_dataset(name).to_table(columns=columns).to_pandas()
+
+
+def frame_bytes(df):
+    """Memory held by ``df``, including the Python string objects of object columns."""
+    return int(df.memory_usage(index=False, deep=True).sum())
+
+
+def object_frame_bytes(df):
+    """Memory ``df`` would hold with its Arrow string columns as object columns (materializes them)."""
+    strings = {column: object for column, dtype in df.dtypes.items() if dtype.name == 'string'}
+    return frame_bytes(df.astype(strings) if strings else df)
+
+
+def dataset_rows(name):
+    """``(rows, exact)`` for progress reporting, without scanning the data.
+
+    Uses the producer's manifest when it matches the file on disk, the
+    Parquet footers otherwise, and for a bare CSV an estimate from the file
+    size and the average row size of its first megabyte (``exact=False``).
+    """
+    manifest = read_manifest(name)
+    if manifest is not None:
+        return manifest['rows'], True
+    if detect_format(name) == 'parquet':
+        return _open_dataset(name).count_rows(), True
+    return _estimate_csv_rows(dataset_path(name, 'csv')), False
+
+
+def dataset_chunks(name, chunksize):
+    """``(chunks, exact)`` a reader with ``chunksize`` will yield."""
+    rows, exact = dataset_rows(name)
+    return -(-rows // chunksize), exact
+
+
+def _estimate_csv_rows(path, sample_bytes=1 << 20):
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        f.readline()  # header
+        header_bytes = f.tell()
+        sample = f.read(sample_bytes)
+    lines = sample.count(b'\n')
+    if not lines:
+        return 0
+    if len(sample) < sample_bytes:
+        return lines
+    return round((size - header_bytes) * lines / len(sample))
+
+
+# === Manifest ===
+# Written by DatasetWriter next to the dataset ('<name>.manifest.json') once
+# the last part is flushed: total rows, per-part rows and byte offsets, and a
+# SHA-256 of everything written. Consumers use it to size progress bars and
+# seek to chunks without an extra pass over the data.
+
+def manifest_path(name):
+    return f'{name}.manifest.json'
+
+
+def read_manifest(name):
+    """The dataset's manifest, or None if missing or stale."""
+    try:
+        with open(manifest_path(name)) as f:
+            manifest = json.load(f)
+        fmt = detect_format(name)
+    except (OSError, ValueError):
+        return None
+    if manifest.get('format') != fmt or manifest.get('bytes') != _stored_bytes(name, fmt):
+        return None
+    return manifest
+
+
+def verify_manifest(name):
+    """Re-hash the stored bytes and compare with the manifest checksum."""
+    manifest = read_manifest(name)
+    if manifest is None:
+        return False
+    digest = hashlib.sha256()
+    for path in _stored_files(name, manifest['format']):
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+    return digest.hexdigest() == manifest['sha256']
+
+
+def _stored_files(name, fmt):
+    return _parquet_parts(name) if fmt == 'parquet' else [dataset_path(name, 'csv')]
+
+
+def _stored_bytes(name, fmt):
+    return sum(os.path.getsize(path) for path in _stored_files(name, fmt))
+
+
+# === Writing ===
+
+EncodedPart = namedtuple('EncodedPart', ['data', 'rows'])
+
+
+def encode_part(chunk, fmt, index):
+    """Serialize one chunk as a part of a ``fmt`` dataset.
+
+    Cheap to call in worker processes; the bytes are then written in order
+    by a single DatasetWriter. CSV parts carry the header only for index 0.
+    """
+    if fmt == 'csv':
+        return EncodedPart(chunk.to_csv(index=False, header=index == 0).encode('utf-8'), len(chunk))
+    buf = io.BytesIO()
+    chunk.to_parquet(buf, index=False)
+    return EncodedPart(buf.getvalue(), len(chunk))
+
+
+class DatasetWriter:
+    """Writes a dataset part by part, replacing any previous copy in either format.
+
+    The manifest is only written when the writer is closed without an error,
+    so a crashed run never leaves a manifest that vouches for partial data.
+    """
+
+    def __init__(self, name, fmt=DEFAULT_FORMAT):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown storage format '{fmt}'")
+        self.name = name
+        self.fmt = fmt
+        self.path = dataset_path(name, fmt)
+        self.parts = 0
+        self.rows = 0
+        self._offset = 0
+        self._part_info = []
+        self._digest = hashlib.sha256()
+        remove_dataset(name)
+        if fmt == 'parquet':
+            os.makedirs(self.path)
+            self._file = None
+        else:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            self._file = open(self.path, 'wb')
+
+    def write(self, chunk):
+        self.write_part(encode_part(chunk, self.fmt, self.parts))
+
+    def write_part(self, part):
+        info = {'rows': part.rows, 'offset': self._offset, 'bytes': len(part.data)}
+        if self._file is not None:
+            self._file.write(part.data)
+            self._offset += len(part.data)
+        else:
+            info['file'] = f'part-{self.parts:05d}.parquet'
+            info['offset'] = 0
+            with open(os.path.join(self.path, info['file']), 'wb') as f:
+                f.write(part.data)
+        self._digest.update(part.data)
+        self._part_info.append(info)
+        self.parts += 1
+        self.rows += part.rows
+
+    def close(self, complete=True):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if complete and self._part_info is not None:
+            manifest = {
+                'format': self.fmt,
+                'rows': self.rows,
+                'bytes': sum(info['bytes'] for info in self._part_info),
+                'sha256': self._digest.hexdigest(),
+                'parts': self._part_info,
+            }
+            with open(manifest_path(self.name), 'w') as f:
+                json.dump(manifest, f, indent=1)
+        self._part_info = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        self.close(complete=exc_type is None)
+
+
+def write_frame(name, df, fmt=DEFAULT_FORMAT, chunksize=100000):
+    """Write a whole DataFrame, one part per ``chunksize`` rows."""
+    with DatasetWriter(name, fmt) as writer:
+        for start in range(0, max(len(df), 1), chunksize):
+            writer.write(df.iloc[start:start + chunksize])
+    return writer.path
+
+
+def _read_part(name, fmt, info):
+    if fmt == 'parquet':
+        with open(os.path.join(dataset_path(name, 'parquet'), info['file']), 'rb') as f:
+            return f.read()
+    with open(dataset_path(name, 'csv'), 'rb') as f:
+        f.seek(info['offset'])
+        return f.read(info['bytes'])
+
+
+def concat_datasets(names, target):
+    """Write the datasets ``names`` one after another as ``target``, copying their parts as is.
+
+    Every source needs a current manifest, and all must share one format.
+    The result is byte for byte what one DatasetWriter fed all their chunks
+    in order would have written (a CSV header only from the first source).
+    """
+    manifests = []
+    for name in names:
+        manifest = read_manifest(name)
+        if manifest is None:
+            raise FileNotFoundError(f"No complete dataset (with a current manifest) for '{name}'")
+        manifests.append(manifest)
+    formats = {manifest['format'] for manifest in manifests}
+    if len(formats) > 1:
+        raise ValueError(f"Cannot concatenate datasets stored as {' and '.join(sorted(formats))}")
+    fmt = formats.pop() if formats else DEFAULT_FORMAT
+    with DatasetWriter(target, fmt) as writer:
+        for name, manifest in zip(names, manifests):
+            for info in manifest['parts']:
+                data = _read_part(name, fmt, info)
+                if fmt == 'csv' and writer.parts and info is manifest['parts'][0]:
+                    data = data[data.index(b'\n') + 1:]
+                writer.write_part(EncodedPart(data, info['rows']))
+    return writer.path
+
+
+def remove_dataset(name):
+    parquet_dir = dataset_path(name, 'parquet')
+    if os.path.isdir(parquet_dir):
+        for part in glob.glob(os.path.join(parquet_dir, '*')):
+            os.remove(part)
+        os.rmdir(parquet_dir)
+    if os.path.exists(dataset_path(name, 'csv')):
+        os.remove(dataset_path(name, 'csv'))
+    if os.path.exists(manifest_path(name)):
+        os.remove(manifest_path(name))
+
+
+def export_csv(name, csv_path, chunksize=100000):
+    """Export a stored dataset to a single CSV file."""
+    with open(csv_path, 'wb') as out:
+        for i, chunk in enumerate(read_chunks(name, chunksize=chunksize)):
+            out.write(encode_part(chunk, 'csv', i).data)
+    return csv_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Inspect and export pipeline datasets')
+    sub = parser.add_subparsers(dest='command', required=True)
+    export = sub.add_parser('export', help='export a dataset to CSV')
+    export.add_argument('dataset', help="dataset path without extension, e.g. ./data/amazon/amazon_buckets")
+    export.add_argument('csv_path')
+    info = sub.add_parser('info', help='show format and row count of a dataset')
+    info.add_argument('dataset')
+    info.add_argument('--verify', action='store_true', help='re-hash the data against the manifest checksum')
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        export_csv(args.dataset, args.csv_path)
+        print(f"✅ Exported '{args.dataset}' to '{args.csv_path}'")
+    else:
+        fmt = detect_format(args.dataset)
+        rows, exact = dataset_rows(args.dataset)
+        print(f"📦 {dataset_path(args.dataset, fmt)} — {'' if exact else '~'}{rows} rows")
+        if args.verify:
+            ok = verify_manifest(args.dataset)
+            print("✅ Checksum matches manifest" if ok else "❌ Manifest missing or checksum mismatch")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,258 @@
+import argparse
+import csv
+import hashlib
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import scipy.sparse as sp
+
+from pipeline import config as marketplace_config
+from pipeline.config import dataset
+from pipeline.runner import input_fingerprint
+from pipeline.stages import make_classifier, make_vectorizer, training_split
+
+# Training sweep: every vectorizer configuration x every classifier variant
+# on the marketplace's train split, ranked by macro-F1.
+#
+# Each vectorizer is fitted once and its train/test matrices are cached in
+# '<model_dir>/sweep/features/<key>/' as plain .npy CSR components, keyed on
+# the train input's checksum, the split settings and the vectorizer params.
+# Variants then run on ``workers`` processes that open the matrices with
+# np.load(mmap_mode='r'), so the features are neither rebuilt nor copied per
+# worker. The leaderboard (macro-F1, accuracy, training seconds, inference
+# rows/s = vectorizer transform + model predict on the test rows) goes to
+# '<model_dir>/sweep/leaderboard.json' and '.csv'; --apply writes the fastest
+# variant within --max-f1-drop of the best into the marketplace config.
+#
+#   python -m pipeline.sweep --marketplace amazon [--grid grid.json] [--workers N]
+#                            [--max-f1-drop 0.01] [--apply]
+
+DEFAULT_GRID = {
+    'vectorizers': [
+        {'max_features': 15000, 'ngram_range': [1, 2], 'stop_words': 'english'},
+        {'max_features': 50000, 'ngram_range': [1, 2], 'stop_words': 'english', 'sublinear_tf': True},
+        {'max_features': 15000, 'ngram_range': [1, 1], 'stop_words': 'english'},
+    ],
+    'models': [
+        {'type': 'logistic_regression', 'max_iter': 300},
+        {'type': 'linear_svc', 'C': 0.5},
+        {'type': 'sgd', 'loss': 'modified_huber', 'alpha': 1e-5, 'random_state': 42},
+        {'type': 'complement_nb', 'alpha': 0.3},
+        {'type': 'random_forest', 'n_estimators': 100, 'random_state': 42},
+    ],
+}
+# train settings that decide which rows land in the split
+SPLIT_KEYS = ('input', 'label_column', 'exclude', 'sample', 'test_size', 'random_state')
+
+
+def sweep_dir(config):
+    return os.path.join(config['model_dir'], 'sweep')
+
+
+def feature_key(config, vectorizer_spec, fingerprint):
+    split = {key: config['train'].get(key) for key in SPLIT_KEYS}
+    payload = {'input': fingerprint, 'split': split, 'text_columns': config['text_columns'],
+               'vectorizer': vectorizer_spec}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+
+# === Feature cache ===
+
+def _save_csr(directory, name, X):
+    X = X.tocsr()
+    for part in ('data', 'indices', 'indptr'):
+        np.save(os.path.join(directory, f'{name}.{part}.npy'), getattr(X, part))
+    return list(X.shape)
+
+
+def _load_csr(directory, name, shape):
+    parts = [np.load(os.path.join(directory, f'{name}.{part}.npy'), mmap_mode='r')
+             for part in ('data', 'indices', 'indptr')]
+    return sp.csr_matrix(tuple(parts), shape=tuple(shape), copy=False)
+
+
+def build_features(directory, vectorizer_spec, split):
+    """Fit the vectorizer on the train texts and cache both matrices in ``directory``."""
+    X_train, X_test, y_train, y_test = split
+    tmp = directory + '.tmp'
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+
+    vectorizer = make_vectorizer(vectorizer_spec)
+    start = time.perf_counter()
+    X_train_vec = vectorizer.fit_transform(X_train)
+    fit_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    X_test_vec = vectorizer.transform(X_test)
+    transform_seconds = time.perf_counter() - start
+
+    meta = {
+        'vectorizer': vectorizer_spec,
+        'features': len(vectorizer.vocabulary_),
+        'fit_seconds': round(fit_seconds, 3),
+        'transform_seconds': transform_seconds,
+        'train_shape': _save_csr(tmp, 'X_train', X_train_vec),
+        'test_shape': _save_csr(tmp, 'X_test', X_test_vec),
+    }
+    np.save(os.path.join(tmp, 'y_train.npy'), np.asarray(y_train, dtype=str))
+    np.save(os.path.join(tmp, 'y_test.npy'), np.asarray(y_test, dtype=str))
+    with open(os.path.join(tmp, 'meta.json'), 'w') as f:
+        json.dump(meta, f, indent=1)
+    shutil.rmtree(directory, ignore_errors=True)
+    os.replace(tmp, directory)
+    return meta
+
+
+def load_features(directory):
+    """``(X_train, X_test, y_train, y_test, meta)``, the matrices memory-mapped."""
+    with open(os.path.join(directory, 'meta.json')) as f:
+        meta = json.load(f)
+    return (_load_csr(directory, 'X_train', meta['train_shape']), _load_csr(directory, 'X_test', meta['test_shape']),
+            np.load(os.path.join(directory, 'y_train.npy')), np.load(os.path.join(directory, 'y_test.npy')), meta)
+
+
+def cached_features(config, vectorizers):
+    """Feature directory of every vectorizer spec, building the missing ones."""
+    fingerprint = input_fingerprint(dataset(config, config['train']['input']))
+    if fingerprint is None:
+        raise FileNotFoundError(f"Missing training input '{dataset(config, config['train']['input'])}'")
+    directories, split = [], None
+    for spec in vectorizers:
+        directory = os.path.join(sweep_dir(config), 'features', feature_key(config, spec, fingerprint))
+        if os.path.exists(os.path.join(directory, 'meta.json')):
+            print(f"♻️  Cached features for {json.dumps(spec)}")
+        else:
+            if split is None:
+                split = training_split(config)
+            print(f"🔄 Fitting vectorizer {json.dumps(spec)}...")
+            meta = build_features(directory, spec, split)
+            print(f"✅ {meta['features']} features, fitted in {meta['fit_seconds']:.1f}s")
+        directories.append(directory)
+    return directories
+
+
+# === Variants (run in worker processes) ===
+
+def fit_variant(directory, model_spec):
+    from sklearn.metrics import accuracy_score, f1_score
+
+    X_train, X_test, y_train, y_test, meta = load_features(directory)
+    clf = make_classifier(model_spec)
+    if 'n_jobs' in clf.get_params() and 'n_jobs' not in model_spec:
+        clf.set_params(n_jobs=1)  # the sweep is already parallel across variants
+
+    start = time.perf_counter()
+    clf.fit(X_train, y_train)
+    train_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    y_pred = clf.predict(X_test)
+    predict_seconds = time.perf_counter() - start
+
+    inference_seconds = meta['transform_seconds'] + predict_seconds
+    return {
+        'vectorizer': meta['vectorizer'],
+        'model': model_spec,
+        'features': meta['features'],
+        'macro_f1': round(float(f1_score(y_test, y_pred, average='macro')), 4),
+        'accuracy': round(float(accuracy_score(y_test, y_pred)), 4),
+        'train_seconds': round(train_seconds, 2),
+        'rows_per_sec': round(len(y_test) / inference_seconds, 1) if inference_seconds else None,
+    }
+
+
+def run_sweep(config, grid, workers=1):
+    """Leaderboard rows of every vectorizer x model variant, best macro-F1 first."""
+    directories = cached_features(config, grid['vectorizers'])
+    jobs = [(directory, model) for directory in directories for model in grid['models']]
+    print(f"\n⚡ Training {len(jobs)} variants on {workers} processes...")
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(fit_variant, *job): job for job in jobs}
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            print(f"✅ {result['model']['type']:20s} macro-F1 {result['macro_f1']:.4f} "
+                  f"in {result['train_seconds']:.1f}s ({result['features']} features)")
+    return sorted(results, key=lambda r: (-r['macro_f1'], -(r['rows_per_sec'] or 0)))
+
+
+def select(results, max_f1_drop):
+    """The fastest variant whose macro-F1 is within ``max_f1_drop`` of the best."""
+    best = results[0]['macro_f1']
+    acceptable = [r for r in results if r['macro_f1'] >= best - max_f1_drop]
+    return max(acceptable, key=lambda r: r['rows_per_sec'] or 0)
+
+
+def write_leaderboard(config, results):
+    directory = sweep_dir(config)
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, 'leaderboard.json'), 'w') as f:
+        json.dump(results, f, indent=1)
+    with open(os.path.join(directory, 'leaderboard.csv'), 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['rank', 'model', 'vectorizer', 'features', 'macro_f1', 'accuracy', 'train_seconds',
+                         'rows_per_sec'])
+        for rank, r in enumerate(results, 1):
+            writer.writerow([rank, json.dumps(r['model']), json.dumps(r['vectorizer']), r['features'], r['macro_f1'],
+                             r['accuracy'], r['train_seconds'], r['rows_per_sec']])
+    return directory
+
+
+def print_leaderboard(results, chosen):
+    print(f"\n🏁 {'':2s}{'model':20s} {'features':>8s} {'macro-F1':>8s} {'accuracy':>8s} {'train s':>8s} "
+          f"{'rows/s':>10s}")
+    for rank, r in enumerate(results, 1):
+        mark = '🏆' if r is chosen else '  '
+        print(f"{rank:2d} {mark}{r['model']['type']:20s} {r['features']:8d} {r['macro_f1']:8.4f} {r['accuracy']:8.4f} "
+              f"{r['train_seconds']:8.1f} {r['rows_per_sec'] or 0:10.0f}")
+
+
+def apply(marketplace, chosen):
+    """Write the chosen vectorizer and model into the marketplace config file."""
+    path = marketplace if marketplace.endswith('.json') else marketplace_config.config_path(marketplace)
+    with open(path, encoding='utf-8') as f:
+        config = json.load(f)
+    config['train']['vectorizer'] = chosen['vectorizer']
+    config['train']['model'] = chosen['model']
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(config, f, indent=2, ensure_ascii=False)
+        f.write('\n')
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Sweep vectorizer and classifier settings on cached features')
+    parser.add_argument('--marketplace', default='amazon',
+                        help=f"bundled config ({', '.join(marketplace_config.available())}) or a config .json path")
+    parser.add_argument('--grid', help='JSON file with "vectorizers" and "models" lists (default: built-in grid)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='variants trained in parallel')
+    parser.add_argument('--max-f1-drop', type=float, default=0.01,
+                        help='macro-F1 the selected (fastest) variant may lose against the best one')
+    parser.add_argument('--apply', action='store_true', help='write the selected variant into the config')
+    args = parser.parse_args(argv)
+
+    config = marketplace_config.load(args.marketplace)
+    grid = DEFAULT_GRID
+    if args.grid:
+        with open(args.grid) as f:
+            grid = json.load(f)
+
+    results = run_sweep(config, grid, workers=args.workers)
+    chosen = select(results, args.max_f1_drop)
+    print_leaderboard(results, chosen)
+    print(f"\n💾 Leaderboard saved to '{write_leaderboard(config, results)}'")
+    print(f"🏆 Fastest within {args.max_f1_drop} macro-F1 of the best: {chosen['model']['type']} "
+          f"({chosen['rows_per_sec'] or 0:.0f} rows/s, macro-F1 {chosen['macro_f1']:.4f})")
+    if args.apply:
+        print(f"✅ Train settings written to '{apply(args.marketplace, chosen)}'; "
+              f"retrain with `python -m pipeline train --marketplace {args.marketplace}`")
+    else:
+        print(json.dumps({'vectorizer': chosen['vectorizer'], 'model': chosen['model']}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
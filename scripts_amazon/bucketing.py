@@ -1,87 +1,22 @@
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
+import argparse
 import os
+import sys
 
-# === Step 1: Setup ===
-chunksize = 100000
-bucket_counts = {}
-uncategorized_samples = []
-os.makedirs('./data/amazon', exist_ok=True)
-os.makedirs('./figures/amazon', exist_ok=True)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pipeline import config, metrics, stages, storage
+from pipeline.chunk_pool import add_inflight_argument
+from pipeline.config import dataset
+from pipeline.report import plot_counts, save_counts
+from pipeline.shards import add_shard_argument, save_shard_counts
 
-# === Step 2: Define keyword sets ===
-bucket_keywords = {
-    'Clothing': [
-        'anarkali', 'apparel', "boy's", 'blouse', 'boots', 'casual shoes',
-        'dhoti', 'dress', 'ethnic', 'fashionwear', 'footwear', 'girl\'s',
-        'jeans', 'jacket', 'kurta', 'kurti', 'leggings', 'lingerie',
-        'long sleeve', 'loungewear', 'nightwear', 'pant', 'pajama',
-        'peplum', 'polo', 'pyjama', 'sandal', 'sandals', 'shirt',
-        'shorts', 'socks', 'stylish', 'sweater', 'sweatshirt', 't-shirt',
-        'top', 'trousers', 'tunic', 'underwear', 'sleeveless'
-    ],
-    'Jewelry': [
-        'analog watch', 'anklet', 'bracelet', 'choker', 'chronograph',
-        'cubic zirconia', 'digital watch', 'diamond', 'earring', 'gold',
-        'jewellery', 'jewelry', 'necklace', 'nose pin', 'pendant',
-        'quartz', 'ring', 'sapphire crystal', 'silver', 'sunglasses',
-        'watch', 'wristwatch'
-    ],
-    'Tech Gadgets': [
-        'adapter', 'amplifier', 'bluetooth', 'cable', 'case', 'connector',
-        'cctv', 'electronics', 'gadget', 'gimbal', 'hdmi', 'headphones',
-        'lcd', 'mobile cover', 'power bank', 'samsung', 'smartphone',
-        'speaker', 'surveillance', 'tablet', 'tech', 'tripod', 'usb',
-        'wire'
-    ],
-    'Home Decor': [
-        'bed sheet', 'blanket', 'coasters', 'cookware', 'cushion',
-        'cutlery', 'decor', 'dish rack', 'doormat', 'furnishing',
-        'idol', 'kitchen', 'lamp', 'laundry', 'mat', 'mirror', 'organizer',
-        'photo frame', 'pillow', 'planter', 'quilt', 'reading pillow',
-        'statue', 'storage box', 'table runner', 'tablecloth', 'vase',
-        'wall art', 'wall sticker' , 'jhula' , 'artwall'
-    ],
-    'Personal Care': [
-        'activated charcoal', 'bb cream', 'conditioner', 'cosmetic',
-        'cream', 'eyeliner', 'face mask', 'face wash', 'kaolin',
-        'lip balm', 'makeup remover', 'maybelline', 'moisturizer',
-        'roll on', 'scrub', 'serum', 'shampoo', 'skincare', 'soap',
-        'toothbrush', 'zinc oxide'
-    ],
-    'Footwear': [
-        'boot', 'brogue', 'cleats', 'flip flop', 'footbed', 'jooti',
-        'loafer', 'moccasin', 'oxford', 'sandal', 'shoe', 'slipper',
-        'sneaker', 'nike'
-    ],
-    'Furniture & Fixtures': [
-        'bench', 'bookshelf', 'cabinet', 'chair', 'coffee table',
-        'desk', 'dresser', 'drawer', 'furniture', 'nightstand',
-        'ottoman', 'rack', 'sofa', 'stool', 'table', 'vanity'
-    ],
-    'Books & Media': [
-        'biography', 'book', 'chronicle', 'guidebook', 'hardcover',
-        'lesson', 'literature', 'memoir', 'novel', 'reading',
-        'reading comprehension', 'renditions', 'sheet music',
-        'storybook', 'textbook'
-    ],
-    'Gifts': [
-        'anniversary', 'birthday', 'collectible', 'customized',
-        'decorative box', 'figurine', 'gift', 'handbag', 'keychain',
-        'mug', 'patch', 'plush', 'shot glass', 'souvenir', 'sticker',
-        'vinyl figure', 'wallet' , 'hot wheels', 'picture frame'
-    ],
-    'Auto Industrial': [
-        'belt', 'brake', 'car cover', 'clevis', 'cnc', 'drill bit',
-        'engine', 'fuse', 'garage', 'milling', 'motor', 'saddle',
-        'seat cover', 'timing belt', 'tool', 'transistor', 'vehicle'
-    ]
-}
+# === Step 1: Keyword sets (configs/amazon.json, shared with `python -m pipeline`) ===
+amazon = config.load('amazon')
+bucket_keywords = amazon['bucket']['labels']['final_bucket']['keywords']
 
 
-
-# === Step 3: Assign best-matching bucket ===
+# === Step 2: Assign best-matching bucket ===
+# Row-wise reference implementation; pipeline.stages.bucket uses the equivalent
+# compiled KeywordMatcher, which scores all buckets in one pass per text.
 def assign_amazon_bucket(row):
     text = ' '.join([
         str(row.get('TITLE', '')), str(row.get('DESCRIPTION', '')), str(row.get('BULLET_POINTS', ''))
@@ -91,66 +26,54 @@ def assign_amazon_bucket(row):
     best_bucket = max(scores, key=scores.get)
     return best_bucket if scores[best_bucket] > 0 else 'Uncategorized'
 
-# === Step 4: Process CSV in chunks ===
-output_file = './data/amazon/amazon_buckets.csv'
-first_write = True
-
-for i, chunk in enumerate(pd.read_csv('./data/amazon/amazon_cleaned.csv', chunksize=chunksize)):
-    chunk['final_bucket'] = chunk.apply(assign_amazon_bucket, axis=1)
-
-    # Collect sample uncategorized
-    if len(uncategorized_samples) < 40:
-        uncats = chunk[chunk['final_bucket'] == 'Uncategorized']
-        if not uncats.empty:
-            needed = 40 - len(uncategorized_samples)
-            uncategorized_samples.extend(uncats[['TITLE', 'DESCRIPTION', 'BULLET_POINTS']].head(needed).to_dict('records'))
-
-    # Save chunk output
-    chunk.to_csv(output_file, mode='w' if first_write else 'a', header=first_write, index=False)
-    first_write = False
-
-    # Update and show bucket counts
-    counts = chunk['final_bucket'].value_counts().to_dict()
-    for label, count in counts.items():
-        bucket_counts[label] = bucket_counts.get(label, 0) + count
-
-    print(f"✅ Chunk {i+1}/~23 processed — counts: {counts}")
-
-# === Step 5: Final Bucket Summary ===
-print("\n📦 Final Bucket Counts:")
-for label, count in bucket_counts.items():
-    print(f"➡️  {label:18s}: {count}")
-
-# # === Step 6: Sample 'Uncategorized' Items ===
-# print("\n🔎 Sample 'Uncategorized' Products (40 examples):\n")
-# for i, row in enumerate(uncategorized_samples):
-#     print(f"🟦 {i+1}.")
-#     print(f"🔹 TITLE      : {row['TITLE']}")
-#     print(f"📝 DESCRIPTION: {row['DESCRIPTION']}")
-#     print(f"📌 BULLETS    : {row['BULLET_POINTS']}\n{'-'*80}")
-
-# === Step 6: Save Final Bucket Counts to CSV ===
-bucket_df = pd.DataFrame(list(bucket_counts.items()), columns=['Bucket', 'Count'])
-bucket_df.to_csv('./data/amazon/final_bucket_plot.csv', index=False)
-
-
-# === Step 7: Visualization ===
-plt.figure(figsize=(10, 6))
-labels = list(bucket_counts.keys())
-values = list(bucket_counts.values())
-
-bars = plt.bar(labels, values, color=['#5DADE2', '#EC7063', '#58D68D', '#A569BD', '#95A5A6', '#F5B041', '#76D7C4', '#DC7633', '#D98880', '#7DCEA0'])
-
-for bar in bars:
-    yval = bar.get_height()
-    plt.text(bar.get_x() + bar.get_width()/2, yval + 100, f'{yval}', ha='center', va='bottom', fontsize=10, fontweight='bold')
 
-plt.title("Product Count per Bucket", fontsize=16)
-plt.xlabel("Bucket", fontsize=12, fontweight='bold')
-plt.ylabel("Number of Products", fontsize=12, fontweight='bold')
-plt.xticks(rotation=15, fontsize=9)
-plt.yticks(fontsize=8)
-plt.tight_layout()
-plt.grid(axis='y', linestyle='--', alpha=0.4)
-plt.savefig('./figures/amazon/bucket_distribution.png', dpi=300, bbox_inches='tight')
-plt.show()
+def main():
+    parser = argparse.ArgumentParser(description='Rule-based Amazon bucketing')
+    parser.add_argument('--workers', type=int, default=1, help='label chunks on N processes (default: 1, serial)')
+    parser.add_argument('--delta', action='store_true',
+                        help='only label products that are new or changed since the last run')
+    parser.add_argument('--dedupe', action='store_true',
+                        help='label one product per near-duplicate cluster and copy its label to the rest')
+    parser.add_argument('--no-plot', action='store_true', help='skip the chart (render it later with pipeline.report)')
+    parser.add_argument('--object-strings', action='store_true',
+                        help='hold text columns as Python str objects instead of Arrow strings')
+    add_inflight_argument(parser)
+    add_shard_argument(parser)
+    storage.add_format_argument(parser)
+    metrics.add_metrics_arguments(parser)
+    args = parser.parse_args()
+    if args.dedupe and args.delta:
+        parser.error('--dedupe and --delta cannot be combined')
+    if args.dedupe and args.shard is not None:
+        # clusters span the whole catalog: every shard would label all their representatives
+        parser.error('--dedupe cannot be combined with --shard')
+
+    # === Step 3: Label the cleaned data chunk by chunk (pipeline.stages.bucket) ===
+    # --shard K/N labels only this shard's range of chunks into '<output>-shard<K>of<N>*'
+    # for `python -m pipeline.shards merge bucketing` (the delta state is read from the merged output)
+    os.makedirs(amazon['data_dir'], exist_ok=True)
+    try:
+        summary = stages.bucket(amazon, args.format, workers=args.workers, inflight=args.inflight,
+                                delta_mode=args.delta, dedupe=args.dedupe, shard=args.shard,
+                                stage_metrics=metrics.from_args('amazon_bucketing', args),
+                                arrow_strings=not args.object_strings)
+    except ValueError as e:
+        sys.exit(f"❌ {e}")
+    bucket_counts = summary['counts']['final_bucket']
+
+    if args.shard is not None:
+        save_shard_counts(args.shard.name(dataset(amazon, amazon['bucket']['output'])), bucket_counts)
+        print(f"\n🧩 Shard {args.shard} done — merge with `python -m pipeline.shards merge bucketing "
+              f"--shards {args.shard.count}`")
+        return
+
+    # === Step 4: Save Final Bucket Counts to CSV ===
+    save_counts('amazon_buckets', bucket_counts)
+
+    # === Step 5: Visualization (python -m pipeline.report amazon_buckets) ===
+    if not args.no_plot:
+        plot_counts('amazon_buckets', show=True)
+
+
+if __name__ == '__main__':
+    main()
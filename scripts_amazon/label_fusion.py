@@ -0,0 +1,132 @@
+import pandas as pd
+import numpy as np
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pipeline import fast_inference, model_artifact, near_duplicates, storage
+from pipeline.chunk_pool import add_inflight_argument, map_chunks, merge_counts, prefetch
+from pipeline.keyword_matcher import KeywordMatcher, build_texts
+
+from bucketing import bucket_keywords
+
+# Rule label + model label in one pass over the cleaned Amazon data.
+#
+# Every chunk's lower-cased TITLE + DESCRIPTION + BULLET_POINTS text is built
+# once (build_texts) and fed to both the keyword matcher and the classifier's
+# predict_proba; the vectorizer lower-cases anyway, so the model sees its
+# usual input. Each row gets the rule label, the model label, the model's
+# confidence and whether the two agree, and rows the model is unsure about
+# also go to a review dataset. Missing fields are read as empty text, as the
+# model was trained, so no keyword can match the literal 'nan' bucketing.py
+# sees (none of the current keywords can, so the rule labels are the same).
+#
+#   python scripts_amazon/label_fusion.py [--review-threshold 0.5] [--workers N] [--inflight 2]
+
+_matcher = None
+_predict = None
+_threshold = None
+_output_format = None
+
+def init_worker(artifact_path, model_path, vectorizer_path, threshold, output_format):
+    global _matcher, _predict, _threshold, _output_format
+    _matcher = KeywordMatcher(bucket_keywords)
+    clf, vectorizer, _ = model_artifact.load_model(artifact_path, model_path, vectorizer_path)
+    if not getattr(vectorizer, 'lowercase', True):
+        raise ValueError('label_fusion.py scores lower-cased text; the vectorizer must lower-case')
+    _predict = fast_inference.confidence_fn(clf, vectorizer)
+    _threshold = threshold
+    _output_format = output_format
+
+def label_chunk(i, chunk):
+    texts = build_texts(chunk, missing='')
+
+    chunk['rule_bucket'] = _matcher.assign_many(texts)
+    if texts:
+        model_bucket, confidence = _predict(texts)
+    else:
+        model_bucket, confidence = np.array([], dtype=object), np.array([])
+    chunk['model_bucket'] = model_bucket
+    chunk['model_confidence'] = confidence
+    chunk['agree'] = chunk['rule_bucket'] == chunk['model_bucket']
+
+    review = chunk[chunk['model_confidence'] < _threshold]
+    stats = {
+        'rule': chunk['rule_bucket'].value_counts().to_dict(),
+        'model': chunk['model_bucket'].value_counts().to_dict(),
+        'agree': chunk.loc[chunk['agree'], 'rule_bucket'].value_counts().to_dict(),
+    }
+    return storage.encode_part(chunk, _output_format, i), review, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fused rule + model labeling for Amazon products')
+    parser.add_argument('--workers', type=int, default=1, help='label chunks on N processes (default: 1, serial)')
+    parser.add_argument('--review-threshold', type=float, default=0.5,
+                        help='rows whose model confidence is below this go to the review dataset')
+    parser.add_argument('--artifact', default='./models/amazon/bucket_model',
+                        help='compact model artifact (used when present, else the joblib pickles)')
+    parser.add_argument('--object-strings', action='store_true',
+                        help='hold text columns as Python str objects instead of Arrow strings')
+    add_inflight_argument(parser)
+    storage.add_format_argument(parser)
+    args = parser.parse_args()
+
+    data_path = './data/amazon/amazon_cleaned'
+    output_path = './data/amazon/amazon_labeled'
+    review_path = './data/amazon/amazon_review'
+    model_path = './models/amazon/bucket_classifier.pkl'
+    vectorizer_path = './models/amazon/vectorizer.pkl'
+    chunksize = 100000
+
+    total_chunks, exact = storage.dataset_chunks(data_path, chunksize)
+    total_chunks = f"{total_chunks}" if exact else f"~{total_chunks}"
+    print(f"\n📦 Total chunks to process: {total_chunks}\n")
+
+    # chunks are parsed on a reader thread, --inflight ahead of the labeling loop
+    text_columns = () if args.object_strings else near_duplicates.TEXT_COLUMNS
+    chunks = prefetch(storage.read_chunks(data_path, chunksize=chunksize, encoding='utf-8',
+                                          text_columns=text_columns), args.inflight)
+    results = map_chunks(label_chunk, chunks, workers=args.workers, initializer=init_worker,
+                         initargs=(args.artifact, model_path, vectorizer_path, args.review_threshold, args.format))
+
+    totals = {'rule': {}, 'model': {}, 'agree': {}}
+    review_columns = []
+    with storage.DatasetWriter(output_path, args.format) as out, \
+            storage.DatasetWriter(review_path, args.format) as review_out:
+        for i, (part, review, stats) in enumerate(results):
+            out.write_part(part)
+            review_columns = list(review.columns)
+            if len(review):
+                review_out.write(review)
+            for key, counts in stats.items():
+                merge_counts(totals[key], counts)
+            print(f"✅ Chunk {i+1}/{total_chunks} labeled — {len(review)} rows for review")
+        if review_out.parts == 0:
+            review_out.write(pd.DataFrame(columns=review_columns))  # keep the dataset readable
+        rows = out.rows
+        review_rows = review_out.rows
+
+    # === Summary: per rule bucket, how often the model agrees ===
+    agreed = sum(totals['agree'].values())
+    print(f"\n🤝 Rule and model agree on {agreed}/{rows} rows ({100 * agreed / max(rows, 1):.1f}%)")
+    print(f"🔎 {review_rows} rows below confidence {args.review_threshold} saved to '{review_path}'\n")
+    print(f"{'bucket':25s} {'rule':>9s} {'model':>9s} {'agree':>7s}")
+    for label in sorted(set(totals['rule']) | set(totals['model']), key=lambda b: -totals['rule'].get(b, 0)):
+        rule = totals['rule'].get(label, 0)
+        share = 100 * totals['agree'].get(label, 0) / rule if rule else 0.0
+        print(f"{label:25s} {rule:9d} {totals['model'].get(label, 0):9d} {share:6.1f}%")
+
+    buckets = sorted(totals['rule'].keys() | totals['model'].keys())
+    pd.DataFrame({
+        'Bucket': buckets,
+        'Rule': [totals['rule'].get(b, 0) for b in buckets],
+        'Model': [totals['model'].get(b, 0) for b in buckets],
+        'Agree': [totals['agree'].get(b, 0) for b in buckets],
+    }).to_csv('./data/amazon/fusion_counts.csv', index=False)
+    print("\n✅ Per-bucket counts saved to './data/amazon/fusion_counts.csv'")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,73 +1,77 @@
-import pandas as pd
-import joblib
-import matplotlib.pyplot as plt
+import argparse
 import os
+import sys
 
-def main():
-    # === Step 1: Load model and vectorizer (AMAZON versions) ===
-    model_path = './models/amazon/bucket_classifier.pkl'
-    vectorizer_path = './models/amazon/vectorizer.pkl'
-    clf = joblib.load(model_path)
-    vectorizer = joblib.load(vectorizer_path)
-
-    # === Step 2: Prepare for batch processing ===
-    data_path = './data/amazon/amazon_cleaned.csv'
-    output_path = './data/amazon/amazon_predicted_buckets.csv'
-    chunksize = 100000
-    first_write = True
-    bucket_counts = {}
-
-    # ✅ Fix: Use UTF-8 to avoid UnicodeDecodeError
-    with open(data_path, encoding='utf-8') as f:
-        total_rows = sum(1 for _ in f) - 1  # exclude header
-
-    total_chunks = (total_rows // chunksize) + int(total_rows % chunksize > 0)
-    print(f"\n📦 Total chunks to process: {total_chunks}\n")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pipeline import config, metrics, similar, stages, storage
+from pipeline.chunk_pool import add_inflight_argument
+from pipeline.config import dataset
+from pipeline.report import plot_counts, save_counts
+from pipeline.shards import add_shard_argument, save_shard_counts
 
-    for i, chunk in enumerate(pd.read_csv(data_path, chunksize=chunksize, encoding='utf-8')):
-        chunk['text'] = chunk['TITLE'].fillna('') + ' ' + chunk['DESCRIPTION'].fillna('') + ' ' + chunk['BULLET_POINTS'].fillna('')
-        X_vec = vectorizer.transform(chunk['text'])
-        chunk['predicted_bucket'] = clf.predict(X_vec)
+amazon = config.load('amazon')
 
-        # Count predictions
-        counts = chunk['predicted_bucket'].value_counts().to_dict()
-        for label, count in counts.items():
-            bucket_counts[label] = bucket_counts.get(label, 0) + count
 
-        # Save chunk predictions
-        chunk.to_csv(output_path, mode='w' if first_write else 'a', header=first_write, index=False)
-        first_write = False
-        print(f"✅ Processed chunk {i+1}/{total_chunks} — predictions saved")
-
-    # === Step 3: Print bucket summary in terminal ===
-    print("\n📦 Final Predicted Bucket Counts:")
-    for label, count in sorted(bucket_counts.items(), key=lambda x: -x[1]):
-        print(f"➡️  {label:25s}: {count}")
-
-    # === Step 4: Plot predicted bucket distribution ===
-    plt.figure(figsize=(12, 7))
-    sorted_counts = dict(sorted(bucket_counts.items(), key=lambda x: -x[1]))
-    bars = plt.bar(sorted_counts.keys(), sorted_counts.values(), color=plt.cm.tab20.colors)
+def main():
+    parser = argparse.ArgumentParser(description='Predict Amazon buckets with the trained model')
+    parser.add_argument('--workers', type=int, default=1, help='predict chunks on N processes (default: 1, serial)')
+    parser.add_argument('--cache', default='./data/amazon/prediction_cache.sqlite',
+                        help='persistent prediction cache (SQLite) keyed by text hash')
+    parser.add_argument('--no-cache', action='store_true', help='score every row, ignore the cache')
+    parser.add_argument('--cache-max-entries', type=int, default=5_000_000)
+    parser.add_argument('--delta', action='store_true',
+                        help='only score products that are new or changed since the last run')
+    parser.add_argument('--dedupe', action='store_true',
+                        help='score one product per near-duplicate cluster and copy its label to the rest')
+    parser.add_argument('--no-plot', action='store_true', help='skip the chart (render it later with pipeline.report)')
+    parser.add_argument('--object-strings', action='store_true',
+                        help='hold text columns as Python str objects instead of Arrow strings')
+    parser.add_argument('--artifact', default='./models/amazon/bucket_model',
+                        help='compact model artifact (used when present, else the joblib pickles)')
+    parser.add_argument('--embeddings', action='store_true',
+                        help='also save TruncatedSVD embeddings of the TF-IDF vectors (for python -m pipeline.similar)')
+    parser.add_argument('--svd-dims', type=int, default=similar.DIMS, help='embedding dimensions')
+    parser.add_argument('--svd-sample', type=int, default=similar.SVD_SAMPLE,
+                        help='first N input rows the SVD basis is fitted on')
+    add_inflight_argument(parser)
+    add_shard_argument(parser)
+    storage.add_format_argument(parser)
+    metrics.add_metrics_arguments(parser)
+    args = parser.parse_args()
+    if args.dedupe and args.delta:
+        parser.error('--dedupe and --delta cannot be combined')
+    if args.embeddings and args.shard is not None:
+        parser.error('--embeddings cannot be combined with --shard')
+    if args.dedupe and args.shard is not None:
+        # clusters span the whole catalog: every shard would score all their representatives
+        parser.error('--dedupe cannot be combined with --shard')
 
-    for bar in bars:
-        yval = bar.get_height()
-        plt.text(bar.get_x() + bar.get_width()/2, yval + max(sorted_counts.values())*0.01, f'{yval}',
-                 ha='center', va='bottom', fontsize=10, fontweight='bold')
+    # === Step 1: Predict the cleaned data chunk by chunk (pipeline.stages.predict) ===
+    # The model files, the cache and the delta state are the AMAZON ones; --shard K/N predicts
+    # only this shard's range of chunks into '<output>-shard<K>of<N>*' for
+    # `python -m pipeline.shards merge predict`, with a cache file of its own
+    try:
+        summary = stages.predict(amazon, args.format, workers=args.workers, inflight=args.inflight,
+                                 artifact=args.artifact, cache=None if args.no_cache else args.cache,
+                                 cache_max_entries=args.cache_max_entries, delta_mode=args.delta,
+                                 dedupe=args.dedupe, shard=args.shard, embeddings=args.embeddings,
+                                 svd_dims=args.svd_dims, svd_sample=args.svd_sample,
+                                 stage_metrics=metrics.from_args('amazon_predict', args),
+                                 arrow_strings=not args.object_strings)
+    except ValueError as e:
+        sys.exit(f"❌ {e}")
+    bucket_counts = summary['counts']
 
-    plt.title("ML-Predicted Amazon Product Bucket Distribution", fontsize=18)
-    plt.xlabel("Buckets", fontsize=14, fontweight='bold')
-    plt.ylabel("Number of Products", fontsize=14, fontweight='bold')
-    plt.xticks(rotation=25, fontsize=10)
-    plt.yticks(fontsize=10)
-    plt.grid(axis='y', linestyle='--', alpha=0.4)
-    plt.tight_layout()
+    if args.shard is not None:
+        save_shard_counts(args.shard.name(dataset(amazon, amazon['predict']['output'])), bucket_counts)
+        print(f"\n🧩 Shard {args.shard} done — merge with `python -m pipeline.shards merge predict "
+              f"--shards {args.shard.count}`")
+        return
 
-    fig_dir = './figures/amazon'
-    os.makedirs(fig_dir, exist_ok=True)
-    fig_path = os.path.join(fig_dir, 'bucket_prediction.png')
-    plt.savefig(fig_path, dpi=300, bbox_inches='tight')
-    print(f"\n🖼️ Saved bucket distribution chart to '{fig_path}'")
-    plt.show()
+    # === Step 2: Save counts and plot them (python -m pipeline.report amazon_predicted) ===
+    save_counts('amazon_predicted', bucket_counts)
+    if not args.no_plot:
+        plot_counts('amazon_predicted', show=True)
 
 if __name__ == '__main__':
     main()
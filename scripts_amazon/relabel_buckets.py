@@ -0,0 +1,90 @@
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pipeline import config, storage
+from pipeline.chunk_pool import merge_counts
+from pipeline.keyword_matcher import KeywordMatcher
+
+# Relabel the Amazon products from the keyword score matrix saved by
+# bucketing.py ('amazon_buckets_scores': PRODUCT_ID + one hit-count column per
+# bucket) with other bucket weights or another tie order, without rescanning
+# the text. Prints how the bucket counts and labels would change and how
+# ambiguous the products are (tied or one-hit best scores). Rows carried over
+# by --delta / --dedupe come with the scores stored or fanned out with their
+# label; a row without scores (-1) keeps its label.
+#
+#   python scripts_amazon/relabel_buckets.py [--weights weights.json] [--order Electronics Fashion ...]
+#                                            [--out ./data/amazon/amazon_relabeled]
+
+ID_COLUMN = 'PRODUCT_ID'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Relabel Amazon buckets from the saved keyword score matrix')
+    parser.add_argument('--weights', help='JSON file of {bucket: factor} applied to the hit counts')
+    parser.add_argument('--order', nargs='+', default=[], help='buckets that win ties, in this order')
+    parser.add_argument('--out', help='write PRODUCT_ID, final_bucket and relabeled_bucket to this dataset')
+    parser.add_argument('--chunksize', type=int, default=500000)
+    storage.add_format_argument(parser)
+    args = parser.parse_args()
+
+    bucket_keywords = config.load('amazon')['bucket']['labels']['final_bucket']['keywords']
+    matcher = KeywordMatcher(bucket_keywords)
+    weights = {}
+    if args.weights:
+        with open(args.weights) as f:
+            weights = json.load(f)
+    unknown = [bucket for bucket in list(weights) + args.order if bucket not in matcher.buckets]
+    if unknown:
+        parser.error(f"Unknown buckets: {', '.join(unknown)}")
+
+    labels_name = './data/amazon/amazon_buckets'
+    scores_name = f'{labels_name}_scores'
+    columns = [ID_COLUMN] + matcher.buckets
+    old_counts, new_counts = {}, {}
+    changed = carried = tied = one_hit = rows = 0
+    out = storage.DatasetWriter(args.out, args.format) if args.out else None
+    score_chunks = storage.read_chunks(scores_name, chunksize=args.chunksize)
+    label_chunks = storage.read_chunks(labels_name, columns=[ID_COLUMN, 'final_bucket'], chunksize=args.chunksize)
+    for i, (scores, labeled) in enumerate(zip(score_chunks, label_chunks)):
+        if list(scores.columns) != columns:
+            sys.exit("❌ The score matrix was built from other buckets — rerun bucketing.py")
+        matrix = scores[matcher.buckets].to_numpy()
+        old = labeled['final_bucket'].astype(object).to_numpy()
+        new = old.copy()
+        known = matrix[:, 0] >= 0
+        new[known] = matcher.label_scores(matrix[known], weights=weights, order=args.order)
+
+        top = np.sort(matrix[known], axis=1)[:, ::-1]
+        if top.shape[1] > 1:
+            tied += int(((top[:, 0] == top[:, 1]) & (top[:, 0] > 0)).sum())
+        one_hit += int((top[:, 0] == 1).sum())
+        carried += int((~known).sum())
+        changed += int((new != old).sum())
+        rows += len(old)
+        merge_counts(old_counts, pd.Series(old).value_counts().to_dict())
+        merge_counts(new_counts, pd.Series(new).value_counts().to_dict())
+        if out is not None:
+            out.write(pd.DataFrame({ID_COLUMN: scores[ID_COLUMN].to_numpy(), 'final_bucket': old,
+                                    'relabeled_bucket': new}))
+        print(f"✅ Chunk {i+1} relabeled")
+    if out is not None:
+        out.close()
+        print(f"\n💾 Relabeled products saved to '{storage.dataset_path(args.out, args.format)}'")
+
+    print(f"\n📦 Bucket counts ({rows} products):")
+    for label in sorted(set(old_counts) | set(new_counts), key=lambda b: -new_counts.get(b, 0)):
+        before, after = old_counts.get(label, 0), new_counts.get(label, 0)
+        print(f"➡️  {label:18s}: {before:>9d} -> {after:>9d} ({after - before:+d})")
+    print(f"\n🔁 {changed} labels change, {carried} rows without scores kept their label")
+    print(f"⚖️  {tied} products tie between buckets, {one_hit} rest on a single keyword hit")
+
+
+if __name__ == '__main__':
+    main()
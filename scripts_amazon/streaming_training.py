@@ -0,0 +1,114 @@
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
+from sklearn.linear_model import SGDClassifier
+from sklearn.metrics import accuracy_score, classification_report
+from sklearn.pipeline import make_pipeline
+
+from pipeline import storage
+
+# Out-of-core training: the labeled corpus is streamed chunk by chunk through
+# a stateless HashingVectorizer into SGDClassifier.partial_fit, so every
+# labeled row is used while memory stays bounded by one chunk.
+#
+# With idf=True an extra pass counts document frequencies over the training
+# rows first and the vectorizer becomes HashingVectorizer -> TfidfTransformer
+# with those IDF weights. Either way the saved vectorizer has the usual
+# ``transform(texts)``, so predict_bucket.py and the service load it unchanged.
+#
+# Rows are split into train/holdout by a hash of their text, so a product
+# lands on the same side on every pass and in every training mode.
+
+LABEL = 'final_bucket'
+TEXT_COLUMNS = ['TITLE', 'DESCRIPTION', 'BULLET_POINTS']
+
+
+def labeled_chunks(data_path, chunksize=150000):
+    """Yield ``(texts, labels)`` per chunk, without 'Uncategorized' rows."""
+    for chunk in storage.read_chunks(data_path, columns=TEXT_COLUMNS + [LABEL], chunksize=chunksize):
+        chunk = chunk[chunk[LABEL].notna() & (chunk[LABEL] != 'Uncategorized')]
+        text = chunk['TITLE'].fillna('') + ' ' + chunk['DESCRIPTION'].fillna('') + ' ' + chunk['BULLET_POINTS'].fillna('')
+        yield text.to_numpy(dtype=object), chunk[LABEL].to_numpy(dtype=object)
+
+
+def holdout_mask(texts, test_fraction=0.2):
+    """Deterministic per-text split: True for rows that belong to the holdout set."""
+    buckets = pd.util.hash_array(np.asarray(texts, dtype=object)) % 1000
+    return buckets < int(test_fraction * 1000)
+
+
+def hashing_vectorizer(n_features, idf):
+    # counts when an IDF transformer follows (it normalizes), l2-normalized otherwise
+    return HashingVectorizer(n_features=n_features, ngram_range=(1, 2), stop_words='english',
+                             alternate_sign=False, norm=None if idf else 'l2')
+
+
+def streaming_idf(chunks, hasher, n_features):
+    """TfidfTransformer with the smoothed IDF of all streamed texts (same formula as fit)."""
+    df = np.zeros(n_features, dtype=np.float64)
+    n_docs = 0
+    for texts in chunks:
+        X = hasher.transform(texts)
+        df += np.bincount(X.indices, minlength=n_features)  # hashed rows have unique indices
+        n_docs += X.shape[0]
+    transformer = TfidfTransformer()
+    transformer.idf_ = np.log((n_docs + 1) / (df + 1)) + 1.0
+    transformer.n_features_in_ = n_features
+    return transformer
+
+
+def train_out_of_core(data_path, classes, chunksize=150000, n_features=2 ** 20, idf=False, epochs=1,
+                      alpha=1e-6, average=True, batch_size=20000, test_fraction=0.2, random_state=42):
+    """Stream ``data_path`` into an (averaged) SGD logistic model.
+
+    Returns ``(vectorizer, clf, y_true, y_pred)`` with the holdout labels and predictions.
+    """
+    hasher = hashing_vectorizer(n_features, idf)
+
+    def train_texts():
+        for texts, _ in labeled_chunks(data_path, chunksize):
+            texts = texts[~holdout_mask(texts, test_fraction)]
+            for start_row in range(0, len(texts), batch_size):
+                yield texts[start_row:start_row + batch_size]
+
+    if idf:
+        print("🔄 Counting document frequencies (streaming IDF pass)...")
+        vectorizer = make_pipeline(hasher, streaming_idf(train_texts(), hasher, n_features))
+    else:
+        vectorizer = hasher
+
+    clf = SGDClassifier(loss='log_loss', alpha=alpha, average=average, random_state=random_state)
+    rng = np.random.default_rng(random_state)
+    for epoch in range(epochs):
+        seen = 0
+        start = time.time()
+        for i, (texts, labels) in enumerate(labeled_chunks(data_path, chunksize)):
+            train = ~holdout_mask(texts, test_fraction)
+            order = rng.permutation(int(train.sum()))
+            texts, labels = texts[train][order], labels[train][order]
+            # vectorize in mini-batches: the sparse matrix, not the text, dominates memory
+            for start_row in range(0, len(texts), batch_size):
+                batch = slice(start_row, start_row + batch_size)
+                clf.partial_fit(vectorizer.transform(texts[batch]), labels[batch], classes=classes)
+            seen += len(texts)
+            print(f"✅ Epoch {epoch + 1}/{epochs}: trained on chunk {i + 1} ({seen} rows so far)")
+        print(f"⏱️ Epoch {epoch + 1} finished in {time.time() - start:.2f}s")
+
+    y_true, y_pred = [], []
+    for texts, labels in labeled_chunks(data_path, chunksize):
+        test = holdout_mask(texts, test_fraction)
+        if test.any():
+            y_true.append(labels[test])
+            y_pred.extend(clf.predict(vectorizer.transform(texts[test][i:i + batch_size]))
+                          for i in range(0, int(test.sum()), batch_size))
+    y_true = np.concatenate(y_true) if y_true else np.array([], dtype=object)
+    y_pred = np.concatenate(y_pred) if y_pred else np.array([], dtype=object)
+    return vectorizer, clf, y_true, y_pred
+
+
+def report(y_true, y_pred):
+    print("\n=== Classification Report ===")
+    print(classification_report(y_true, y_pred))
+    return accuracy_score(y_true, y_pred)
@@ -1,77 +1,67 @@
-import pandas as pd
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.linear_model import LogisticRegression
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import classification_report
-import joblib
+import argparse
 import os
+import sys
 import time
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pipeline import config, stages, sweep
+from pipeline.config import dataset
 
-def main():
-    # === Step 1: Load labeled Amazon bucket data in chunks ===
-    data_path = './data/amazon/amazon_buckets.csv'
-    chunksize = 150000
-    chunks = []
-    total_chunks = sum(1 for _ in pd.read_csv(data_path, chunksize=chunksize))
-
-    print(f"\U0001F4E6 Total chunks to load: {total_chunks}\n")
-
-    for i, chunk in enumerate(pd.read_csv(data_path, chunksize=chunksize)):
-        print(f"✅ Loaded chunk {i + 1}/{total_chunks}")
-
-        if 'final_bucket' not in chunk.columns or chunk['final_bucket'].isnull().all():
-            continue
+from bucketing import bucket_keywords
+import streaming_training
 
-        chunk = chunk[chunk['final_bucket'] != 'Uncategorized'].copy()
-        chunk.loc[:, 'text'] = (
-            chunk['TITLE'].fillna('') + ' ' +
-            chunk['DESCRIPTION'].fillna('') + ' ' +
-            chunk['BULLET_POINTS'].fillna('')
-        )
 
-        chunks.append(chunk[['text', 'final_bucket']])
+# Vectorizer, model, sampling and split come from the "train" section of
+# configs/amazon.json, which `python -m pipeline.sweep --apply` rewrites
+amazon = config.load('amazon')
+train_spec = amazon['train']
 
-    # Combine and optionally sample training data
-    df_train = pd.concat(chunks, ignore_index=True)
-    if len(df_train) > 200000:
-        print(f"📉 Sampling from {len(df_train)} to 200000 rows for faster training")
-        df_train = df_train.sample(n=200000, random_state=42)
 
-    X = df_train['text']
-    y = df_train['final_bucket']
+def save_model(clf, vectorizer):
+    print()
+    stages.save_model(amazon, clf, vectorizer)
 
-    # === Step 2: Train/test split ===
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42, stratify=y
-    )
-
-    # === Step 3: Vectorize text with TF-IDF ===
-    print("🔄 Fitting vectorizer...")
-    vectorizer = TfidfVectorizer(max_features=15000, ngram_range=(1, 2), stop_words='english')
-    X_train_vec = vectorizer.fit_transform(X_train)
-    X_test_vec = vectorizer.transform(X_test)
-
-    # === Step 4: Train Logistic Regression ===
-    print("⚡ Training Logistic Regression model...")
-    clf = LogisticRegression(max_iter=300, n_jobs=-1)
 
+def train_streaming(args, data_path):
+    # Full labeled corpus, one chunk in memory at a time
     start = time.time()
-    clf.fit(X_train_vec, y_train)
-    end = time.time()
-    print(f"✅ Training completed in {end - start:.2f} seconds.")
+    vectorizer, clf, y_true, y_pred = streaming_training.train_out_of_core(
+        data_path, classes=sorted(bucket_keywords), chunksize=args.chunksize, n_features=args.n_features,
+        idf=args.idf, epochs=args.epochs, alpha=args.alpha)
+    print(f"✅ Out-of-core training completed in {time.time() - start:.2f} seconds.")
+    accuracy = streaming_training.report(y_true, y_pred)
+    print(f"🎯 Holdout accuracy: {accuracy:.4f} on {len(y_true)} rows")
+    save_model(clf, vectorizer)
 
-    # === Step 5: Evaluate model ===
-    y_pred = clf.predict(X_test_vec)
-    print("\n=== Classification Report ===")
-    print(classification_report(y_test, y_pred))
 
-    # === Step 6: Save model and vectorizer ===
-    os.makedirs('./models/amazon', exist_ok=True)
-    joblib.dump(clf, './models/amazon/bucket_classifier.pkl')
-    joblib.dump(vectorizer, './models/amazon/vectorizer.pkl')
-
-    print("\n✅ Model and vectorizer saved to './models/amazon/'")
+def main():
+    parser = argparse.ArgumentParser(description='Train the Amazon bucket classifier')
+    parser.add_argument('--out-of-core', action='store_true',
+                        help='stream every labeled row through HashingVectorizer + SGD instead of '
+                             'fitting the configured vectorizer + model (configs/amazon.json "train") on a sample')
+    parser.add_argument('--idf', action='store_true', help='out-of-core: add a streaming IDF pass')
+    parser.add_argument('--epochs', type=int, default=1, help='out-of-core: passes over the training rows')
+    parser.add_argument('--n-features', type=int, default=2 ** 20, help='out-of-core: hashing dimensions')
+    parser.add_argument('--alpha', type=float, default=1e-6, help='out-of-core: SGD regularization')
+    parser.add_argument('--chunksize', type=int, default=150000)
+    parser.add_argument('--sweep', action='store_true',
+                        help='rank vectorizer x classifier variants on cached features instead (pipeline.sweep)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='sweep: variants trained in parallel')
+    args = parser.parse_args()
+
+    if args.sweep:
+        sweep.main(['--marketplace', 'amazon', '--workers', str(args.workers)])
+        return
+
+    data_path = dataset(amazon, train_spec['input'])
+    if args.out_of_core:
+        train_streaming(args, data_path)
+        return
+
+    # === Configured vectorizer + model on a sample (pipeline.stages.train) ===
+    # labeled rows streamed in --chunksize chunks, sampled, split, fitted,
+    # evaluated and saved with the bucket_model/ artifact
+    stages.train(dict(amazon, chunksize=args.chunksize))
 
 
 if __name__ == '__main__':
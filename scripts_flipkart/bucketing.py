@@ -1,49 +1,30 @@
 import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-from collections import Counter
+import argparse
+import os
+import sys
 
-# === Step 1: Load cleaned data ===
-df = pd.read_csv('./data/flipkart/flipkart_cleaned.csv')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pipeline import config, stages, storage
+from pipeline.config import dataset
+from pipeline.report import plot_counts, save_counts
+from pipeline.rule_engine import RuleSet
 
-# === Step 2: Add discount percent ===
+# === Step 1: Discount percent (row-wise reference, see rule_engine.discount_percent) ===
 def calculate_discount(row):
     if row['retail_price'] > 0:
         return ((row['retail_price'] - row['discounted_price']) / row['retail_price']) * 100
     return 0
 
-df['discount_percent'] = df.apply(calculate_discount, axis=1)
-
-# === Step 3: Define keyword sets ===
-clothing_keywords = [
-    'shirt', 'dress', 'apparel', 'saree', 'kurta', 'kurti', 'tunic',
-    'anarkali', 'stylish', 'ethnic', 'trendy', 'fashionwear', 'floral print', 'style code',
-    't-shirt', 'blouse', 'leggings', 'jeans', 'jacket', 'sweater',
-    'boots', 'casual shoes', 'sandals', 'heels', 'footwear', "boy's", "girl's"
-]
-
-jewelry_keywords = [
-    'wristwatch', 'watch', 'analog watch', 'digital watch', 'bracelet', 'ring',
-    'diamond', 'gold', 'silver', 'jewellery', 'jewelry', 'necklace', 'cubic zirconia',
-    'chronograph', 'quartz', 'sapphire crystal'
-]
-
-tech_keywords = [
-    'usb', 'bluetooth', 'led', 'electronics', 'sound mixer', 'equalizer',
-    'dj', 'digital display', 'smartphone', 'tablet', 'headphones', 'earphones',
-    'amplifier', 'charger', 'adapter', 'speaker', 'hdmi', 'tech', 'gadget',
-    'cctv', 'bnc', 'connector', 'wire', 'cable', 'surveillance'
-]
-
-home_keywords = [
-    'kitchen', 'decor', 'wall art', 'wall sticker', 'planter',
-    'storage box', 'laundry bag', 'bed sheet', 'curtain',
-    'cutlery', 'cookware', 'lamp', 'cushion', 'vase', 'photo frame',
-    'home furnishing', 'organizer', 'tablecloth', 'sofa', 'carpet', 'mat', 'blanket',
-    'notebook', 'diary', 'coin bank', 'stationery'
-]
-
-# === Step 4: Label assignment ===
+# === Step 2: Keyword sets and rules (configs/flipkart.json, shared with `python -m pipeline`) ===
+flipkart = config.load('flipkart')
+bucket_config = flipkart['bucket']
+keyword_sets = bucket_config['keyword_sets']
+clothing_keywords = keyword_sets['clothing']
+jewelry_keywords = keyword_sets['jewelry']
+tech_keywords = keyword_sets['tech']
+home_keywords = keyword_sets['home']
+
+# === Step 3: Label assignment (row-wise reference implementations) ===
 def assign_final_bucket(row):
     name = str(row['product_name']) if pd.notnull(row['product_name']) else ''
     desc = str(row['description']) if pd.notnull(row['description']) else ''
@@ -87,48 +68,43 @@ def assign_confident_bucket(row):
 
     return 'Uncertain'
 
-# === Step 5: Apply confident labeling first ===
-df['confident_bucket'] = df.apply(assign_confident_bucket, axis=1)
-labeled_df = df[df['confident_bucket'] != 'Uncertain']
-labeled_df.to_csv('./data/flipkart/flipkart_labeled_seed.csv', index=False)
-
-# === Step 6: Apply full label logic ===
-df['final_bucket'] = df.apply(assign_final_bucket, axis=1)
-
-# === Step 7: Save labeled dataset ===
-df.to_csv('./data/flipkart/flipkart_buckets_single_label.csv', index=False)
-print("✅ Saved final labeled data to './data/flipkart/flipkart_buckets_single_label.csv'")
-
-# === Step 8: Bucket counts ===
-bucket_counts = df['final_bucket'].value_counts()
+# === Step 4: Vectorized label assignment ===
+# The config's rule lists state the same rules and priority order as the
+# row-wise functions above; RuleSet evaluates them as boolean column masks
+# over a whole chunk (pipeline.stages.bucket labels with the same rules).
+final_rules = RuleSet(bucket_config['labels']['final_bucket']['rules'],
+                      bucket_config['labels']['final_bucket']['default'], keyword_sets)
+confident_rules = RuleSet(bucket_config['labels']['confident_bucket']['rules'],
+                          bucket_config['labels']['confident_bucket']['default'], keyword_sets)
 
-print("\n📦 Product Counts by Final Bucket:")
-for label, count in bucket_counts.items():
-    print(f"➡️  {label:18s}: {count}")
+def label_final_buckets(df, text):
+    return final_rules.label(df, text)
 
-# === Step 9: Visualization ===
-plt.figure(figsize=(10, 6))
-bars = plt.bar(bucket_counts.index, bucket_counts.values, color=['#5DADE2', '#EC7063', '#58D68D', '#A569BD', '#F4D03F', '#95A5A6'])
+def label_confident_buckets(df, text):
+    return confident_rules.label(df, text)
 
-for bar in bars:
-    yval = bar.get_height()
-    plt.text(bar.get_x() + bar.get_width()/2, yval + 100, f'{yval}', ha='center', va='bottom', fontsize=10, fontweight='bold')
+def main():
+    parser = argparse.ArgumentParser(description='Rule-based Flipkart bucketing')
+    parser.add_argument('--no-plot', action='store_true', help='skip the chart (render it later with pipeline.report)')
+    storage.add_format_argument(parser)
+    args = parser.parse_args()
 
-plt.title("Product Count per Bucket", fontsize=16)
-plt.xlabel("Bucket", fontsize=12, fontweight='bold')
-plt.ylabel("Number of Products", fontsize=12, fontweight='bold')
-plt.xticks(rotation=0, fontsize=11)
-plt.yticks(fontsize=11)
-plt.tight_layout()
-plt.grid(axis='y', linestyle='--', alpha=0.4)
+    # === Step 5: Label the cleaned data chunk by chunk (pipeline.stages.bucket) ===
+    # discount percent first, then the confident labels (rows that are not 'Uncertain' are
+    # saved as the training seed) and the full label logic, with the RuleSets above
+    summary = stages.bucket(flipkart, args.format)
+    print(f"✅ Saved final labeled data to '{dataset(flipkart, bucket_config['output'])}'")
 
-plt.savefig('./figures/flipkart/bucket_distribution.png', dpi=300, bbox_inches='tight')
+    # === Step 6: Bucket counts ===
+    bucket_counts = dict(sorted(summary['counts']['final_bucket'].items(), key=lambda x: -x[1]))
 
-plt.show()
+    # === Step 7: Save counts and plot them (python -m pipeline.report flipkart_buckets) ===
+    save_counts('flipkart_buckets', bucket_counts)
+    if not args.no_plot:
+        plot_counts('flipkart_buckets', show=True)
 
 
-
-# # === Step 10: View Sample Uncategorized Products ===
+# # === Step 11: View Sample Uncategorized Products ===
 # print("\n🔎 Sample 'Uncategorized' Products (Name + Description + Category):\n")
 
 # uncategorized_df = df[df['final_bucket'] == 'Uncategorized'].head(20)
@@ -140,3 +116,7 @@ plt.show()
 #     print(f"🏷️  Category  : {row.get('product_category_tree', 'N/A')}")
 #     print(f"💰 Price      : ₹{row['retail_price']}")
 #     print("-" * 80)
+
+
+if __name__ == '__main__':
+    main()
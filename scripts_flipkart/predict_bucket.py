@@ -1,57 +1,39 @@
-import pandas as pd
-import joblib
-import matplotlib.pyplot as plt
-from collections import Counter
+import argparse
 import os
-
-# === Step 1: Load model and vectorizer ===
-model = joblib.load('./models/bucket_classifier.pkl')
-vectorizer = joblib.load('./models/vectorizer.pkl')
-
-# === Step 2: Load full cleaned data ===
-df = pd.read_csv('./data/flipkart/flipkart_cleaned.csv')
-
-# === Step 3: Combine text fields for prediction ===
-df['text'] = (df['product_name'].fillna('') + ' ' +
-              df['description'].fillna('') + ' ' +
-              df['product_category_tree'].fillna(''))
-
-# === Step 4: Vectorize and predict ===
-X_full = vectorizer.transform(df['text'])
-df['predicted_bucket'] = model.predict(X_full)
-
-# === Step 5: Save predictions ===
-os.makedirs('./data', exist_ok=True)
-df.to_csv('./data/flipkart/predicted_buckets.csv', index=False)
-print("✅ Predictions saved to './data/flipkart/predicted_buckets.csv'")
-
-# === Step 6: Bucket counts ===
-bucket_counts = df['predicted_bucket'].value_counts().sort_values(ascending=False)
-
-print("\n📦 Final Predicted Bucket Counts:\n")
-for label, count in bucket_counts.items():
-    print(f"➡️  {label:18s}: {count}")
-
-# === Step 7: Plot and save bar chart ===
-plt.figure(figsize=(10, 6))
-bars = plt.bar(bucket_counts.index, bucket_counts.values, color=['#5DADE2', '#EC7063', '#58D68D', '#A569BD', '#F4D03F', '#95A5A6'])
-
-# Add value labels
-for bar in bars:
-    yval = bar.get_height()
-    plt.text(bar.get_x() + bar.get_width()/2, yval + 100, f'{yval}', ha='center', va='bottom', fontsize=10, fontweight='bold')
-
-# Chart style
-plt.title("ML-Predicted Product Bucket Distribution", fontsize=16)
-plt.xlabel("Buckets", fontsize=12, fontweight='bold')
-plt.ylabel("Number of Products", fontsize=12, fontweight='bold')
-plt.xticks(fontsize=11)
-plt.yticks(fontsize=11)
-plt.tight_layout()
-plt.grid(axis='y', linestyle='--', alpha=0.4)
-
-# Save and show
-os.makedirs('./figures', exist_ok=True)
-plt.savefig('./figures/flipkart/bucket_prediction.png', dpi=300, bbox_inches='tight')
-print("🖼️ Saved bar chart to './figures/flipkart/bucket_prediction.png'")
-plt.show()
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pipeline import config, stages, storage
+from pipeline.config import dataset
+from pipeline.report import plot_counts, save_counts
+
+flipkart = config.load('flipkart')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Predict Flipkart buckets with the trained model')
+    parser.add_argument('--cache', default='./data/flipkart/prediction_cache.sqlite',
+                        help='persistent prediction cache (SQLite) keyed by text hash')
+    parser.add_argument('--no-cache', action='store_true', help='score every row, ignore the cache')
+    parser.add_argument('--cache-max-entries', type=int, default=1_000_000)
+    parser.add_argument('--artifact', default='./models/bucket_model',
+                        help='compact model artifact (used when present, else the joblib pickles)')
+    parser.add_argument('--no-plot', action='store_true', help='skip the chart (render it later with pipeline.report)')
+    parser.add_argument('--chunksize', type=int, default=100000)
+    storage.add_format_argument(parser)
+    args = parser.parse_args()
+
+    # === Step 1: Predict the cleaned data chunk by chunk (pipeline.stages.predict, only cache misses) ===
+    # sklearn is only imported without the artifact
+    summary = stages.predict(dict(flipkart, chunksize=args.chunksize), args.format, artifact=args.artifact,
+                             cache=None if args.no_cache else args.cache, cache_max_entries=args.cache_max_entries)
+    print(f"✅ Predictions saved to '{dataset(flipkart, flipkart['predict']['output'])}'")
+
+    # === Step 2: Save counts and plot them (python -m pipeline.report flipkart_predicted) ===
+    save_counts('flipkart_predicted', summary['counts'])
+    if not args.no_plot:
+        plot_counts('flipkart_predicted', show=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+import os
+import random
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'scripts_amazon'))
+
+from bucketing import assign_amazon_bucket, bucket_keywords
+from pipeline import storage
+from pipeline.keyword_matcher import KeywordMatcher, build_texts
+
+# KeywordMatcher.assign_many against the row-wise assign_amazon_bucket on a
+# fixed frame: missing fields (NaN and None), keywords inside other keywords,
+# keywords spanning two fields, ties between buckets and rows with no hit,
+# plus a seeded random catalog built from the configured keywords.
+
+FIXED_ROWS = [
+    ('Wooden Dresser', np.nan, np.nan),                       # 'dress' in 'dresser', two buckets tie
+    ('Sweatshirt for men', None, 'Cotton'),                   # 'shirt' in 'sweatshirt'
+    ('Gold EARRING set', 'Analog Watch with strap', np.nan),  # 'ring'/'earring', 'watch'/'analog watch'
+    ('Bluetooth Anklet', np.nan, np.nan),                     # one hit in each of two buckets
+    ('Casual', 'Shoes', np.nan),                              # 'casual shoes' across two fields
+    ('Xyzzy plugh', 'nothing to see', None),                  # no hit
+    (np.nan, np.nan, np.nan),                                 # only missing fields
+    ('', '', ''),
+]
+
+
+def fixed_frame():
+    return pd.DataFrame(FIXED_ROWS, columns=['TITLE', 'DESCRIPTION', 'BULLET_POINTS'])
+
+
+def random_frame(n_rows=500, seed=0):
+    rng = random.Random(seed)
+    keywords = sorted({kw for kws in bucket_keywords.values() for kw in kws})
+    filler = ['premium', 'pack', 'of', 'for', 'with', 'and', 'black', 'durable', 'Men', 'WOMEN']
+
+    def field():
+        if rng.random() < 0.2:
+            return rng.choice([np.nan, None])
+        words = [rng.choice(keywords) if rng.random() < 0.15 else rng.choice(filler)
+                 for _ in range(rng.randint(0, 12))]
+        # glue some words so keywords also hit inside and across words
+        return ''.join(w + ('' if rng.random() < 0.1 else ' ') for w in words).strip().title()
+
+    return pd.DataFrame([(field(), field(), field()) for _ in range(n_rows)],
+                        columns=['TITLE', 'DESCRIPTION', 'BULLET_POINTS'])
+
+
+def reference_scores(row):
+    text = ' '.join(str(row[col]) for col in ('TITLE', 'DESCRIPTION', 'BULLET_POINTS')).lower()
+    return [sum(kw in text for kw in keywords) for keywords in bucket_keywords.values()]
+
+
+def test_fixed_frame_covers_the_edge_cases():
+    scores = [reference_scores(row) for _, row in fixed_frame().iterrows()]
+    assert any(max(s) > 0 and s.count(max(s)) > 1 for s in scores), 'no tie between buckets'
+    assert any(max(s) == 0 for s in scores), 'no row without a hit'
+    assert fixed_frame().isna().any().all()
+    keywords = {kw for kws in bucket_keywords.values() for kw in kws}
+    assert {'dress', 'dresser', 'shirt', 'sweatshirt', 'casual shoes'} <= keywords
+
+
+@pytest.mark.parametrize('use_automaton', [True, False])
+@pytest.mark.parametrize('frame', [fixed_frame, random_frame])
+def test_assign_many_matches_assign_amazon_bucket(frame, use_automaton):
+    df = frame()
+    expected = df.apply(assign_amazon_bucket, axis=1).tolist()
+    matcher = KeywordMatcher(bucket_keywords, use_automaton=use_automaton)
+    assert matcher.assign_many(build_texts(df)) == expected
+    assert [matcher.assign(text) for text in build_texts(df)] == expected
+
+
+def test_fixed_frame_labels():
+    labels = KeywordMatcher(bucket_keywords).assign_many(build_texts(fixed_frame()))
+    buckets = list(bucket_keywords)
+    # ties go to the first bucket in dict order
+    assert labels[0] == min(['Clothing', 'Furniture & Fixtures'], key=buckets.index)
+    assert labels[3] == min(['Jewelry', 'Tech Gadgets'], key=buckets.index)
+    assert labels[5:] == ['Uncategorized'] * 3
+
+
+@pytest.mark.skipif(storage.TEXT_DTYPE is None, reason='pyarrow is not installed')
+def test_arrow_strings_label_like_object_columns():
+    # Parquet reads text as Arrow strings with pd.NA for missing values
+    df = random_frame()
+    arrow = df.astype({col: storage.TEXT_DTYPE for col in df.columns})
+    assert build_texts(arrow) == build_texts(df)
+    assert KeywordMatcher(bucket_keywords).assign_many(build_texts(arrow)) == \
+        df.apply(assign_amazon_bucket, axis=1).tolist()
@@ -0,0 +1,63 @@
+import os
+import sys
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from pipeline.near_duplicates import NearDuplicateIndex, recall_check
+
+# Clusters against brute-force Jaccard: re-listed products with a one-word
+# edit land with their original, and a chain of texts each shifted two words
+# from the last (every neighbour a near-duplicate, the ends disjoint) is not
+# merged through its links.
+
+
+def words(n, seed):
+    return [f'w{i}' for i in np.random.default_rng(seed).permutation(n)]
+
+
+def relisted_texts(n_products=300, seed=0):
+    rng = np.random.default_rng(seed)
+    vocabulary = words(5000, seed)
+    texts = [' '.join(rng.choice(vocabulary, 60)) for _ in range(n_products)]
+    copies = []
+    for text in texts[::3]:
+        tokens = text.split()
+        tokens[int(rng.integers(len(tokens)))] = 'new'
+        copies.append(' '.join(tokens))
+    return texts + copies
+
+
+def chained_texts(n_texts=150, width=40, shift=2, seed=0):
+    vocabulary = words(n_texts * shift + width, seed)
+    return [' '.join(vocabulary[i * shift:i * shift + width]) for i in range(n_texts)]
+
+
+def test_relisted_copies_join_their_original():
+    texts = relisted_texts()
+    check = recall_check(texts)
+    assert check['recall'] >= 0.95 and check['precision'] >= 0.95
+    index = NearDuplicateIndex()
+    index.add(texts)
+    representative = index.clusters().representative
+    assert (representative <= np.arange(len(texts))).all()  # representatives come first
+
+
+def test_chain_is_not_merged_transitively():
+    texts = chained_texts()
+    index = NearDuplicateIndex()
+    index.add(texts)
+    clusters = index.clusters()
+    assert clusters.n_clusters > len(texts) // 4
+    assert np.bincount(clusters.representative).max() <= 6  # a few neighbours, not the chain
+    check = recall_check(texts)
+    assert check['min_copy_jaccard'] >= 0.6
+    assert check['copy_precision'] >= 0.8
+
+
+def test_empty_texts_stay_alone():
+    index = NearDuplicateIndex()
+    index.add(['', '', 'some product title here'])
+    assert index.clusters().representative.tolist() == [0, 1, 2]